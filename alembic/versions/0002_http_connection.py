@@ -0,0 +1,20 @@
+from alembic import op
+
+revision = "0002_http_connection"
+down_revision = "0001_init"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 'cold': new client + connection per probe (latency includes DNS/TCP/TLS setup)
+    # 'warm': shared keep-alive client (latency of a request on a reused connection)
+    op.execute("""
+        ALTER TABLE targets
+        ADD COLUMN IF NOT EXISTS http_connection TEXT NOT NULL DEFAULT 'cold'
+            CHECK (http_connection IN ('cold', 'warm'));
+        """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE targets DROP COLUMN IF EXISTS http_connection;")
@@ -0,0 +1,29 @@
+from alembic import op
+
+revision = "0003_pollers"
+down_revision = "0002_http_connection"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row per running poller process. A poller is live while its lease has not
+    # expired; sharded pollers split targets among the live set.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS pollers (
+            id UUID PRIMARY KEY,
+            name TEXT NOT NULL,
+            started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            lease_expires_at TIMESTAMPTZ NOT NULL
+        );
+        """)
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pollers_lease_expires_at
+        ON pollers (lease_expires_at);
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS pollers;")
@@ -0,0 +1,19 @@
+from alembic import op
+
+revision = "0004_target_priority"
+down_revision = "0003_pollers"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Admission priority of a target's probes when the poller is overloaded.
+    op.execute("""
+        ALTER TABLE targets
+        ADD COLUMN IF NOT EXISTS priority TEXT NOT NULL DEFAULT 'normal'
+            CHECK (priority IN ('high', 'normal', 'low'));
+        """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE targets DROP COLUMN IF EXISTS priority;")
@@ -0,0 +1,21 @@
+from alembic import op
+
+revision = "0005_result_key"
+down_revision = "0004_target_priority"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Idempotency key assigned by the poller, so results replayed from its on-disk
+    # spool are inserted at most once. Older rows have none.
+    op.execute("ALTER TABLE probe_results ADD COLUMN IF NOT EXISTS result_key UUID NULL;")
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_probe_results_result_key
+        ON probe_results (result_key);
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_probe_results_result_key;")
+    op.execute("ALTER TABLE probe_results DROP COLUMN IF EXISTS result_key;")
@@ -0,0 +1,130 @@
+from alembic import op
+
+revision = "0006_partition_probe_results"
+down_revision = "0005_result_key"
+branch_labels = None
+depends_on = None
+
+# Daily partitions are named probe_results_pYYYYMMDD and cover [day, day + 1) in UTC.
+# Partitions for future days are created by the poller's maintenance task
+# (app.repos.partitions.ensure_probe_result_partitions); the migration creates them
+# for every day with existing data plus the next week.
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE probe_results RENAME TO probe_results_unpartitioned;")
+    op.execute("ALTER SEQUENCE probe_results_id_seq OWNED BY NONE;")
+    op.execute("ALTER INDEX idx_probe_results_ts_id_desc RENAME TO idx_probe_results_unpart_ts;")
+    op.execute(
+        "ALTER INDEX idx_probe_results_target_ts_id_desc RENAME TO idx_probe_results_unpart_target;"
+    )
+    op.execute("ALTER INDEX uq_probe_results_result_key RENAME TO uq_probe_results_unpart_key;")
+
+    # The partition key has to be part of every unique constraint, hence (id, ts) and
+    # (result_key, ts).
+    op.execute("""
+        CREATE TABLE probe_results (
+            id BIGINT NOT NULL DEFAULT nextval('probe_results_id_seq'),
+            target_id UUID NOT NULL REFERENCES targets(id),
+            ts TIMESTAMPTZ NOT NULL,
+            success BOOLEAN NOT NULL,
+            latency_ms INT NULL,
+            status_code INT NULL,
+            error TEXT NULL,
+            result_key UUID NULL,
+            PRIMARY KEY (id, ts)
+        ) PARTITION BY RANGE (ts);
+        """)
+    op.execute("ALTER SEQUENCE probe_results_id_seq OWNED BY probe_results.id;")
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_probe_results_ts_id_desc
+        ON probe_results (ts DESC, id DESC);
+        """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_probe_results_target_ts_id_desc
+        ON probe_results (target_id, ts DESC, id DESC);
+        """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_probe_results_result_key
+        ON probe_results (result_key, ts);
+        """)
+
+    # Catches rows outside every daily partition (e.g. clock skew far into the future).
+    op.execute("CREATE TABLE probe_results_default PARTITION OF probe_results DEFAULT;")
+
+    op.execute("""
+        DO $$
+        DECLARE
+            -- partitions are UTC days; CURRENT_DATE follows the session time zone
+            today date := (now() AT TIME ZONE 'UTC')::date;
+            first_day date;
+            d date;
+        BEGIN
+            SELECT COALESCE(MIN((ts AT TIME ZONE 'UTC')::date), today)
+            INTO first_day
+            FROM probe_results_unpartitioned;
+
+            d := LEAST(first_day, today);
+            WHILE d <= today + 7 LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF probe_results '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'probe_results_p' || to_char(d, 'YYYYMMDD'),
+                    d::timestamp AT TIME ZONE 'UTC',
+                    (d + 1)::timestamp AT TIME ZONE 'UTC'
+                );
+                d := d + 1;
+            END LOOP;
+        END $$;
+        """)
+
+    op.execute("""
+        INSERT INTO probe_results (id, target_id, ts, success, latency_ms, status_code, error, result_key)
+        SELECT id, target_id, ts, success, latency_ms, status_code, error, result_key
+        FROM probe_results_unpartitioned;
+        """)
+    op.execute("DROP TABLE probe_results_unpartitioned;")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE probe_results RENAME TO probe_results_partitioned;")
+    op.execute("ALTER SEQUENCE probe_results_id_seq OWNED BY NONE;")
+    op.execute("ALTER INDEX idx_probe_results_ts_id_desc RENAME TO idx_probe_results_part_ts;")
+    op.execute(
+        "ALTER INDEX idx_probe_results_target_ts_id_desc RENAME TO idx_probe_results_part_target;"
+    )
+    op.execute("ALTER INDEX uq_probe_results_result_key RENAME TO uq_probe_results_part_key;")
+
+    op.execute("""
+        CREATE TABLE probe_results (
+            id BIGINT PRIMARY KEY DEFAULT nextval('probe_results_id_seq'),
+            target_id UUID NOT NULL REFERENCES targets(id),
+            ts TIMESTAMPTZ NOT NULL,
+            success BOOLEAN NOT NULL,
+            latency_ms INT NULL,
+            status_code INT NULL,
+            error TEXT NULL,
+            result_key UUID NULL
+        );
+        """)
+    op.execute("ALTER SEQUENCE probe_results_id_seq OWNED BY probe_results.id;")
+    op.execute("""
+        INSERT INTO probe_results
+        SELECT id, target_id, ts, success, latency_ms, status_code, error, result_key
+        FROM probe_results_partitioned;
+        """)
+    op.execute("DROP TABLE probe_results_partitioned;")
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_probe_results_ts_id_desc
+        ON probe_results (ts DESC, id DESC);
+        """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_probe_results_target_ts_id_desc
+        ON probe_results (target_id, ts DESC, id DESC);
+        """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_probe_results_result_key
+        ON probe_results (result_key);
+        """)
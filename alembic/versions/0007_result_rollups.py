@@ -0,0 +1,53 @@
+from alembic import op
+
+revision = "0007_result_rollups"
+down_revision = "0006_partition_probe_results"
+branch_labels = None
+depends_on = None
+
+_ROLLUP_COLUMNS = """
+    target_id UUID NOT NULL REFERENCES targets(id),
+    bucket TIMESTAMPTZ NOT NULL,
+    probes INT NOT NULL,
+    successes INT NOT NULL,
+    latency_count INT NOT NULL,
+    latency_sum BIGINT NOT NULL,
+    latency_min INT NULL,
+    latency_max INT NULL,
+    -- counts per app.constants.LATENCY_HISTOGRAM_BOUNDS_MS bucket, plus overflow
+    latency_hist INT[] NOT NULL,
+    PRIMARY KEY (target_id, bucket)
+"""
+
+
+def upgrade() -> None:
+    # Per-target aggregates of probe_results, kept current by the poller's rollup task.
+    op.execute(f"CREATE TABLE IF NOT EXISTS probe_rollup_1m ({_ROLLUP_COLUMNS});")
+    op.execute(f"CREATE TABLE IF NOT EXISTS probe_rollup_1h ({_ROLLUP_COLUMNS});")
+
+    # Supports all-target range queries (summaries) and retention deletes.
+    op.execute("CREATE INDEX IF NOT EXISTS idx_probe_rollup_1m_bucket ON probe_rollup_1m (bucket);")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_probe_rollup_1h_bucket ON probe_rollup_1h (bucket);")
+
+    # Watermark of the rollup task: rows with id <= last_id are aggregated. pending_id
+    # is the id sequence position seen on the previous run; ids up to it are assigned
+    # long enough ago that their transactions have committed.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_id BIGINT NOT NULL,
+            pending_id BIGINT NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """)
+    op.execute("""
+        INSERT INTO rollup_state (name, last_id, pending_id)
+        VALUES ('probe_results', 0, 0)
+        ON CONFLICT (name) DO NOTHING;
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS rollup_state;")
+    op.execute("DROP TABLE IF EXISTS probe_rollup_1h;")
+    op.execute("DROP TABLE IF EXISTS probe_rollup_1m;")
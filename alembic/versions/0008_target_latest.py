@@ -0,0 +1,40 @@
+from alembic import op
+
+revision = "0008_target_latest"
+down_revision = "0007_result_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The newest probe result of each target, upserted by the result writer in the
+    # same statement that inserts the results (app.repos.results).
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS target_latest (
+            target_id UUID PRIMARY KEY REFERENCES targets(id) ON DELETE CASCADE,
+            result_id BIGINT NOT NULL,
+            ts TIMESTAMPTZ NOT NULL,
+            success BOOLEAN NOT NULL,
+            latency_ms INT NULL,
+            status_code INT NULL,
+            error TEXT NULL
+        );
+        """)
+
+    op.execute("""
+        INSERT INTO target_latest (target_id, result_id, ts, success, latency_ms, status_code, error)
+        SELECT t.id, r.id, r.ts, r.success, r.latency_ms, r.status_code, r.error
+        FROM targets t
+        CROSS JOIN LATERAL (
+            SELECT id, ts, success, latency_ms, status_code, error
+            FROM probe_results
+            WHERE target_id = t.id
+            ORDER BY ts DESC, id DESC
+            LIMIT 1
+        ) r
+        ON CONFLICT (target_id) DO NOTHING;
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS target_latest;")
@@ -0,0 +1,53 @@
+from alembic import op
+
+revision = "0009_change_tokens"
+down_revision = "0008_target_latest"
+branch_labels = None
+depends_on = None
+
+# Cheap tokens the API derives ETags from (app.repos.tokens): a version counter bumped
+# by every statement that writes targets, and per target the highest result id
+# stored, which also moves for late results that do not change the newest one.
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        );
+        """)
+    op.execute("INSERT INTO change_counters (name) VALUES ('targets') ON CONFLICT DO NOTHING;")
+
+    # Statement level, so a bulk sync bumps the counter once. A trigger rather than the
+    # repo: targets are also edited by hand.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_targets_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE change_counters SET value = value + 1 WHERE name = 'targets';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+    op.execute("""
+        CREATE TRIGGER trg_targets_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON targets
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_targets_version();
+        """)
+
+    op.execute("ALTER TABLE target_latest ADD COLUMN IF NOT EXISTS last_insert_id BIGINT;")
+    op.execute("""
+        UPDATE target_latest l
+        SET last_insert_id = COALESCE(
+            (SELECT MAX(id) FROM probe_results r WHERE r.target_id = l.target_id),
+            l.result_id
+        );
+        """)
+    op.execute("ALTER TABLE target_latest ALTER COLUMN last_insert_id SET NOT NULL;")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE target_latest DROP COLUMN IF EXISTS last_insert_id;")
+    op.execute("DROP TRIGGER IF EXISTS trg_targets_version ON targets;")
+    op.execute("DROP FUNCTION IF EXISTS bump_targets_version();")
+    op.execute("DROP TABLE IF EXISTS change_counters;")
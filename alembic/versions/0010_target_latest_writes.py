@@ -0,0 +1,32 @@
+from alembic import op
+
+revision = "0010_target_latest_writes"
+down_revision = "0009_change_tokens"
+branch_labels = None
+depends_on = None
+
+# Replaces target_latest.last_insert_id as the results change token. Ids follow the
+# sequence, not commit order: when a writer holding lower ids commits after one with
+# higher ids, MAX(id) does not move and the API kept answering 304. A counter bumped
+# by every write that stores rows for the target moves on every such commit.
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE target_latest
+        ADD COLUMN IF NOT EXISTS write_count BIGINT NOT NULL DEFAULT 1;
+        """)
+    op.execute("ALTER TABLE target_latest DROP COLUMN IF EXISTS last_insert_id;")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE target_latest ADD COLUMN IF NOT EXISTS last_insert_id BIGINT;")
+    op.execute("""
+        UPDATE target_latest l
+        SET last_insert_id = COALESCE(
+            (SELECT MAX(id) FROM probe_results r WHERE r.target_id = l.target_id),
+            l.result_id
+        );
+        """)
+    op.execute("ALTER TABLE target_latest ALTER COLUMN last_insert_id SET NOT NULL;")
+    op.execute("ALTER TABLE target_latest DROP COLUMN IF EXISTS write_count;")
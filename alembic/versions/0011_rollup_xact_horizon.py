@@ -0,0 +1,19 @@
+from alembic import op
+
+revision = "0011_rollup_xact_horizon"
+down_revision = "0010_target_latest_writes"
+branch_labels = None
+depends_on = None
+
+# pending_id used to become ready one rollup run after it was read, which assumed every
+# inserting transaction commits within one rollup interval. pending_xmax is the next
+# transaction id at the time pending_id was read: once no transaction below it is
+# still running, every id up to pending_id is committed or rolled back. NULL: ready.
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE rollup_state ADD COLUMN IF NOT EXISTS pending_xmax xid8 NULL;")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE rollup_state DROP COLUMN IF EXISTS pending_xmax;")
@@ -0,0 +1,70 @@
+from alembic import op
+
+revision = "0012_targets_version_rows"
+down_revision = "0011_rollup_xact_horizon"
+branch_labels = None
+depends_on = None
+
+# The targets version trigger fired for every statement, including the config sync's
+# upsert that changes nothing on an unchanged config, so each poller start and reload
+# invalidated every client's ETag. Statement triggers with transition tables still bump
+# the counter once per statement, but only when the statement touched a row.
+# Transition tables need one trigger per event; TRUNCATE has none and always bumps.
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_targets_version ON targets;")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_targets_version_if_new() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM new_rows) THEN
+                UPDATE change_counters SET value = value + 1 WHERE name = 'targets';
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_targets_version_if_old() RETURNS trigger AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM old_rows) THEN
+                UPDATE change_counters SET value = value + 1 WHERE name = 'targets';
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+    op.execute("""
+        CREATE TRIGGER trg_targets_version_insert
+        AFTER INSERT ON targets REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_targets_version_if_new();
+        """)
+    op.execute("""
+        CREATE TRIGGER trg_targets_version_update
+        AFTER UPDATE ON targets REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_targets_version_if_new();
+        """)
+    op.execute("""
+        CREATE TRIGGER trg_targets_version_delete
+        AFTER DELETE ON targets REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_targets_version_if_old();
+        """)
+    op.execute("""
+        CREATE TRIGGER trg_targets_version_truncate
+        AFTER TRUNCATE ON targets
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_targets_version();
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_targets_version_truncate ON targets;")
+    op.execute("DROP TRIGGER IF EXISTS trg_targets_version_delete ON targets;")
+    op.execute("DROP TRIGGER IF EXISTS trg_targets_version_update ON targets;")
+    op.execute("DROP TRIGGER IF EXISTS trg_targets_version_insert ON targets;")
+    op.execute("DROP FUNCTION IF EXISTS bump_targets_version_if_old();")
+    op.execute("DROP FUNCTION IF EXISTS bump_targets_version_if_new();")
+    op.execute("""
+        CREATE TRIGGER trg_targets_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON targets
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_targets_version();
+        """)
@@ -1,12 +1,33 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
 
+from app.api.live import hub
+from app.api.routes.export import router as export_router
 from app.api.routes.health import router as health_router
 from app.api.routes.results import router as results_router
+from app.api.routes.stream import router as stream_router
+from app.api.routes.summary import router as summary_router
 from app.api.routes.target_results import router as target_results_router
 from app.api.routes.targets import router as targets_router
 
-app = FastAPI(title="Pingu", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # the live result listener runs here once someone subscribes
+    async with anyio.create_task_group() as tg:
+        hub.start(tg)
+        yield
+        tg.cancel_scope.cancel()
+
+
+app = FastAPI(title="Pingu", version="0.1.0", lifespan=lifespan)
 app.include_router(health_router)
 app.include_router(targets_router)
 app.include_router(results_router)
 app.include_router(target_results_router)
+app.include_router(summary_router)
+app.include_router(export_router)
+app.include_router(stream_router)
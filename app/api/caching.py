@@ -0,0 +1,56 @@
+"""
+ETag and Cache-Control helpers.
+
+Routes compute an ETag from a cheap change token (`app.repos.tokens`) and the
+response representation, and answer 304 when the client already has it, before
+running the actual query.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Request, Response
+
+from app.constants import HTTP_PAST_RANGE_AFTER_SECONDS, HTTP_PAST_RANGE_MAX_AGE_SECONDS
+
+# revalidate on every use; with an ETag that is a cheap 304
+REVALIDATE = "no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Weak ETag over `parts` (the change token, query and representation)."""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison: W/ prefixes do not matter
+    wanted = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == wanted for t in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str, vary: str | None = None) -> Response:
+    """
+    A 304 with the validators of the 200 it stands for. `vary` must match the 200's
+    `Vary`, or shared caches may serve another representation after revalidating.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary is not None:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+
+def range_cache_control(until: datetime | None, now: datetime | None = None) -> str:
+    """Brief caching for ranges that ended well in the past, revalidation otherwise."""
+    now = now or datetime.now(timezone.utc)
+    if until is not None and until.tzinfo is None:
+        # timestamps without an offset are UTC (see API.md)
+        until = until.replace(tzinfo=timezone.utc)
+    if until is not None and until <= now - timedelta(seconds=HTTP_PAST_RANGE_AFTER_SECONDS):
+        return f"public, max-age={HTTP_PAST_RANGE_MAX_AGE_SECONDS}"
+    return REVALIDATE
@@ -0,0 +1,192 @@
+"""
+Live fan-out of new probe results to Server-Sent Events subscribers.
+
+Result writes announce their rows on `RESULTS_CHANNEL` (see `insert_probe_results`).
+One `ResultHub` per API process holds a single LISTEN connection, loads the announced
+rows once and hands each one, already encoded as an SSE event, to every subscriber
+that wants its target. Subscribers that fall `buffer` events behind are dropped; their
+stream ends and the client reconnects.
+
+Results announced while the listener is reconnecting are not delivered; clients
+should catch up from `/results/latest-by-target` when they (re)connect.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from collections.abc import AsyncGenerator, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+
+import anyio
+import psycopg
+from anyio.abc import TaskGroup
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from pydantic_core import to_json
+from sqlalchemy.engine import make_url
+
+from app.api.responses import project
+from app.api.schemas import LatestResultItem
+from app.config import settings
+from app.constants import RESULTS_CHANNEL
+from app.repos.results import fetch_results_by_ids_async
+
+log = logging.getLogger(__name__)
+
+_RECONNECT_MIN_S = 1.0
+_RECONNECT_MAX_S = 30.0
+
+
+def encode_event(row: dict) -> bytes:
+    """One SSE `result` event; the id lets clients tell which results they have seen."""
+    data = to_json(project([row], LatestResultItem)[0])
+    return b"id: %d\nevent: result\ndata: %s\n\n" % (row["id"], data)
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    target_ids: frozenset[uuid.UUID] | None
+    send: MemoryObjectSendStream[bytes]
+
+
+class ResultHub:
+    def __init__(self, *, buffer: int) -> None:
+        self._buffer = buffer
+        # subscribers to every target, and the others by target id
+        self._all: set[_Subscriber] = set()
+        self._by_target: dict[uuid.UUID, set[_Subscriber]] = {}
+        self._tg: TaskGroup | None = None
+        self._listening = False
+
+    @property
+    def subscribers(self) -> int:
+        subs = set(self._all)
+        for by_target in self._by_target.values():
+            subs |= by_target
+        return len(subs)
+
+    def start(self, tg: TaskGroup) -> None:
+        """Listen in `tg` once the first client subscribes."""
+        self._tg = tg
+        # a listener from an earlier task group ended with it
+        self._listening = False
+
+    @contextmanager
+    def subscribe(
+        self, target_ids: frozenset[uuid.UUID] | None = None
+    ) -> Iterator[MemoryObjectReceiveStream[bytes]]:
+        """Encoded events for `target_ids` (all targets if None) until the block exits."""
+        send, receive = anyio.create_memory_object_stream[bytes](self._buffer)
+        sub = _Subscriber(target_ids, send)
+        self._add(sub)
+        if self._tg is not None and not self._listening:
+            self._listening = True
+            self._tg.start_soon(self.listen_forever)
+        try:
+            yield receive
+        finally:
+            self._remove(sub)
+            send.close()
+            receive.close()
+
+    def publish(self, rows: list[dict]) -> None:
+        for row in rows:
+            # a copy: slow subscribers are removed while sending
+            subs = [*self._all, *self._by_target.get(row["target_id"], ())]
+            if not subs:
+                continue
+            event = encode_event(row)
+            for sub in subs:
+                try:
+                    sub.send.send_nowait(event)
+                except anyio.WouldBlock:
+                    log.warning("dropping slow live subscriber", extra={"buffer": self._buffer})
+                    self._remove(sub)
+                    sub.send.close()
+                except anyio.BrokenResourceError:
+                    self._remove(sub)
+
+    async def handle_notification(self, payload: str) -> None:
+        if not self._all and not self._by_target:
+            return
+        note = json.loads(payload)
+        rows = await fetch_results_by_ids_async(
+            note["ids"],
+            since=datetime.fromisoformat(note["since"]),
+            until=datetime.fromisoformat(note["until"]),
+        )
+        self.publish(rows)
+
+    async def listen_forever(self) -> None:
+        try:
+            await self._listen()
+        finally:
+            # cancelled with its task group: the next subscriber starts a new one
+            self._listening = False
+
+    async def _listen(self) -> None:
+        delay = _RECONNECT_MIN_S
+        conninfo = make_url(settings.database_url).set(drivername="postgresql")
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo.render_as_string(hide_password=False), autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {RESULTS_CHANNEL}")
+                    log.info("listening for new results")
+                    delay = _RECONNECT_MIN_S
+                    async for note in conn.notifies():
+                        try:
+                            await self.handle_notification(note.payload)
+                        except Exception:
+                            log.exception("failed to publish new results")
+            except Exception:
+                log.exception("result listener failed")
+            await anyio.sleep(delay)
+            delay = min(delay * 2, _RECONNECT_MAX_S)
+
+    def _add(self, sub: _Subscriber) -> None:
+        if sub.target_ids is None:
+            self._all.add(sub)
+            return
+        for tid in sub.target_ids:
+            self._by_target.setdefault(tid, set()).add(sub)
+
+    def _remove(self, sub: _Subscriber) -> None:
+        if sub.target_ids is None:
+            self._all.discard(sub)
+            return
+        for tid in sub.target_ids:
+            subs = self._by_target.get(tid)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._by_target[tid]
+
+
+async def sse_events(
+    hub: ResultHub,
+    target_ids: frozenset[uuid.UUID] | None,
+    *,
+    heartbeat_s: float,
+) -> AsyncGenerator[bytes, None]:
+    """The body of a live stream: result events, and a comment line while idle."""
+    with hub.subscribe(target_ids) as events:
+        # open the stream right away, so clients know they are subscribed
+        yield b": subscribed\n\n"
+        while True:
+            event = None
+            with anyio.move_on_after(heartbeat_s):
+                try:
+                    event = await events.receive()
+                except anyio.EndOfStream:
+                    return
+            # proxies close connections that stay silent
+            yield event if event is not None else b": ping\n\n"
+
+
+hub = ResultHub(buffer=settings.live_subscriber_buffer)
@@ -0,0 +1,62 @@
+"""Parsing helpers for API query parameters that FastAPI cannot validate itself."""
+
+import base64
+import binascii
+import re
+from datetime import datetime, timedelta
+
+from app.constants import SUMMARY_MAX_WINDOW_DAYS
+
+_WINDOW_RE = re.compile(r"^(\d+)([smhdw])$")
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+WINDOW_FORMAT_ERROR = "invalid window format, expected like 15m, 1h, 7d"
+
+
+def parse_window(value: str) -> timedelta:
+    """Parse a duration such as `15m`, `1h` or `7d`.
+
+    Raises `ValueError` with a client-facing message when the value is malformed,
+    zero, or longer than `SUMMARY_MAX_WINDOW_DAYS`.
+    """
+    m = _WINDOW_RE.match(value.strip().lower())
+    if m is None:
+        raise ValueError(WINDOW_FORMAT_ERROR)
+
+    window = timedelta(seconds=int(m.group(1)) * _WINDOW_UNITS[m.group(2)])
+    if window <= timedelta(0):
+        raise ValueError(WINDOW_FORMAT_ERROR)
+    if window > timedelta(days=SUMMARY_MAX_WINDOW_DAYS):
+        raise ValueError(f"window must be at most {SUMMARY_MAX_WINDOW_DAYS}d")
+    return window
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    """Opaque page token for the row `(ts, row_id)`; see `decode_cursor`."""
+    raw = f"{ts.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> tuple[datetime, int]:
+    """
+    Decode a token from `encode_cursor` back into `(ts, id)`.
+
+    Raises `ValueError` if the token was not produced by `encode_cursor`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode("utf-8")
+        ts_s, id_s = raw.split("|")
+        ts, row_id = datetime.fromisoformat(ts_s), int(id_s)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("invalid cursor")
+    if ts.tzinfo is None:
+        raise ValueError("invalid cursor")
+    return ts, row_id
+
+
+def next_page_cursor(rows: list[dict], limit: int) -> str | None:
+    """Cursor after the last of `rows`, or None when the page was not full."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last["ts"], last["id"])
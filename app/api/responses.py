@@ -0,0 +1,227 @@
+"""
+Fast, content-negotiated responses for large result lists.
+
+Routes listing results return these instead of building one pydantic model per row
+and having FastAPI validate and serialize the `response_model` again. JSON is
+serialized straight to bytes by pydantic-core, so it matches what the schemas in
+`app.api.schemas` produce; routes keep `response_model` for the docs.
+
+Clients can ask for compact formats with `Accept`:
+
+- `application/vnd.apache.arrow.stream`: an Arrow IPC stream with one column per
+  item field; the other payload fields are JSON in the schema metadata under `pingu`.
+- `application/msgpack`: the JSON payload, except that `items` maps each field to a
+  list of values.
+
+and for compression with `Accept-Encoding` (`zstd`, `gzip`). Arrow needs `pyarrow`,
+MessagePack needs `msgpack` and zstd needs `zstandard` (the `formats` extra).
+"""
+
+import gzip
+import importlib
+import importlib.util
+import uuid
+from datetime import datetime
+from functools import cache
+from operator import itemgetter
+from typing import Any, Union, get_args, get_origin
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+_ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+# media type -> module it needs
+_FORMAT_MODULES = {JSON: None, ARROW: "pyarrow", MSGPACK: "msgpack"}
+# smaller bodies are not worth compressing
+_MIN_COMPRESS_BYTES = 1024
+
+# request headers the representation depends on; 304s repeat them (see not_modified)
+VARY_NEGOTIATED = "Accept, Accept-Encoding"
+VARY_ENCODING = "Accept-Encoding"
+
+
+@cache
+def _available(module: str | None) -> bool:
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def _parse_header(value: str | None) -> list[tuple[str, float]]:
+    """Items of an Accept-style header with their q-values, most preferred first."""
+    if not value:
+        return []
+    out: list[tuple[str, float]] = []
+    for part in value.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if name:
+            out.append((name.lower(), q))
+    # stable: equal q-values keep the client's order
+    return sorted(out, key=lambda x: -x[1])
+
+
+def negotiate_media_type(accept: str | None) -> str | None:
+    """The response format for `accept`, or None if nothing acceptable can be produced."""
+    entries = _parse_header(accept)
+    if not entries:
+        return JSON
+    for name, q in entries:
+        if q <= 0:
+            continue
+        if name in ("*/*", "application/*"):
+            return JSON
+        name = _ALIASES.get(name, name)
+        if name in _FORMAT_MODULES and _available(_FORMAT_MODULES[name]):
+            return name
+    return None
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    for name, q in _parse_header(accept_encoding):
+        if q <= 0:
+            continue
+        if name == "zstd" and _available("zstandard"):
+            return "zstd"
+        if name == "gzip":
+            return "gzip"
+    return None
+
+
+def project(rows: list[dict], model: type[BaseModel]) -> list[dict]:
+    """Rows trimmed to `model`'s fields, in the model's field order."""
+    fields = tuple(model.model_fields)
+    get = itemgetter(*fields)
+    if len(fields) == 1:
+        return [{fields[0]: get(r)} for r in rows]
+    return [dict(zip(fields, get(r))) for r in rows]
+
+
+def _columns(rows: list[dict], model: type[BaseModel]) -> dict[str, list]:
+    return {f: [r[f] for r in rows] for f in model.model_fields}
+
+
+def _base_type(annotation: Any) -> Any:
+    # `X | None` -> X
+    if get_origin(annotation) in (Union, type(int | None)):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        return args[0]
+    return annotation
+
+
+def _arrow_body(payload: dict, rows: list[dict], model: type[BaseModel]) -> bytes:
+    pa = importlib.import_module("pyarrow")
+
+    arrays = []
+    names = []
+    for name, field in model.model_fields.items():
+        values = [r[name] for r in rows]
+        base = _base_type(field.annotation)
+        if base is uuid.UUID:
+            arr = pa.array([str(v) if v is not None else None for v in values], pa.string())
+        elif base is str:
+            # names and errors repeat a lot; send each distinct value once
+            arr = pa.array(values, pa.string()).dictionary_encode()
+        elif base is datetime:
+            arr = pa.array(values, pa.timestamp("us", tz="UTC"))
+        elif base is bool:
+            arr = pa.array(values, pa.bool_())
+        elif base is int:
+            arr = pa.array(values, pa.int64())
+        else:
+            arr = pa.array(values)
+        arrays.append(arr)
+        names.append(name)
+
+    meta = {k: v for k, v in payload.items() if k != "items"}
+    table = pa.Table.from_arrays(arrays, names=names, metadata={"pingu": to_json(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _msgpack_body(payload: dict, rows: list[dict], model: type[BaseModel]) -> bytes:
+    msgpack = importlib.import_module("msgpack")
+    return msgpack.packb(
+        {**payload, "items": _columns(rows, model)},
+        datetime=True,
+        default=str,  # UUIDs
+    )
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        zstandard = importlib.import_module("zstandard")
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def representation(request: Request) -> tuple[str | None, str | None]:
+    """The negotiated media type and encoding; ETags must differ between them."""
+    return (
+        negotiate_media_type(request.headers.get("accept")),
+        negotiate_encoding(request.headers.get("accept-encoding")),
+    )
+
+
+def results_response(
+    request: Request,
+    payload: dict,
+    item_model: type[BaseModel],
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    `payload` in the format and encoding the client asked for.
+
+    `payload["items"]` holds the repo rows, which are trimmed to `item_model`'s
+    fields; `headers` are added to the response. Raises a 406 `HTTPException` when
+    no acceptable format is available.
+    """
+    rows = payload["items"]
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    if media_type is None:
+        supported = ", ".join(t for t, m in _FORMAT_MODULES.items() if _available(m))
+        raise HTTPException(status_code=406, detail=f"supported formats: {supported}")
+
+    if media_type == ARROW:
+        body = _arrow_body(payload, rows, item_model)
+    elif media_type == MSGPACK:
+        body = _msgpack_body(payload, rows, item_model)
+    else:
+        body = to_json({**payload, "items": project(rows, item_model)})
+
+    return _encoded_response(request, body, media_type, headers, vary=VARY_NEGOTIATED)
+
+
+def json_response(
+    request: Request, payload: dict, headers: dict[str, str] | None = None
+) -> Response:
+    """`payload` as JSON, compressed like `results_response` bodies."""
+    return _encoded_response(request, to_json(payload), JSON, headers, vary=VARY_ENCODING)
+
+
+def _encoded_response(
+    request: Request,
+    body: bytes,
+    media_type: str,
+    headers: dict[str, str] | None,
+    *,
+    vary: str,
+) -> Response:
+    headers = {**(headers or {}), "Vary": vary}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None and len(body) >= _MIN_COMPRESS_BYTES:
+        body = _compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import uuid
+from collections.abc import Iterator
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.repos.results import iter_results
+
+router = APIRouter()
+
+EXPORT_COLUMNS = (
+    "id",
+    "target_id",
+    "target_name",
+    "ts",
+    "success",
+    "latency_ms",
+    "status_code",
+    "error",
+)
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _ndjson_lines(chunks: Iterator[list[dict]]) -> Iterator[str]:
+    for rows in chunks:
+        yield "".join(
+            json.dumps(
+                {**r, "target_id": str(r["target_id"]), "ts": r["ts"].isoformat()},
+                separators=(",", ":"),
+            )
+            + "\n"
+            for r in rows
+        )
+
+
+def _csv_lines(chunks: Iterator[list[dict]]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    yield buf.getvalue()
+
+    for rows in chunks:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(
+            (
+                r["id"],
+                r["target_id"],
+                r["target_name"],
+                r["ts"].isoformat(),
+                "true" if r["success"] else "false",
+                r["latency_ms"],
+                r["status_code"],
+                r["error"],
+            )
+            for r in rows
+        )
+        yield buf.getvalue()
+
+
+@router.get(
+    "/results/export",
+    summary="Export results",
+    description="Stream every result in a time range as NDJSON (default) or CSV, oldest first. Filter by one or more `target_id` query parameters and by `since`/`until`. Rows are read from the database in chunks, so large ranges do not need to fit in memory.",
+    response_class=StreamingResponse,
+)
+# A plain `def` on purpose: the response body is a sync generator reading a server-side
+# cursor, which Starlette iterates in its threadpool.
+def export_results(
+    format: str = "ndjson",
+    target_id: list[uuid.UUID] | None = Query(None),
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> StreamingResponse:
+    if format not in _MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    if since is not None and until is not None and since > until:
+        raise HTTPException(status_code=400, detail="since must be <= until")
+
+    chunks = iter_results(target_ids=target_id, since=since, until=until)
+    lines = _ndjson_lines(chunks) if format == "ndjson" else _csv_lines(chunks)
+    return StreamingResponse(
+        lines,
+        media_type=_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="results.{format}"'},
+    )
@@ -1,63 +1,106 @@
 from __future__ import annotations
 
+import logging
 import math
+import time
 from datetime import datetime, timezone
 
+import anyio
 from fastapi import APIRouter
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.api.schemas import HealthResponse, HealthStats, HealthThresholds
-from app.repos.health import db_ok, fetch_health_db_stats
+from app.api.schemas import HealthResponse, HealthStats, HealthThresholds, TargetHealth
+from app.config import settings
+from app.repos.health import fetch_health_db_stats_async, fetch_target_freshness_async
+
+log = logging.getLogger(__name__)
 
 router = APIRouter()
 
 STALE_GRACE_MULT = 1.5
 MIN_STALE_SECONDS = 30
 
+# ?targets= value -> (monotonic time computed, response)
+_cache: dict[bool, tuple[float, HealthResponse]] = {}
+# one refresh per ?targets= value at a time; requests arriving meanwhile wait for it
+_refresh_locks: dict[bool, anyio.Lock] = {}
 
-@router.get(
-    "/health",
-    summary="Health Check",
-    description="Check the health of the application. Returns the status of the database and the freshness of the latest results from the poller. The `ok` field is `true` if the database is reachable and the latest results are not stale.",
-    response_model=HealthResponse,
-)
-def health() -> HealthResponse:
-    db = db_ok()
-    if not db:
-        return HealthResponse(
-            ok=False,
-            db=False,
-            thresholds=HealthThresholds(stale_after_seconds=0),
-            stats=HealthStats(
-                enabled_targets=0,
-                last_result_ts=None,
-                seconds_since_last_result=None,
-            ),
-        )
 
-    now = datetime.now(timezone.utc)
+def clear_health_cache() -> None:
+    _cache.clear()
+    _refresh_locks.clear()
+
+
+def _cached(targets: bool) -> HealthResponse | None:
+    hit = _cache.get(targets)
+    if hit is not None and time.monotonic() - hit[0] < settings.health_cache_seconds:
+        return hit[1]
+    return None
+
+
+def _stale_after(interval_seconds: int) -> int:
+    return max(MIN_STALE_SECONDS, int(math.ceil(interval_seconds * STALE_GRACE_MULT)))
+
+
+def _seconds_since(now: datetime, ts: datetime | None) -> int | None:
+    if ts is None:
+        return None
+    return max(0, int((now - ts).total_seconds()))
+
+
+def _db_down() -> HealthResponse:
+    return HealthResponse(
+        ok=False,
+        db=False,
+        thresholds=HealthThresholds(stale_after_seconds=0),
+        stats=HealthStats(
+            enabled_targets=0,
+            last_result_ts=None,
+            seconds_since_last_result=None,
+        ),
+    )
+
 
-    db_stats = fetch_health_db_stats()
+async def _compute_health(include_targets: bool) -> HealthResponse:
+    try:
+        db_stats = await fetch_health_db_stats_async()
+        freshness = await fetch_target_freshness_async() if include_targets else None
+    except SQLAlchemyError:
+        log.warning("health check could not query the database", exc_info=True)
+        return _db_down()
+
+    now = datetime.now(timezone.utc)
 
     enabled_targets = db_stats.enabled_targets
     max_interval = db_stats.max_interval_seconds
     last_ts = db_stats.last_result_ts
-
-    seconds_since = None
     if last_ts is not None:
         last_ts = last_ts.astimezone(timezone.utc)
-        seconds_since = int((now - last_ts).total_seconds())
+    seconds_since = _seconds_since(now, last_ts)
 
     stale_after_s = 0
     if enabled_targets > 0 and max_interval > 0:
-        stale_after_s = max(
-            MIN_STALE_SECONDS,
-            int(math.ceil(max_interval * STALE_GRACE_MULT)),
-        )
+        stale_after_s = _stale_after(max_interval)
 
     ok = True
     if enabled_targets > 0 and seconds_since is not None and seconds_since > stale_after_s:
         ok = False
 
+    targets: list[TargetHealth] | None = None
+    if freshness is not None:
+        targets = []
+        for r in freshness:
+            t_since = _seconds_since(now, r["last_result_ts"])
+            t_stale_after = _stale_after(r["interval_seconds"])
+            targets.append(
+                TargetHealth(
+                    **r,
+                    stale_after_seconds=t_stale_after,
+                    seconds_since_last_result=t_since,
+                    stale=t_since is None or t_since > t_stale_after,
+                )
+            )
+
     return HealthResponse(
         ok=ok,
         db=True,
@@ -66,5 +109,30 @@ def health() -> HealthResponse:
             enabled_targets=enabled_targets,
             last_result_ts=last_ts,
             seconds_since_last_result=seconds_since,
+            live_pollers=db_stats.live_pollers,
         ),
+        targets=targets,
     )
+
+
+@router.get(
+    "/health",
+    summary="Health Check",
+    description="Check the health of the application. Returns the status of the database and the freshness of the latest results from the poller. The `ok` field is `true` if the database is reachable and the latest results are not stale. Pass `targets=true` for a per-target freshness breakdown. Responses are cached for a couple of seconds.",
+    response_model=HealthResponse,
+)
+async def health(targets: bool = False) -> HealthResponse:
+    resp = _cached(targets)
+    if resp is not None:
+        return resp
+
+    lock = _refresh_locks.setdefault(targets, anyio.Lock())
+    async with lock:
+        # refreshed by the request we waited for
+        resp = _cached(targets)
+        if resp is not None:
+            return resp
+        now = time.monotonic()
+        resp = await _compute_health(targets)
+        _cache[targets] = (now, resp)
+    return resp
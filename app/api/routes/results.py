@@ -1,17 +1,44 @@
 from __future__ import annotations
 
+import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
+from app.api.caching import (
+    REVALIDATE,
+    etag_matches,
+    make_etag,
+    not_modified,
+    range_cache_control,
+)
+from app.api.params import decode_cursor, next_page_cursor
+from app.api.responses import (
+    VARY_ENCODING,
+    VARY_NEGOTIATED,
+    json_response,
+    negotiate_encoding,
+    project,
+    representation,
+    results_response,
+)
 from app.api.schemas import (
     LatestResultByTargetItem,
     LatestResultByTargetResponse,
     LatestResultItem,
     LatestResultsResponse,
+    ProbeResultOut,
+    ResultsHistoryResponse,
+    utcnow,
+)
+from app.constants import DEFAULT_LIMIT, HISTORY_MAX_TARGETS, MAX_LIMIT
+from app.db import async_session_scope
+from app.repos.results import (
+    fetch_latest_result_by_target_async,
+    fetch_latest_results_async,
+    fetch_results_history_async,
 )
-from app.constants import DEFAULT_LIMIT, MAX_LIMIT
-from app.repos.results import fetch_latest_result_by_target, fetch_latest_results
+from app.repos.tokens import fetch_latest_by_target_token_async
 
 router = APIRouter()
 
@@ -19,26 +46,114 @@ router = APIRouter()
 @router.get(
     "/results/latest",
     summary="Get the latest results",
-    description="Get the latest results from the poller. You can filter results by a time range using the `since` and `until` query parameters.",
+    description="Get the latest results from the poller. You can filter results by a time range using the `since` and `until` query parameters. Pass the returned `next_cursor` as `cursor` to fetch the next page. Send `Accept: application/vnd.apache.arrow.stream` or `application/msgpack` for columnar binary responses; `Accept-Encoding: zstd` or `gzip` compresses them. Responses carry an `ETag` for `If-None-Match` revalidation; ranges whose `until` is more than an hour old may be cached for 5 minutes.",
     response_model=LatestResultsResponse,
 )
-def get_latest_result(
+async def get_latest_result(
+    request: Request,
     since: datetime | None = None,
     until: datetime | None = None,
     limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
-) -> LatestResultsResponse:
+    cursor: str | None = None,
+) -> Response:
     if since is not None and until is not None and since > until:
         raise HTTPException(status_code=400, detail="since must be <= until")
-    rows = fetch_latest_results(since=since, until=until, limit=limit)
-    return LatestResultsResponse(items=[LatestResultItem(**r) for r in rows])
+    try:
+        before = decode_cursor(cursor) if cursor is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    cache_control = range_cache_control(until)
+    # one session, so the token is never newer than the rows it describes
+    async with async_session_scope(readonly=True) as session:
+        token = await fetch_latest_by_target_token_async(s=session)
+        etag = make_etag("latest", token, request.url.query, representation(request))
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control, VARY_NEGOTIATED)
+
+        rows = await fetch_latest_results_async(
+            since=since, until=until, limit=limit, before=before, s=session
+        )
+
+    return results_response(
+        request,
+        {
+            "generated_at": utcnow(),
+            "items": rows,
+            "next_cursor": next_page_cursor(rows, limit),
+        },
+        LatestResultItem,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
 
 
 @router.get(
     "/results/latest-by-target",
     summary="Get the latest result by target",
-    description="Get the latest result from each target.",
+    description="Get the latest result from each target. Supports the same `Accept` formats and compression as `/results/latest`, and the same `ETag` revalidation.",
     response_model=LatestResultByTargetResponse,
 )
-def get_latest_result_by_target() -> LatestResultByTargetResponse:
-    rows = fetch_latest_result_by_target()
-    return LatestResultByTargetResponse(items=[LatestResultByTargetItem(**r) for r in rows])
+async def get_latest_result_by_target(request: Request) -> Response:
+    async with async_session_scope(readonly=True) as session:
+        token = await fetch_latest_by_target_token_async(s=session)
+        etag = make_etag("latest-by-target", token, representation(request))
+        if etag_matches(request, etag):
+            return not_modified(etag, REVALIDATE, VARY_NEGOTIATED)
+
+        rows = await fetch_latest_result_by_target_async(s=session)
+
+    return results_response(
+        request,
+        {"generated_at": utcnow(), "items": rows},
+        LatestResultByTargetItem,
+        headers={"ETag": etag, "Cache-Control": REVALIDATE},
+    )
+
+
+@router.get(
+    "/results/history",
+    summary="Get recent results of many targets",
+    description=f"Get the newest `limit` results of each target in one request, grouped by target, for example to draw a sparkline per target. Repeat `target_id` to choose the targets (at most {HISTORY_MAX_TARGETS}); without it, all enabled targets are returned. `since` and `until` bound the time range as in `/targets/{{target_id}}/results`. Supports `ETag` revalidation and `Accept-Encoding` compression.",
+    response_model=ResultsHistoryResponse,
+)
+async def get_results_history(
+    request: Request,
+    target_id: list[uuid.UUID] | None = Query(None),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+) -> Response:
+    if target_id is not None and len(target_id) > HISTORY_MAX_TARGETS:
+        raise HTTPException(
+            status_code=400, detail=f"at most {HISTORY_MAX_TARGETS} target_id values"
+        )
+    if since is not None and until is not None and since > until:
+        raise HTTPException(status_code=400, detail="since must be <= until")
+
+    cache_control = range_cache_control(until)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    async with async_session_scope(readonly=True) as session:
+        token = await fetch_latest_by_target_token_async(s=session)
+        etag = make_etag("history", token, request.url.query, encoding)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control, VARY_ENCODING)
+
+        groups = await fetch_results_history_async(
+            target_id, since=since, until=until, limit=limit, s=session
+        )
+
+    return json_response(
+        request,
+        {
+            "generated_at": utcnow(),
+            "targets": [
+                {
+                    "target_id": g["target_id"],
+                    "target_name": g["target_name"],
+                    "items": project(g["items"], ProbeResultOut),
+                }
+                for g in groups
+            ],
+        },
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
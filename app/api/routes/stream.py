@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.live import hub, sse_events
+from app.config import settings
+
+router = APIRouter()
+
+
+@router.get(
+    "/results/stream",
+    summary="Stream new results",
+    description="Server-Sent Events stream of new results as the pollers store them, one `result` event per result with the same fields as `/results/latest` items. Repeat `target_id` to only receive those targets. Results stored while the server is reconnecting to the database are not sent; fetch `/results/latest-by-target` after (re)connecting to catch up. Returns 503 unless `RESULTS_NOTIFY_ENABLED` is set.",
+    response_class=StreamingResponse,
+)
+async def stream_results(
+    target_id: list[uuid.UUID] | None = Query(None),
+) -> StreamingResponse:
+    if not settings.results_notify_enabled:
+        raise HTTPException(
+            status_code=503, detail="live stream disabled: set RESULTS_NOTIFY_ENABLED=true"
+        )
+    target_ids = frozenset(target_id) if target_id else None
+    return StreamingResponse(
+        sse_events(hub, target_ids, heartbeat_s=settings.live_heartbeat_seconds),
+        media_type="text/event-stream",
+        # keep reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
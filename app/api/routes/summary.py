@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import uuid
+from datetime import timedelta
+
+from fastapi import APIRouter, HTTPException
+
+from app.api.params import parse_window
+from app.api.schemas import SummaryItem, SummaryResponse, TargetSummaryResponse
+from app.repos.summary import fetch_summary_async
+from app.repos.targets import fetch_target_by_id_async
+
+router = APIRouter()
+
+
+def _window_or_400(window: str) -> timedelta:
+    try:
+        return parse_window(window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/summary",
+    summary="Get uptime and latency summary",
+    description="Get uptime percent, average latency and probe count per enabled target over a window such as `15m`, `1h` or `7d` (default `1h`).",
+    response_model=SummaryResponse,
+)
+async def get_summary(window: str = "1h") -> SummaryResponse:
+    td = _window_or_400(window)
+    rows = await fetch_summary_async(td)
+    return SummaryResponse(window=window, items=[SummaryItem(**r) for r in rows])
+
+
+@router.get(
+    "/summary/{target_id}",
+    summary="Get uptime and latency summary for a target",
+    description="Get uptime percent, average latency and probe count for one target over a window such as `15m`, `1h` or `7d` (default `1h`).",
+    response_model=TargetSummaryResponse,
+)
+async def get_target_summary(target_id: uuid.UUID, window: str = "1h") -> TargetSummaryResponse:
+    td = _window_or_400(window)
+    if await fetch_target_by_id_async(target_id) is None:
+        raise HTTPException(status_code=404, detail="Target not found")
+
+    rows = await fetch_summary_async(td, target_id=target_id, enabled_only=False)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Target not found")
+    return TargetSummaryResponse(window=window, **rows[0])
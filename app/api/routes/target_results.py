@@ -3,12 +3,17 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
-from app.api.schemas import ProbeResultOut, TargetResultsResponse
+from app.api.caching import etag_matches, make_etag, not_modified, range_cache_control
+from app.api.params import decode_cursor, next_page_cursor
+from app.api.responses import VARY_NEGOTIATED, representation, results_response
+from app.api.schemas import ProbeResultOut, TargetResultsResponse, utcnow
 from app.constants import DEFAULT_LIMIT, MAX_LIMIT
-from app.repos.results import fetch_results_for_target
-from app.repos.targets import fetch_target_by_id
+from app.db import async_session_scope
+from app.repos.results import fetch_results_for_target_async
+from app.repos.targets import fetch_target_by_id_async
+from app.repos.tokens import fetch_target_results_token_async
 
 router = APIRouter()
 
@@ -16,31 +21,55 @@ router = APIRouter()
 @router.get(
     "/targets/{target_id}/results",
     summary="Get results for a specific target",
-    description="Get the results for a specific target. You can filter results by a time range using the `since` and `until` query parameters.",
+    description="Get the results for a specific target. You can filter results by a time range using the `since` and `until` query parameters. Pass the returned `next_cursor` as `cursor` to fetch the next page. Send `Accept: application/vnd.apache.arrow.stream` or `application/msgpack` for columnar binary responses; `Accept-Encoding: zstd` or `gzip` compresses them. Responses carry an `ETag`; send it back in `If-None-Match` to get a `304` while nothing changed.",
     response_model=TargetResultsResponse,
 )
-def get_target_results(
+async def get_target_results(
+    request: Request,
     target_id: uuid.UUID,
     since: datetime | None = None,
     until: datetime | None = None,
     limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
-) -> TargetResultsResponse:
-    t = fetch_target_by_id(target_id)
-    if t is None:
-        raise HTTPException(status_code=404, detail="Target not found")
-
+    cursor: str | None = None,
+) -> Response:
     # Optional: validate ranges
     if since is not None and until is not None and since > until:
         raise HTTPException(status_code=400, detail="since must be <= until")
+    try:
+        before = decode_cursor(cursor) if cursor is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    results = fetch_results_for_target(
-        target_id,
-        since=since,
-        until=until,
-        limit=limit,
-    )
-    return TargetResultsResponse(
-        target_id=t["id"],
-        target_name=t["name"],
-        items=[ProbeResultOut(**r) for r in results],
+    cache_control = range_cache_control(until)
+    # one session, so the token is never newer than the rows it describes
+    async with async_session_scope(readonly=True) as session:
+        t = await fetch_target_by_id_async(target_id, s=session)
+        if t is None:
+            raise HTTPException(status_code=404, detail="Target not found")
+
+        token = await fetch_target_results_token_async(target_id, s=session)
+        etag = make_etag("target-results", token, request.url.query, representation(request))
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control, VARY_NEGOTIATED)
+
+        results = await fetch_results_for_target_async(
+            target_id,
+            since=since,
+            until=until,
+            limit=limit,
+            before=before,
+            s=session,
+        )
+
+    return results_response(
+        request,
+        {
+            "target_id": t["id"],
+            "target_name": t["name"],
+            "generated_at": utcnow(),
+            "items": results,
+            "next_cursor": next_page_cursor(results, limit),
+        },
+        ProbeResultOut,
+        headers={"ETag": etag, "Cache-Control": cache_control},
     )
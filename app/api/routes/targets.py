@@ -1,10 +1,13 @@
 import uuid
 from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
+from app.api.caching import REVALIDATE, etag_matches, make_etag, not_modified
 from app.api.schemas import TargetListResponse, TargetResponse
-from app.repos.targets import fetch_all_targets, fetch_target_by_id
+from app.db import async_session_scope
+from app.repos.targets import fetch_all_targets_async, fetch_target_by_id_async
+from app.repos.tokens import fetch_targets_version_async
 
 router = APIRouter()
 
@@ -13,12 +16,23 @@ router = APIRouter()
     "/targets",
     response_model=TargetListResponse,
     summary="List targets",
-    description="List all targets. You can filter by status using the `status` query parameter. By default, only enabled targets are returned. Status can be `enabled`, `disabled`, or `all`.",
+    description="List all targets. You can filter by status using the `status` query parameter. By default, only enabled targets are returned. Status can be `enabled`, `disabled`, or `all`. Responses carry an `ETag`; send it back in `If-None-Match` to get a `304` while no target changed.",
 )
-def list_targets(
+async def list_targets(
+    request: Request,
+    response: Response,
     status: Literal["enabled", "disabled", "all"] = Query("enabled"),
 ):
-    rows = fetch_all_targets(status=status)
+    async with async_session_scope(readonly=True) as session:
+        version = await fetch_targets_version_async(s=session)
+        etag = make_etag("targets", version, status)
+        if etag_matches(request, etag):
+            return not_modified(etag, REVALIDATE)
+
+        rows = await fetch_all_targets_async(status=status, s=session)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
     return {"items": [TargetResponse(**r) for r in rows]}
 
 
@@ -28,8 +42,8 @@ def list_targets(
     summary="Get target by ID",
     description="Get details of a specific target by its ID.",
 )
-def get_target(target_id: uuid.UUID) -> TargetResponse:
-    row = fetch_target_by_id(target_id)
+async def get_target(target_id: uuid.UUID) -> TargetResponse:
+    row = await fetch_target_by_id_async(target_id)
     if row is None:
         raise HTTPException(status_code=404, detail="Target not found")
     return TargetResponse(**row)
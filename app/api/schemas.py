@@ -40,11 +40,34 @@ class HealthStats(BaseModel):
         `None` when no results exist yet.
     - `seconds_since_last_result`: seconds since `last_result_ts`, or
         `None` when `last_result_ts` is `None`.
+    - `live_pollers`: pollers with an unexpired lease (sharded mode only).
     """
 
     enabled_targets: int = Field(..., ge=0)
     last_result_ts: datetime | None = None
     seconds_since_last_result: int | None = Field(default=None, ge=0)
+    live_pollers: int = Field(default=0, ge=0)
+
+
+class TargetHealth(BaseModel):
+    """Freshness of a single enabled target.
+
+    Attributes:
+    - `stale_after_seconds`: allowed age of the target's newest result,
+        derived from its own `interval_seconds`.
+    - `last_result_ts`/`seconds_since_last_result`: the newest result, or
+        `None` when the target has no result yet.
+    - `stale`: `true` when the newest result is older than
+        `stale_after_seconds` or the target has no result at all.
+    """
+
+    target_id: uuid.UUID
+    target_name: str
+    interval_seconds: int = Field(..., ge=1)
+    stale_after_seconds: int = Field(..., ge=0)
+    last_result_ts: datetime | None = None
+    seconds_since_last_result: int | None = Field(default=None, ge=0)
+    stale: bool
 
 
 class HealthResponse(BaseModel):
@@ -56,6 +79,7 @@ class HealthResponse(BaseModel):
     - `db`: whether the database is reachable.
     - `thresholds`: the configured health thresholds.
     - `stats`: runtime health statistics.
+    - `targets`: per-target freshness, only when requested with `?targets=true`.
     """
 
     generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -63,6 +87,7 @@ class HealthResponse(BaseModel):
     db: bool
     thresholds: HealthThresholds
     stats: HealthStats
+    targets: list[TargetHealth] | None = None
 
 
 class TargetResponse(BaseModel):
@@ -115,12 +140,14 @@ class TargetResultsResponse(BaseModel):
     - `target_id`/`target_name`: identify the target.
     - `generated_at`: when this response was produced (UTC).
     - `items`: list of `ProbeResultOut` entries ordered by time.
+    - `next_cursor`: pass as `cursor` to fetch the next page; `None` on the last page.
     """
 
     target_id: uuid.UUID
     target_name: str
     generated_at: datetime = Field(default_factory=utcnow)
     items: list[ProbeResultOut]
+    next_cursor: str | None = None
 
 
 class LatestResultByTargetItem(BaseModel):
@@ -159,10 +186,32 @@ class LatestResultsResponse(BaseModel):
 
     - `generated_at`: UTC timestamp for the response.
     - `items`: list of `LatestResultItem` entries.
+    - `next_cursor`: pass as `cursor` to fetch the next page; `None` on the last page.
     """
 
     generated_at: datetime = Field(default_factory=utcnow)
     items: list[LatestResultItem]
+    next_cursor: str | None = None
+
+
+class TargetHistory(BaseModel):
+    """Newest results of one target in a `ResultsHistoryResponse`."""
+
+    target_id: uuid.UUID
+    target_name: str
+    items: list[ProbeResultOut]
+
+
+class ResultsHistoryResponse(BaseModel):
+    """Recent results of several targets, grouped by target.
+
+    - `generated_at`: UTC timestamp for the response.
+    - `targets`: one `TargetHistory` per target, ordered by name; each lists
+      up to `limit` results, newest first.
+    """
+
+    generated_at: datetime = Field(default_factory=utcnow)
+    targets: list[TargetHistory]
 
 
 class LatestResultByTargetResponse(BaseModel):
@@ -175,3 +224,38 @@ class LatestResultByTargetResponse(BaseModel):
 
     generated_at: datetime = Field(default_factory=utcnow)
     items: list[LatestResultByTargetItem]
+
+
+class SummaryItem(BaseModel):
+    """Uptime and latency of one target over a summary window.
+
+    - `uptime_percent`: share of successful probes, or `None` without probes.
+    - `avg_latency_ms`: mean latency of probes that reported one, or `None`.
+    - `total_probes`: number of probes in the window.
+    """
+
+    target_id: uuid.UUID
+    target_name: str
+    uptime_percent: float | None = None
+    avg_latency_ms: float | None = None
+    total_probes: int = Field(..., ge=0)
+
+
+class SummaryResponse(BaseModel):
+    """Per-target summary for all enabled targets.
+
+    - `generated_at`: UTC timestamp for the response.
+    - `window`: the requested window, e.g. `1h`.
+    - `items`: one `SummaryItem` per enabled target.
+    """
+
+    generated_at: datetime = Field(default_factory=utcnow)
+    window: str
+    items: list[SummaryItem]
+
+
+class TargetSummaryResponse(SummaryItem):
+    """Summary for a single target over `window` (see `SummaryItem`)."""
+
+    generated_at: datetime = Field(default_factory=utcnow)
+    window: str
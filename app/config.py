@@ -5,8 +5,85 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     database_url: str
+    # Optional streaming replicas (comma-separated URLs) for read-only API queries.
+    # A replica is skipped while unreachable or lagging more than replica_max_lag_seconds.
+    database_replica_urls: str = ""
+    replica_max_lag_seconds: float = 10.0
+    replica_check_interval_seconds: float = 5.0
     targets_path: str = "targets.yaml"
     log_level: str = "info"
+    # How often the poller checks the targets file for changes; 0 disables reloading.
+    targets_reload_seconds: int = 5
+
+    # How long /health reuses a computed response; load balancers poll it constantly.
+    health_cache_seconds: float = 2.0
+
+    # Have result writes NOTIFY the rows they store, which feeds /results/stream. Off by
+    # default: NOTIFY serializes committing transactions on a global lock.
+    results_notify_enabled: bool = False
+    # Live result stream: events a subscriber may fall behind before it is dropped,
+    # and how long an idle stream waits before sending a keepalive comment.
+    live_subscriber_buffer: int = 1000
+    live_heartbeat_seconds: float = 15.0
+
+    # Poller result writer: probe loops enqueue results, one task flushes them in bulk.
+    writer_queue_size: int = 10000
+    writer_batch_size: int = 500
+    writer_flush_interval_ms: int = 1000
+    writer_stats_interval_seconds: int = 60
+
+    # On-disk spool for results the database cannot take right now ("" disables it).
+    # It has to outlive the container: docker-compose mounts a volume here.
+    spool_dir: str = "/var/lib/pingu/spool"
+    spool_max_mb: int = 512
+    spool_segment_mb: int = 16
+    # A flush slower than this also diverts results to the spool.
+    spool_slow_flush_ms: int = 5000
+    spool_replay_interval_seconds: int = 5
+
+    # probe_results is partitioned by day. Pollers create partitions this many days
+    # ahead and drop those older than the retention window (0 keeps everything).
+    partition_days_ahead: int = 7
+    result_retention_days: int = 0
+    maintenance_interval_seconds: int = 3600
+
+    # Per-target 1-minute and 1-hour aggregates of probe_results.
+    rollup_interval_seconds: int = 60
+    rollup_1m_retention_days: int = 30  # 0 keeps everything; hourly rollups are kept
+
+    # Poller scheduler: one heap of due times, probes run on a bounded worker pool.
+    scheduler_workers: int = 256
+    scheduler_stats_interval_seconds: int = 60
+    # Run each target at a fixed, hash-derived slot within its interval.
+    scheduler_phase: bool = True
+
+    # Admission control: global cap on probes in flight (0 = scheduler_workers), the
+    # share of it low-priority probes may use, and a per-host token bucket
+    # (probes per second and burst size; a rate of 0, the default, disables it).
+    probe_max_in_flight: int = 0
+    probe_low_priority_share: float = 0.5
+    probe_host_rate: float = 0.0
+    probe_host_burst: int = 10
+
+    # Shared HTTP clients used by targets with `connection: warm`.
+    http_pool_max_connections: int = 200
+    http_pool_max_keepalive: int = 200
+    http_keepalive_expiry_seconds: float = 300.0
+    http2: bool = False
+
+    # "auto": shared in-process ICMP socket, falling back to the ping subprocess when
+    # sockets are unavailable; "subprocess": always spawn ping.
+    icmp_engine: str = "auto"
+    # Probe all ICMP targets with the same interval together as one batch.
+    icmp_sweep: bool = False
+
+    # Sharding: pollers heartbeat into the `pollers` table and split enabled targets
+    # among live pollers by consistent hashing on target id.
+    shard_enabled: bool = False
+    poller_name: str = ""  # defaults to "<hostname>-<pid>"
+    poller_heartbeat_seconds: int = 10
+    poller_lease_seconds: int = 30
+    shard_vnodes: int = 64
 
 
 settings = Settings()  # type: ignore
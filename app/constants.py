@@ -2,4 +2,37 @@
 
 DEFAULT_LIMIT: int = 200  # Default items per page
 MAX_LIMIT: int = 1000  # Maximum items per page
+EXPORT_CHUNK_ROWS: int = 5000  # Rows fetched per round trip by streaming exports
+HISTORY_MAX_TARGETS: int = 500  # Target ids accepted by one /results/history request
 MAX_BACKOFF_MULTIPLIER = 8
+
+# Upper bounds (exclusive, ms) of the latency histogram buckets kept in the rollup
+# tables; one more bucket counts everything at or above the last bound.
+LATENCY_HISTOGRAM_BOUNDS_MS: tuple[int, ...] = (
+    1,
+    2,
+    5,
+    10,
+    20,
+    50,
+    100,
+    200,
+    500,
+    1000,
+    2000,
+    5000,
+)
+
+# Summaries over windows up to this long read raw results; longer ones use rollups.
+SUMMARY_RAW_MAX_SECONDS: int = 15 * 60
+# Largest accepted summary window.
+SUMMARY_MAX_WINDOW_DAYS: int = 366
+
+# Result ranges ending at least this long ago may be reused from caches for a few
+# minutes without revalidation. Not longer, and never `immutable`: after a long
+# outage the spool replays results of any age into past ranges.
+HTTP_PAST_RANGE_AFTER_SECONDS: int = 3600
+HTTP_PAST_RANGE_MAX_AGE_SECONDS: int = 300
+
+# NOTIFY channel on which result writes announce new probe_results rows.
+RESULTS_CHANNEL: str = "probe_results"
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, contextmanager
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
+from app.replicas import Replica, ReplicaRouter
 
 _engine: Engine = create_engine(
     settings.database_url,
@@ -15,26 +24,77 @@ _engine: Engine = create_engine(
 
 SessionLocal = sessionmaker(bind=_engine, autoflush=False, autocommit=False, expire_on_commit=False)
 
+# Used by the API: the same URL with psycopg's async driver, so request handlers can
+# await queries on the event loop instead of holding a threadpool thread each.
+_async_engine: AsyncEngine = create_async_engine(
+    settings.database_url,
+    pool_pre_ping=True,
+)
+
+AsyncSessionLocal = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+
+_replica_urls = [u.strip() for u in settings.database_replica_urls.split(",") if u.strip()]
+replicas: ReplicaRouter | None = (
+    ReplicaRouter.from_urls(
+        _replica_urls,
+        max_lag_s=settings.replica_max_lag_seconds,
+        check_interval_s=settings.replica_check_interval_seconds,
+    )
+    if _replica_urls
+    else None
+)
+
 
 @contextmanager
-def session_scope(existing: Session | None = None):
+def session_scope(existing: Session | None = None, *, readonly: bool = False):
     """
     Yields a Session.
 
     - If `existing` is provided, participates in the caller's transaction and does not
       commit/rollback/close.
     - If `existing` is None, opens a new session and manages commit/rollback/close.
+    - `readonly=True` may send the new session to a replica (see `app.replicas`);
+      only pass it for reads that tolerate replication lag.
     """
     if existing is not None:
         yield existing
         return
 
-    s = SessionLocal()
+    replica = replicas.pick() if readonly and replicas is not None else None
+    s = replica.session_factory() if replica is not None else SessionLocal()
     try:
         yield s
         s.commit()
-    except Exception:
+    except Exception as e:
         s.rollback()
+        _on_replica_error(replica, e)
         raise
     finally:
         s.close()
+
+
+def _on_replica_error(replica: Replica | None, e: Exception) -> None:
+    if replica is not None and replicas is not None and isinstance(e, OperationalError):
+        replicas.mark_failed(replica)
+
+
+@asynccontextmanager
+async def async_session_scope(
+    existing: AsyncSession | None = None, *, readonly: bool = False
+) -> AsyncIterator[AsyncSession]:
+    """Async counterpart of `session_scope`, with the same transaction and replica rules."""
+    if existing is not None:
+        yield existing
+        return
+
+    replica = await replicas.pick_async() if readonly and replicas is not None else None
+    s = replica.async_session_factory() if replica is not None else AsyncSessionLocal()
+    try:
+        yield s
+        await s.commit()
+    except Exception as e:
+        await s.rollback()
+        _on_replica_error(replica, e)
+        raise
+    finally:
+        await s.close()
@@ -1,5 +1,6 @@
 import uuid
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass(frozen=True)
@@ -9,6 +10,7 @@ class IcmpTarget:
     host: str
     interval_seconds: int
     timeout_ms: int
+    priority: str = "normal"
 
 
 @dataclass(frozen=True)
@@ -18,3 +20,13 @@ class HttpTarget:
     url: str
     interval_seconds: int
     timeout_ms: int
+    connection: str = "cold"
+    priority: str = "normal"
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    success: bool
+    latency_ms: Optional[int]
+    status_code: Optional[int]
+    error: Optional[str]
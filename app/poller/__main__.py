@@ -1,19 +1,38 @@
+import functools
 import logging
-import random
+import os
+import socket
+import time
+import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Awaitable, Callable, Optional
+from typing import Callable
+from urllib.parse import urlsplit
 from uuid import UUID
 
 import anyio
 from anyio import to_thread as anyto_thread
 
 from app.config import settings
-from app.constants import MAX_BACKOFF_MULTIPLIER
-from app.models import HttpTarget, IcmpTarget
+from app.models import HttpTarget, IcmpTarget, ProbeResult
+from app.poller.admission import AdmissionControl
 from app.poller.config import load_targets
-from app.poller.http import http_probe_once
+from app.poller.http import close_client_pool, http_probe_once
 from app.poller.icmp import icmp_ping_once
+from app.poller.maintenance import run_maintenance_forever, run_rollups_forever
+from app.poller.reconcile import ReconcileSummary, TargetReconciler
+from app.poller.reload import TargetsFileWatcher
+from app.poller.scheduler import (
+    ProbeFn,
+    ProbeJob,
+    Scheduler,
+    compute_sleep_time,
+    next_backoff,
+)
+from app.poller.sharding import ShardCoordinator
+from app.poller.spool import ResultSpool
+from app.poller.sweep import IcmpSweep
+from app.poller.writer import PendingResult, ResultWriter
 from app.repos.results import insert_probe_result
 from app.repos.sync import sync_targets_to_db
 from app.repos.targets import fetch_enabled_http_targets, fetch_enabled_icmp_targets
@@ -24,23 +43,6 @@ logging.basicConfig(
 )
 
 
-@dataclass(frozen=True)
-class ProbeResult:
-    success: bool
-    latency_ms: Optional[int]
-    status_code: Optional[int]
-    error: Optional[str]
-
-
-ProbeFn = Callable[[], Awaitable[ProbeResult]]
-
-
-def compute_sleep_time(interval_seconds: int, backoff_multiplier: int) -> float:
-    base_sleep = interval_seconds * backoff_multiplier
-    jitter = random.uniform(-0.1 * base_sleep, 0.1 * base_sleep)
-    return max(0.1, base_sleep + jitter)
-
-
 async def _write_result_async(
     *,
     target_id: UUID,
@@ -98,6 +100,61 @@ def _log_result(
         )
 
 
+async def run_probe(
+    *,
+    kind: str,
+    target_id: UUID,
+    target_name: str,
+    timeout_ms: int,
+    probe: ProbeFn,
+    writer: ResultWriter | None = None,
+) -> ProbeResult | None:
+    """
+    Run one probe, log it and hand the result to the writer.
+
+    Returns None if the probe raised unexpectedly; the error is logged.
+    """
+    try:
+        ts = datetime.now(timezone.utc)
+
+        result = await probe()
+        _log_result(
+            kind=kind,
+            target_name=target_name,
+            timeout_ms=timeout_ms,
+            result=result,
+        )
+
+        if writer is not None:
+            await writer.put(target_id=target_id, ts=ts, result=result)
+        else:
+            await _write_result_async(target_id=target_id, ts=ts, result=result)
+
+        return result
+
+    except Exception as e:
+        logging.exception(f"unexpected error during {kind} poll for target {target_name}: {e}")
+        return None
+
+
+async def run_job(job: ProbeJob, writer: ResultWriter | None = None) -> ProbeResult | None:
+    if not job.record_result:
+        try:
+            return await job.probe()
+        except Exception as e:
+            logging.exception(f"unexpected error during {job.kind} job {job.target_name}: {e}")
+            return None
+
+    return await run_probe(
+        kind=job.kind,
+        target_id=job.target_id,
+        target_name=job.target_name,
+        timeout_ms=job.timeout_ms,
+        probe=job.probe,
+        writer=writer,
+    )
+
+
 async def poll_forever(
     *,
     kind: str,
@@ -106,38 +163,30 @@ async def poll_forever(
     interval_seconds: int,
     timeout_ms: int,
     probe: ProbeFn,
+    writer: ResultWriter | None = None,
 ) -> None:
+    """Poll a single target in its own loop (the scheduler is used by `main_async`)."""
     logging.info(f"[poller] starting {kind} poll loop for {target_name} every {interval_seconds}s")
 
     backoff = 1
 
     while True:
-        try:
-            ts = datetime.now(timezone.utc)
-
-            result = await probe()
-            _log_result(
-                kind=kind,
-                target_name=target_name,
-                timeout_ms=timeout_ms,
-                result=result,
-            )
-
-            if result.success:
-                backoff = 1
-            else:
-                backoff = min(backoff * 2, MAX_BACKOFF_MULTIPLIER)
-
-            await _write_result_async(target_id=target_id, ts=ts, result=result)
-
-        except Exception as e:
-            logging.exception(f"unexpected error during {kind} poll for target {target_name}: {e}")
+        result = await run_probe(
+            kind=kind,
+            target_id=target_id,
+            target_name=target_name,
+            timeout_ms=timeout_ms,
+            probe=probe,
+            writer=writer,
+        )
+        if result is not None:
+            backoff = next_backoff(backoff, result.success)
 
         sleep_time = compute_sleep_time(interval_seconds, backoff)
         await anyio.sleep(sleep_time)
 
 
-async def poll_icmp_forever(t: IcmpTarget) -> None:
+def icmp_job(t: IcmpTarget) -> ProbeJob:
     async def probe() -> ProbeResult:
         success, latency_ms, error = await icmp_ping_once(t.host, t.timeout_ms)
         return ProbeResult(
@@ -147,19 +196,23 @@ async def poll_icmp_forever(t: IcmpTarget) -> None:
             error=error,
         )
 
-    await poll_forever(
+    return ProbeJob(
         kind="icmp",
         target_id=t.id,
         target_name=f"{t.name} ({t.host})",
         interval_seconds=t.interval_seconds,
         timeout_ms=t.timeout_ms,
         probe=probe,
+        host=t.host,
+        priority=t.priority,
     )
 
 
-async def poll_http_forever(t: HttpTarget) -> None:
+def http_job(t: HttpTarget) -> ProbeJob:
     async def probe() -> ProbeResult:
-        success, latency_ms, status_code, error = await http_probe_once(t.url, t.timeout_ms)
+        success, latency_ms, status_code, error = await http_probe_once(
+            t.url, t.timeout_ms, mode=t.connection
+        )
         return ProbeResult(
             success=success,
             latency_ms=latency_ms,
@@ -167,40 +220,267 @@ async def poll_http_forever(t: HttpTarget) -> None:
             error=error,
         )
 
-    await poll_forever(
+    return ProbeJob(
         kind="http",
         target_id=t.id,
         target_name=f"{t.name} ({t.url})",
         interval_seconds=t.interval_seconds,
         timeout_ms=t.timeout_ms,
         probe=probe,
+        host=urlsplit(t.url).hostname,
+        priority=t.priority,
     )
 
 
-async def main_async() -> None:
-    logging.info(f"[poller] loading targets from {settings.targets_path}")
-    targets = load_targets(settings.targets_path)
-    sync_targets_to_db(targets)
-    logging.info(f"[poller] synced {len(targets)} targets into db")
+def icmp_sweep_job(sweep: IcmpSweep, writer: ResultWriter | None = None) -> ProbeJob:
+    async def probe() -> ProbeResult:
+        ts = datetime.now(timezone.utc)
+        results = await sweep.run_once()
 
-    icmp_targets = fetch_enabled_icmp_targets()
-    http_targets = fetch_enabled_http_targets()
+        pending: list[PendingResult] = []
+        for t, result in results:
+            _log_result(
+                kind="icmp",
+                target_name=f"{t.name} ({t.host})",
+                timeout_ms=t.timeout_ms,
+                result=result,
+            )
+            pending.append(PendingResult(target_id=t.id, ts=ts, result=result))
+
+        if writer is not None:
+            await writer.put_many(pending)
+        else:
+            for p in pending:
+                await _write_result_async(target_id=p.target_id, ts=p.ts, result=p.result)
+
+        return ProbeResult(success=True, latency_ms=None, status_code=None, error=None)
+
+    return ProbeJob(
+        kind="icmp-sweep",
+        target_id=sweep.id,
+        target_name=f"icmp sweep every {sweep.interval_seconds}s",
+        interval_seconds=sweep.interval_seconds,
+        timeout_ms=sweep.timeout_ms,
+        probe=probe,
+        record_result=False,
+    )
 
+
+async def poll_job_forever(job: ProbeJob, writer: ResultWriter | None = None) -> None:
+    await poll_forever(
+        kind=job.kind,
+        target_id=job.target_id,
+        target_name=job.target_name,
+        interval_seconds=job.interval_seconds,
+        timeout_ms=job.timeout_ms,
+        probe=job.probe,
+        writer=writer,
+    )
+
+
+async def poll_icmp_forever(t: IcmpTarget, writer: ResultWriter | None = None) -> None:
+    await poll_job_forever(icmp_job(t), writer)
+
+
+async def poll_http_forever(t: HttpTarget, writer: ResultWriter | None = None) -> None:
+    await poll_job_forever(http_job(t), writer)
+
+
+@dataclass
+class DesiredTargets:
+    """The enabled targets from the database, swapped out on every reload."""
+
+    icmp: list[IcmpTarget]
+    http: list[HttpTarget]
+
+
+def load_and_sync_targets(path: str) -> DesiredTargets:
+    targets = load_targets(path)
+    summary = sync_targets_to_db(targets)
     logging.info(
-        "starting poll loops",
-        extra={"icmp": len(icmp_targets), "http": len(http_targets)},
+        f"[poller] synced {len(targets)} targets into db",
+        extra={
+            "inserted": summary.inserted,
+            "updated": summary.updated,
+            "disabled": summary.disabled,
+        },
     )
+    return DesiredTargets(icmp=fetch_enabled_icmp_targets(), http=fetch_enabled_http_targets())
+
 
-    if not icmp_targets and not http_targets:
-        logging.info("[poller] no enabled targets; sleeping forever")
+def apply_targets(
+    reconciler: TargetReconciler,
+    desired: DesiredTargets,
+    coordinator: ShardCoordinator | None,
+    *,
+    delay_new_s: Callable[[IcmpTarget | HttpTarget], float] | None = None,
+) -> ReconcileSummary:
+    icmp, http = desired.icmp, desired.http
+    if coordinator is not None:
+        icmp = [t for t in icmp if coordinator.owns(t.id)]
+        http = [t for t in http if coordinator.owns(t.id)]
+    return reconciler.apply(icmp, http, delay_new_s=delay_new_s)
+
+
+async def run_sharded(
+    coordinator: ShardCoordinator,
+    reconciler: TargetReconciler,
+    desired: DesiredTargets,
+) -> None:
+    """Heartbeat forever and keep the scheduled targets in line with this poller's shard."""
+    # Newly acquired targets start one heartbeat late: the previous owner drops them
+    # on its next heartbeat, so a short gap is traded for never probing them twice.
+    handover_s = float(settings.poller_heartbeat_seconds)
+
+    try:
         while True:
-            await anyio.sleep(60)
+            if await coordinator.heartbeat():
+                summary = apply_targets(
+                    reconciler, desired, coordinator, delay_new_s=lambda _t: handover_s
+                )
+                logging.info(
+                    "[poller] shard ownership updated",
+                    extra={
+                        "pollers": len(coordinator.members),
+                        "owned": len(reconciler),
+                        "added": summary.added,
+                        "removed": summary.removed,
+                    },
+                )
+            await anyio.sleep(settings.poller_heartbeat_seconds)
+    finally:
+        with anyio.CancelScope(shield=True):
+            await coordinator.leave()
+
+
+async def reload_forever(
+    watcher: TargetsFileWatcher,
+    reconciler: TargetReconciler,
+    desired: DesiredTargets,
+    coordinator: ShardCoordinator | None,
+) -> None:
+    """Re-sync the targets file whenever it changes and apply only the difference."""
+    while True:
+        await anyio.sleep(settings.targets_reload_seconds)
+        if not watcher.changed():
+            continue
+
+        logging.info(f"[poller] {watcher.path} changed; reloading targets")
+        try:
+            fresh = await anyto_thread.run_sync(load_and_sync_targets, watcher.path)
+        except Exception:
+            logging.exception("[poller] failed to reload targets; keeping the current set")
+            continue
+
+        desired.icmp, desired.http = fresh.icmp, fresh.http
+        t0 = time.perf_counter()
+        summary = apply_targets(reconciler, desired, coordinator)
+        logging.info(
+            "[poller] targets reloaded",
+            extra={
+                "added": summary.added,
+                "removed": summary.removed,
+                "updated": summary.updated,
+                "unchanged": summary.unchanged,
+                "apply_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+            },
+        )
+
+
+async def main_async() -> None:
+    logging.info(f"[poller] loading targets from {settings.targets_path}")
+    watcher = TargetsFileWatcher(settings.targets_path)
+    desired = load_and_sync_targets(settings.targets_path)
+
+    logging.info(
+        "starting scheduler",
+        extra={"icmp": len(desired.icmp), "http": len(desired.http)},
+    )
+
+    if not desired.icmp and not desired.http:
+        logging.info("[poller] no enabled targets; waiting for targets to be added")
+
+    spool = None
+    if settings.spool_dir:
+        spool = ResultSpool(
+            settings.spool_dir,
+            max_bytes=settings.spool_max_mb * 1024 * 1024,
+            segment_bytes=settings.spool_segment_mb * 1024 * 1024,
+        )
+
+    writer = ResultWriter(
+        max_queue=settings.writer_queue_size,
+        batch_size=settings.writer_batch_size,
+        flush_interval_s=settings.writer_flush_interval_ms / 1000.0,
+        stats_interval_s=settings.writer_stats_interval_seconds,
+        spool=spool,
+        slow_flush_ms=settings.spool_slow_flush_ms,
+        replay_interval_s=settings.spool_replay_interval_seconds,
+    )
+
+    async def execute(job: ProbeJob) -> ProbeResult | None:
+        return await run_job(job, writer)
+
+    scheduler = Scheduler(
+        execute=execute,
+        workers=settings.scheduler_workers,
+        stats_interval_s=settings.scheduler_stats_interval_seconds,
+        phase=settings.scheduler_phase,
+        admission=AdmissionControl(
+            max_in_flight=settings.probe_max_in_flight or settings.scheduler_workers,
+            low_share=settings.probe_low_priority_share,
+            host_rate=settings.probe_host_rate,
+            host_burst=settings.probe_host_burst,
+        ),
+    )
+
+    def sweep_job(sw: IcmpSweep) -> ProbeJob:
+        return icmp_sweep_job(sw, writer)
+
+    reconciler = TargetReconciler(
+        scheduler,
+        icmp_job=icmp_job,
+        http_job=http_job,
+        sweep_job=sweep_job if settings.icmp_sweep else None,
+    )
+
+    coordinator: ShardCoordinator | None = None
+    if settings.shard_enabled:
+        coordinator = ShardCoordinator(
+            poller_id=uuid.uuid4(),
+            name=settings.poller_name or f"{socket.gethostname()}-{os.getpid()}",
+            lease_s=settings.poller_lease_seconds,
+            vnodes=settings.shard_vnodes,
+        )
+        logging.info(f"[poller] sharded mode as {coordinator.name} ({coordinator.poller_id})")
+
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(writer.run)
+            tg.start_soon(scheduler.run)
+            tg.start_soon(
+                functools.partial(
+                    run_maintenance_forever,
+                    interval_s=settings.maintenance_interval_seconds,
+                    days_ahead=settings.partition_days_ahead,
+                    retention_days=settings.result_retention_days,
+                    rollup_1m_retention_days=settings.rollup_1m_retention_days,
+                )
+            )
+            tg.start_soon(
+                functools.partial(run_rollups_forever, interval_s=settings.rollup_interval_seconds)
+            )
+
+            if coordinator is not None:
+                tg.start_soon(run_sharded, coordinator, reconciler, desired)
+            else:
+                apply_targets(reconciler, desired, None)
 
-    async with anyio.create_task_group() as tg:
-        for it in icmp_targets:
-            tg.start_soon(poll_icmp_forever, it)
-        for ht in http_targets:
-            tg.start_soon(poll_http_forever, ht)
+            if settings.targets_reload_seconds > 0:
+                tg.start_soon(reload_forever, watcher, reconciler, desired, coordinator)
+    finally:
+        with anyio.CancelScope(shield=True):
+            await close_client_pool()
 
 
 def main() -> None:
@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+
+# Admission order under overload, most important first.
+PRIORITIES = ("high", "normal", "low")
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token. Returns 0.0 on success, else seconds until one is available."""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+@dataclass(frozen=True)
+class Verdict:
+    admitted: bool
+    # When not admitted: seconds until the host has a token again, or None when the
+    # probe has to wait for a free in-flight slot.
+    retry_after: float | None = None
+
+
+class AdmissionControl:
+    """
+    Decides whether a probe may start now.
+
+    Two limits apply:
+    - a global cap on probes in flight. Low-priority probes may only use
+      `low_share` of it, so high- and normal-priority probes always have headroom;
+    - a token bucket per destination host (`host_rate` probes per second, bursts of
+      up to `host_burst`), so a shared host is never hit by a wall of probes.
+
+    The scheduler queues probes that are refused, and calls `release()` when an
+    admitted probe finishes.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_in_flight: int,
+        low_share: float = 0.5,
+        host_rate: float = 0.0,
+        host_burst: int = 1,
+    ) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self._low_cap = max(1, int(self.max_in_flight * min(1.0, max(0.0, low_share))))
+        self._host_rate = host_rate
+        self._host_burst = host_burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._last_prune: float | None = None
+        self.in_flight = 0
+
+    def has_capacity(self, priority: str) -> bool:
+        cap = self._low_cap if priority == "low" else self.max_in_flight
+        return self.in_flight < cap
+
+    def admit(self, priority: str, host: str | None, now: float) -> Verdict:
+        if not self.has_capacity(priority):
+            return Verdict(admitted=False)
+
+        if host is not None and self._host_rate > 0:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self._host_rate, self._host_burst, now)
+                self._buckets[host] = bucket
+            wait = bucket.take(now)
+            if wait > 0:
+                return Verdict(admitted=False, retry_after=wait)
+
+        self.in_flight += 1
+        self._maybe_prune(now)
+        return Verdict(admitted=True)
+
+    def release(self) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def _maybe_prune(self, now: float) -> None:
+        # a full bucket carries no state, so idle hosts do not need to be remembered
+        if self._last_prune is not None and now - self._last_prune < 60.0:
+            return
+        self._last_prune = now
+        for host in [h for h, b in self._buckets.items() if b.is_full(now)]:
+            del self._buckets[host]
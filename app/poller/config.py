@@ -2,6 +2,9 @@ from dataclasses import dataclass
 
 import yaml
 
+from app.poller.admission import PRIORITIES
+from app.poller.http import CONNECTION_MODES
+
 
 @dataclass(frozen=True)
 class TargetCfg:
@@ -12,6 +15,8 @@ class TargetCfg:
     interval_seconds: int
     timeout_ms: int
     enabled: bool
+    connection: str = "cold"  # http only: "cold" or "warm"
+    priority: str = "normal"  # "high", "normal" or "low"
 
 
 def load_targets(path: str) -> list[TargetCfg]:
@@ -20,6 +25,18 @@ def load_targets(path: str) -> list[TargetCfg]:
     items = raw.get("targets", [])
     out: list[TargetCfg] = []
     for it in items:
+        connection = str(it.get("connection", "cold"))
+        if connection not in CONNECTION_MODES:
+            raise ValueError(
+                f"target {it.get('name')!r}: connection must be one of "
+                f"{', '.join(CONNECTION_MODES)}, got {connection!r}"
+            )
+        priority = str(it.get("priority", "normal"))
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"target {it.get('name')!r}: priority must be one of "
+                f"{', '.join(PRIORITIES)}, got {priority!r}"
+            )
         out.append(
             TargetCfg(
                 name=str(it["name"]),
@@ -29,6 +46,8 @@ def load_targets(path: str) -> list[TargetCfg]:
                 interval_seconds=int(it["interval_seconds"]),
                 timeout_ms=int(it["timeout_ms"]),
                 enabled=bool(it.get("enabled", True)),
+                connection=connection,
+                priority=priority,
             )
         )
     return out
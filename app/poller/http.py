@@ -1,22 +1,114 @@
+import importlib.util
+import logging
 import time
 
 import httpx
 
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+CONNECTION_MODES = ("cold", "warm")
+
+
+class HttpClientPool:
+    """
+    Long-lived `httpx.AsyncClient`s shared by "warm" probes.
+
+    One client is kept per (timeout, follow_redirects) pair, so probes with the same
+    settings reuse the same connection pool, TLS context and keep-alive connections.
+    Keep-alive expiry should exceed the probe interval, otherwise idle connections
+    are closed between probes and "warm" latency degrades to "cold".
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry_s: float,
+        http2: bool = False,
+    ) -> None:
+        if http2 and importlib.util.find_spec("h2") is None:
+            log.warning("http2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self._http2 = http2
+        self._clients: dict[tuple[int, bool], httpx.AsyncClient] = {}
+
+    def get(self, *, timeout_ms: int, follow_redirects: bool = True) -> httpx.AsyncClient:
+        key = (timeout_ms, follow_redirects)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=timeout_ms / 1000.0,
+                follow_redirects=follow_redirects,
+                limits=self._limits,
+                http2=self._http2,
+            )
+            self._clients[key] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+_client_pool: HttpClientPool | None = None
+
+
+def get_client_pool() -> HttpClientPool:
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = HttpClientPool(
+            max_connections=settings.http_pool_max_connections,
+            max_keepalive_connections=settings.http_pool_max_keepalive,
+            keepalive_expiry_s=settings.http_keepalive_expiry_seconds,
+            http2=settings.http2,
+        )
+    return _client_pool
+
+
+async def close_client_pool() -> None:
+    global _client_pool
+    if _client_pool is not None:
+        await _client_pool.aclose()
+        _client_pool = None
+
 
 async def http_probe_once(
-    url: str, timeout_ms: int
+    url: str, timeout_ms: int, *, mode: str = "cold"
 ) -> tuple[bool, int | None, int | None, str | None]:
     """
     Returns (success, latency_ms, status_code, error)
     success = transport success (HTTP response received)
+
+    mode="cold" opens a fresh client (and connection) for the probe, so latency
+    includes DNS, TCP and TLS setup. mode="warm" uses the shared client pool and
+    measures a request over a reused keep-alive connection when one is available.
     """
+    if mode not in CONNECTION_MODES:
+        return False, None, None, f"invalid connection mode: {mode}"
+
     timeout_s = timeout_ms / 1000.0
 
     try:
-        async with httpx.AsyncClient(timeout=timeout_s, follow_redirects=True) as client:
+        if mode == "warm":
+            client = get_client_pool().get(timeout_ms=timeout_ms)
             start = time.perf_counter()
             resp = await client.get(url)
             elapsed_ms = int((time.perf_counter() - start) * 1000)
+        else:
+            async with httpx.AsyncClient(timeout=timeout_s, follow_redirects=True) as client:
+                start = time.perf_counter()
+                resp = await client.get(url)
+                elapsed_ms = int((time.perf_counter() - start) * 1000)
 
         return True, elapsed_ms, resp.status_code, None
 
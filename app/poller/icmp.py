@@ -1,11 +1,103 @@
 import asyncio
+import logging
 import re
 import time
 
+from app.config import settings
+from app.poller.icmp_engine import IcmpEngine
+
+log = logging.getLogger(__name__)
+
 PING_TIME_RE = re.compile(r"time[=<]([\d.]+)\s*ms")
 
+_engine: IcmpEngine | None = None
+_engine_unavailable = False
+
+
+def get_icmp_engine() -> IcmpEngine | None:
+    """
+    Return the shared socket ICMP engine for the running asyncio loop.
+
+    Returns None (and the subprocess path is used) when `ICMP_ENGINE=subprocess`,
+    when no asyncio loop is running, or when neither a raw socket (CAP_NET_RAW) nor
+    an unprivileged ping socket can be opened.
+    """
+    global _engine, _engine_unavailable
+
+    if settings.icmp_engine == "subprocess" or _engine_unavailable:
+        return None
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    if _engine is not None:
+        if _engine.loop is loop:
+            return _engine
+        # the engine of an earlier loop: release its socket before opening another
+        _engine.close()
+        _engine = None
+
+    _engine = IcmpEngine.open()
+    if _engine is None:
+        _engine_unavailable = True
+        log.warning(
+            "icmp sockets unavailable (need CAP_NET_RAW or net.ipv4.ping_group_range); "
+            "falling back to the ping subprocess"
+        )
+    return _engine
+
 
 async def icmp_ping_once(host: str, timeout_ms: int) -> tuple[bool, int | None, str | None]:
+    """
+    Returns (success, latency_ms, error).
+    Uses the shared in-process ICMP socket when available (IPv4 only), otherwise
+    system ping.
+    """
+    engine = get_icmp_engine()
+    if engine is not None:
+        addr = await engine.resolve(host)
+        if addr is not None:
+            return await engine.ping(addr, timeout_ms)
+
+    return await subprocess_ping_once(host, timeout_ms)
+
+
+async def icmp_ping_many(
+    probes: list[tuple[str, int]],
+) -> list[tuple[bool, int | None, str | None]]:
+    """
+    Ping many (host, timeout_ms) pairs together; results are in input order.
+
+    IPv4 hosts go out as one batch on the shared ICMP socket. Any host the engine
+    cannot handle (or every host when no engine is available) falls back to
+    concurrent `icmp_ping_once` calls.
+    """
+    out: list[tuple[bool, int | None, str | None] | None] = [None] * len(probes)
+    fallback: list[int] = list(range(len(probes)))
+
+    engine = get_icmp_engine()
+    if engine is not None:
+        addrs = await asyncio.gather(*[engine.resolve(host) for host, _ in probes])
+        batch = [i for i, addr in enumerate(addrs) if addr is not None]
+        fallback = [i for i, addr in enumerate(addrs) if addr is None]
+        if batch:
+            results = await engine.ping_many([(str(addrs[i]), probes[i][1]) for i in batch])
+            for i, r in zip(batch, results):
+                out[i] = r
+
+    if fallback:
+        results = await asyncio.gather(
+            *[icmp_ping_once(probes[i][0], probes[i][1]) for i in fallback]
+        )
+        for i, r in zip(fallback, results):
+            out[i] = r
+
+    return [r if r is not None else (False, None, "not probed") for r in out]
+
+
+async def subprocess_ping_once(host: str, timeout_ms: int) -> tuple[bool, int | None, str | None]:
     """
     Returns (success, latency_ms, error).
     Uses system ping. Requires iputils-ping + CAP_NET_RAW in container.
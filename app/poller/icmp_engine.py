@@ -0,0 +1,337 @@
+import asyncio
+import errno
+import ipaddress
+import logging
+import os
+import socket
+import struct
+import sys
+import time
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACHABLE = 3
+ICMP_ECHO_REQUEST = 8
+ICMP_TIME_EXCEEDED = 11
+
+# Same payload size as `ping` (56 data bytes -> 64 byte ICMP packet).
+PAYLOAD = bytes(range(56))
+
+# SO_TIMESTAMPNS is not exported by the socket module; 35 is its value on Linux.
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+_TIMESPEC = struct.Struct("@ll")
+
+# Replies to a burst of probes arrive together; a small receive buffer drops them.
+RECV_BUFFER_BYTES = 4 * 1024 * 1024
+
+# How long to back off when the interface queue is full (ENOBUFS) before resending.
+SEND_RETRY_S = 0.001
+
+
+def checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident: int, seq: int, payload: bytes = PAYLOAD) -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+@dataclass(frozen=True)
+class IcmpMessage:
+    type: int
+    code: int
+    ident: int
+    seq: int
+
+
+def parse_icmp(packet: bytes, *, has_ip_header: bool) -> IcmpMessage | None:
+    """
+    Parse an echo reply, or an error message quoting one of our echo requests.
+
+    For destination-unreachable/time-exceeded messages the returned ident/seq are
+    taken from the quoted original echo request.
+    """
+    if has_ip_header:
+        if len(packet) < 20:
+            return None
+        packet = packet[(packet[0] & 0x0F) * 4 :]
+    if len(packet) < 8:
+        return None
+
+    icmp_type, code, _, ident, seq = struct.unpack("!BBHHH", packet[:8])
+    if icmp_type == ICMP_ECHO_REPLY:
+        return IcmpMessage(type=icmp_type, code=code, ident=ident, seq=seq)
+
+    if icmp_type in (ICMP_DEST_UNREACHABLE, ICMP_TIME_EXCEEDED):
+        inner = packet[8:]
+        if len(inner) < 20:
+            return None
+        inner = inner[(inner[0] & 0x0F) * 4 :]
+        if len(inner) < 8:
+            return None
+        inner_type, _, _, ident, seq = struct.unpack("!BBHHH", inner[:8])
+        if inner_type != ICMP_ECHO_REQUEST:
+            return None
+        return IcmpMessage(type=icmp_type, code=code, ident=ident, seq=seq)
+
+    return None
+
+
+@dataclass
+class _Pending:
+    addr: str
+    sent_ns: int
+    future: "asyncio.Future[tuple[bool, int | None, str | None]]"
+
+
+class IcmpEngine:
+    """
+    In-process ICMP echo over one shared non-blocking socket.
+
+    A raw socket (CAP_NET_RAW) is preferred; an unprivileged Linux "ping" datagram
+    socket (net.ipv4.ping_group_range) is used otherwise. Concurrent probes are
+    multiplexed by echo sequence number (and identifier on raw sockets, which also
+    see replies meant for other processes). RTT is taken from the kernel receive
+    timestamp (SO_TIMESTAMPNS) when available, minus the send time.
+    """
+
+    def __init__(self, sock: socket.socket, *, raw: bool) -> None:
+        self._sock = sock
+        self._raw = raw
+        self._loop = asyncio.get_running_loop()
+        # ping sockets get their identifier assigned by the kernel
+        self._ident = os.getpid() & 0xFFFF
+        self._seq = 0
+        self._pending: dict[int, _Pending] = {}
+        # resolved when the socket has send buffer space again, shared by all senders
+        self._writable: asyncio.Future[None] | None = None
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+
+    @classmethod
+    def open(cls) -> "IcmpEngine | None":
+        for sock_type, raw in ((socket.SOCK_RAW, True), (socket.SOCK_DGRAM, False)):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            except (PermissionError, OSError):
+                continue
+            sock.setblocking(False)
+            try:
+                # best effort: the kernel caps this at net.core.rmem_max
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER_BYTES)
+            except OSError:
+                pass
+            if sys.platform.startswith("linux"):
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+                except OSError:
+                    pass
+            return cls(sock, raw=raw)
+        return None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    @property
+    def raw(self) -> bool:
+        return self._raw
+
+    def close(self) -> None:
+        self._loop.remove_reader(self._sock.fileno())
+        self._loop.remove_writer(self._sock.fileno())
+        self._sock.close()
+        for p in self._pending.values():
+            # futures of a closed loop can no longer be resolved
+            if not p.future.done() and not self._loop.is_closed():
+                p.future.set_result((False, None, "icmp engine closed"))
+        self._pending.clear()
+
+    async def resolve(self, host: str) -> str | None:
+        """Return an IPv4 address for `host`, or None if it has none (or is IPv6)."""
+        try:
+            ip = ipaddress.ip_address(host)
+            return str(ip) if ip.version == 4 else None
+        except ValueError:
+            pass
+        try:
+            infos = await self._loop.getaddrinfo(host, None, family=socket.AF_INET)
+        except socket.gaierror:
+            return None
+        return str(infos[0][4][0]) if infos else None
+
+    async def ping(self, addr: str, timeout_ms: int) -> tuple[bool, int | None, str | None]:
+        """Returns (success, latency_ms, error), like `icmp_ping_once`."""
+        try:
+            seq = self._next_seq()
+        except RuntimeError as e:
+            return False, None, str(e)
+        future: asyncio.Future[tuple[bool, int | None, str | None]] = self._loop.create_future()
+        self._pending[seq] = _Pending(addr=addr, sent_ns=time.time_ns(), future=future)
+
+        try:
+            error = await self._send(seq, addr, timeout_ms / 1000.0)
+            if error is not None:
+                return False, None, error
+
+            try:
+                return await asyncio.wait_for(future, timeout_ms / 1000.0)
+            except asyncio.TimeoutError:
+                return False, None, "timeout"
+        finally:
+            self._pending.pop(seq, None)
+
+    async def ping_many(
+        self, probes: list[tuple[str, int]]
+    ) -> list[tuple[bool, int | None, str | None]]:
+        """
+        Ping many (addr, timeout_ms) pairs as one batch.
+
+        All echo requests are sent back to back and the batch waits on a single
+        timer (the largest timeout) instead of one timer per probe. Replies that
+        arrive after their own probe's timeout are reported as timeouts. Probes that
+        find no free sequence number (65535 already in flight) fail on their own.
+        When the socket's send buffer fills up, sending waits for it to drain.
+        """
+        sent: list[tuple[int, asyncio.Future[tuple[bool, int | None, str | None]]] | str] = []
+        try:
+            for addr, timeout_ms in probes:
+                try:
+                    seq = self._next_seq()
+                except RuntimeError as e:
+                    sent.append(str(e))
+                    continue
+                future: asyncio.Future[tuple[bool, int | None, str | None]] = (
+                    self._loop.create_future()
+                )
+                self._pending[seq] = _Pending(addr=addr, sent_ns=time.time_ns(), future=future)
+                error = await self._send(seq, addr, timeout_ms / 1000.0)
+                if error is not None:
+                    self._pending.pop(seq, None)
+                    sent.append(error)
+                    continue
+                sent.append((seq, future))
+
+            futures = [item[1] for item in sent if not isinstance(item, str)]
+            if futures:
+                max_timeout_s = max(timeout_ms for _, timeout_ms in probes) / 1000.0
+                await asyncio.wait(futures, timeout=max_timeout_s)
+        finally:
+            for item in sent:
+                if not isinstance(item, str):
+                    self._pending.pop(item[0], None)
+
+        out: list[tuple[bool, int | None, str | None]] = []
+        for (_, timeout_ms), item in zip(probes, sent):
+            if isinstance(item, str):
+                out.append((False, None, item))
+                continue
+            future = item[1]
+            if not future.done():
+                future.cancel()
+                out.append((False, None, "timeout"))
+                continue
+            success, latency_ms, error = future.result()
+            if success and latency_ms is not None and latency_ms > timeout_ms:
+                out.append((False, None, "timeout"))
+            else:
+                out.append((success, latency_ms, error))
+        return out
+
+    async def _send(self, seq: int, addr: str, timeout_s: float) -> str | None:
+        """
+        Send the echo request for the pending probe `seq`; returns an error or None.
+
+        A full socket buffer is not a failure of the target: wait until the socket is
+        writable again (EAGAIN) or back off briefly (ENOBUFS), for at most `timeout_s`.
+        """
+        packet = build_echo_request(self._ident, seq)
+        deadline = self._loop.time() + timeout_s
+        while True:
+            try:
+                self._sock.sendto(packet, (addr, 0))
+            except (BlockingIOError, InterruptedError):
+                remaining = deadline - self._loop.time()
+                if remaining > 0:
+                    await asyncio.wait([self._wait_writable()], timeout=remaining)
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    return f"send failed: {e}"[:500]
+                await asyncio.sleep(SEND_RETRY_S)
+            else:
+                pending = self._pending.get(seq)
+                if pending is not None:
+                    # the RTT starts now, not when the probe began waiting to be sent
+                    pending.sent_ns = time.time_ns()
+                return None
+            if self._loop.time() >= deadline:
+                return "send failed: socket buffer full"
+
+    def _wait_writable(self) -> "asyncio.Future[None]":
+        if self._writable is None or self._writable.done():
+            fd = self._sock.fileno()
+            writable: asyncio.Future[None] = self._loop.create_future()
+
+            def on_writable() -> None:
+                self._loop.remove_writer(fd)
+                if not writable.done():
+                    writable.set_result(None)
+
+            self._loop.add_writer(fd, on_writable)
+            self._writable = writable
+        return self._writable
+
+    def _next_seq(self) -> int:
+        for _ in range(0x10000):
+            self._seq = (self._seq + 1) & 0xFFFF
+            if self._seq not in self._pending:
+                return self._seq
+        raise RuntimeError("too many outstanding ICMP echo requests")
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                data, ancdata, _flags, address = self._sock.recvmsg(2048, 64)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # ping sockets report ICMP errors for earlier sends as recv errors
+                log.debug("icmp socket receive failed", extra={"error": str(e)})
+                return
+
+            recv_ns = _kernel_timestamp_ns(ancdata) or time.time_ns()
+            msg = parse_icmp(data, has_ip_header=self._raw)
+            if msg is None or (self._raw and msg.ident != self._ident):
+                continue
+
+            pending = self._pending.get(msg.seq)
+            if pending is None or pending.future.done():
+                continue
+
+            if msg.type == ICMP_ECHO_REPLY:
+                if address[0] != pending.addr:
+                    continue
+                latency_ms = max(0, int((recv_ns - pending.sent_ns) / 1_000_000))
+                pending.future.set_result((True, latency_ms, None))
+            elif msg.type == ICMP_DEST_UNREACHABLE:
+                pending.future.set_result(
+                    (False, None, f"destination unreachable (code {msg.code}) from {address[0]}")
+                )
+            else:
+                pending.future.set_result((False, None, f"time exceeded from {address[0]}"))
+
+
+def _kernel_timestamp_ns(ancdata: list[tuple[int, int, bytes]]) -> int | None:
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(data) >= _TIMESPEC.size:
+            sec, nsec = _TIMESPEC.unpack(data[: _TIMESPEC.size])
+            return sec * 1_000_000_000 + nsec
+    return None
@@ -0,0 +1,71 @@
+import logging
+
+import anyio
+from anyio import to_thread as anyto_thread
+
+from app.repos.partitions import (
+    drop_expired_probe_result_partitions,
+    ensure_probe_result_partitions,
+)
+from app.repos.rollups import advance_rollups, delete_old_rollups
+
+log = logging.getLogger(__name__)
+
+
+async def maintain_partitions(*, days_ahead: int, retention_days: int) -> None:
+    created = await anyto_thread.run_sync(ensure_probe_result_partitions, days_ahead)
+    dropped = await anyto_thread.run_sync(drop_expired_probe_result_partitions, retention_days)
+    if created or dropped:
+        log.info(
+            "probe_results partitions updated",
+            extra={"created": created, "dropped": dropped},
+        )
+
+
+async def run_maintenance_forever(
+    *,
+    interval_s: float,
+    days_ahead: int,
+    retention_days: int,
+    rollup_1m_retention_days: int = 0,
+) -> None:
+    """
+    Periodic database housekeeping run by every poller.
+
+    Creates upcoming daily partitions of `probe_results`, drops those past the
+    retention window and deletes expired 1-minute rollups. The work is idempotent and
+    serialized with advisory locks, so several pollers running it at once is harmless.
+    """
+    while True:
+        try:
+            await maintain_partitions(days_ahead=days_ahead, retention_days=retention_days)
+            await anyto_thread.run_sync(
+                delete_old_rollups, "probe_rollup_1m", rollup_1m_retention_days
+            )
+        except Exception:
+            log.exception("database maintenance failed")
+        await anyio.sleep(interval_s)
+
+
+async def update_rollups() -> int:
+    """Fold all new raw results into the rollup tables. Returns rollup rows written."""
+    rows = 0
+    while True:
+        run = await anyto_thread.run_sync(advance_rollups)
+        rows += run.rows
+        if run.caught_up:
+            return rows
+
+
+async def run_rollups_forever(*, interval_s: float) -> None:
+    while True:
+        try:
+            t0 = anyio.current_time()
+            rows = await update_rollups()
+            log.debug(
+                "rollups updated",
+                extra={"rows": rows, "ms": round((anyio.current_time() - t0) * 1000.0, 1)},
+            )
+        except Exception:
+            log.exception("rollup update failed")
+        await anyio.sleep(interval_s)
@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from typing import Callable
+from uuid import UUID
+
+from app.models import HttpTarget, IcmpTarget
+from app.poller.scheduler import ProbeJob, Scheduler
+from app.poller.sweep import IcmpSweep
+
+
+@dataclass(frozen=True)
+class ReconcileSummary:
+    added: int
+    removed: int
+    updated: int
+    unchanged: int
+
+
+class TargetReconciler:
+    """
+    Keeps the scheduler's jobs in line with a desired set of targets.
+
+    `apply()` diffs the desired targets against what is currently scheduled and only
+    touches the difference: new targets get a job, removed targets lose theirs and
+    changed targets have their job replaced (keeping backoff state). With ICMP sweeps
+    enabled, ICMP targets are added to or removed from their interval's sweep instead;
+    a new member sits out the sweep until its `delay_new_s` has passed.
+    """
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        *,
+        icmp_job: Callable[[IcmpTarget], ProbeJob],
+        http_job: Callable[[HttpTarget], ProbeJob],
+        sweep_job: Callable[[IcmpSweep], ProbeJob] | None = None,
+    ) -> None:
+        self._scheduler = scheduler
+        self._icmp_job = icmp_job
+        self._http_job = http_job
+        self._sweep_job = sweep_job
+        self._targets: dict[UUID, IcmpTarget | HttpTarget] = {}
+        self._sweeps: dict[int, IcmpSweep] = {}
+        # target id -> interval of the sweep it belongs to
+        self._sweep_of: dict[UUID, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def target_ids(self) -> set[UUID]:
+        return set(self._targets)
+
+    def apply(
+        self,
+        icmp_targets: list[IcmpTarget],
+        http_targets: list[HttpTarget],
+        *,
+        delay_new_s: Callable[[IcmpTarget | HttpTarget], float] | None = None,
+    ) -> ReconcileSummary:
+        desired: dict[UUID, IcmpTarget | HttpTarget] = {t.id: t for t in icmp_targets}
+        desired.update({t.id: t for t in http_targets})
+
+        removed = [tid for tid in self._targets if tid not in desired]
+        for tid in removed:
+            self._remove(tid)
+
+        added = updated = unchanged = 0
+        for tid, t in desired.items():
+            current = self._targets.get(tid)
+            if current == t:
+                unchanged += 1
+                continue
+
+            if current is None:
+                added += 1
+            else:
+                updated += 1
+                if type(current) is not type(t) or (
+                    tid in self._sweep_of and self._sweep_of[tid] != t.interval_seconds
+                ):
+                    # type or sweep class changed: drop the old job/membership first
+                    self._remove(tid)
+
+            delay = delay_new_s(t) if (current is None and delay_new_s is not None) else 0.0
+            self._add(t, delay)
+
+        return ReconcileSummary(
+            added=added, removed=len(removed), updated=updated, unchanged=unchanged
+        )
+
+    def _add(self, t: IcmpTarget | HttpTarget, delay_s: float) -> None:
+        self._targets[t.id] = t
+
+        if isinstance(t, HttpTarget):
+            self._scheduler.add(self._http_job(t), delay_s=delay_s)
+            return
+
+        if self._sweep_job is None:
+            self._scheduler.add(self._icmp_job(t), delay_s=delay_s)
+            return
+
+        sweep = self._sweeps.get(t.interval_seconds)
+        if sweep is None:
+            sweep = IcmpSweep(t.interval_seconds)
+            self._sweeps[t.interval_seconds] = sweep
+            sweep.add(t)
+            self._scheduler.add(self._sweep_job(sweep), delay_s=delay_s)
+        else:
+            sweep.add(t, delay_s=delay_s)
+        self._sweep_of[t.id] = t.interval_seconds
+
+    def _remove(self, tid: UUID) -> None:
+        self._targets.pop(tid, None)
+
+        interval = self._sweep_of.pop(tid, None)
+        if interval is None:
+            self._scheduler.remove(tid)
+            return
+
+        sweep = self._sweeps.get(interval)
+        if sweep is None:
+            return
+        sweep.remove(tid)
+        if len(sweep) == 0:
+            del self._sweeps[interval]
+            self._scheduler.remove(sweep.id)
@@ -0,0 +1,40 @@
+import os
+
+# (inode, mtime_ns, size); None when the file does not exist
+_Signature = tuple[int, int, int] | None
+
+
+def _signature(path: str) -> _Signature:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class TargetsFileWatcher:
+    """
+    Detects changes to the targets file by polling its stat() signature.
+
+    `changed()` is meant to be called periodically. It reports a change only once the
+    new signature has been seen on two consecutive calls, so a file that is still
+    being written is not picked up half-way. Replacing the file (e.g. an atomic
+    rename or a Kubernetes ConfigMap update) changes the inode and counts as a
+    change. A missing file is never reported; the running targets are kept until it
+    reappears.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._loaded = _signature(path)
+        self._seen = self._loaded
+
+    def changed(self) -> bool:
+        sig = _signature(self.path)
+        settled = sig == self._seen
+        self._seen = sig
+
+        if sig is None or sig == self._loaded or not settled:
+            return False
+        self._loaded = sig
+        return True
@@ -0,0 +1,385 @@
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from uuid import UUID
+
+import anyio
+
+from app.constants import MAX_BACKOFF_MULTIPLIER
+from app.models import ProbeResult
+from app.poller.admission import PRIORITIES, AdmissionControl
+
+log = logging.getLogger(__name__)
+
+ProbeFn = Callable[[], Awaitable[ProbeResult]]
+
+
+def compute_sleep_time(interval_seconds: int, backoff_multiplier: int) -> float:
+    base_sleep = interval_seconds * backoff_multiplier
+    jitter = random.uniform(-0.1 * base_sleep, 0.1 * base_sleep)
+    return max(0.1, base_sleep + jitter)
+
+
+def next_backoff(backoff: int, success: bool) -> int:
+    if success:
+        return 1
+    return min(backoff * 2, MAX_BACKOFF_MULTIPLIER)
+
+
+def phase_offset(target_id: UUID, interval_seconds: int) -> float:
+    """Seconds into each interval (counted from the Unix epoch) at which a target is due."""
+    h = int.from_bytes(hashlib.blake2b(target_id.bytes, digest_size=8).digest(), "big")
+    return h / 2**64 * interval_seconds
+
+
+@dataclass(frozen=True)
+class ProbeJob:
+    kind: str
+    target_id: UUID
+    target_name: str
+    interval_seconds: int
+    timeout_ms: int
+    probe: ProbeFn
+    # destination host for per-host rate limiting; None is not rate limited
+    host: str | None = None
+    priority: str = "normal"
+    # False for jobs that log and write their own per-target results (ICMP sweeps);
+    # their ProbeResult only reports whether the job itself ran.
+    record_result: bool = True
+
+
+@dataclass(frozen=True)
+class SchedulerStats:
+    jobs: int
+    in_flight: int
+    workers: int
+    dispatched: int
+    lag_avg_ms: float
+    lag_max_ms: float
+    # admission control; always zero without it
+    waiting: int = 0
+    deferred: int = 0
+    dropped: int = 0
+
+
+# Runs one probe for a job. Returns the result, or None if the probe raised
+# (in which case the job's backoff is left unchanged).
+ExecuteFn = Callable[[ProbeJob], Awaitable[ProbeResult | None]]
+
+
+@dataclass
+class _Entry:
+    job: ProbeJob
+    backoff: int
+    due: float
+    generation: int
+    in_flight: bool = False
+    deferred: bool = False
+    # came due while a run of a removed or replaced entry of its target was in flight
+    blocked: bool = False
+
+
+class Scheduler:
+    """
+    Owns the due time of every probe job and dispatches due jobs to a fixed pool
+    of worker tasks.
+
+    Due times live in a single min-heap, so memory per target is one entry rather
+    than one coroutine stack. Jobs run at a fixed rate: the next due time is derived
+    from the previous *due* time, not from when the probe finished, so probe duration
+    does not stretch the period. Backoff and jitter follow `compute_sleep_time` and
+    `next_backoff`. If a job overruns its period it is rescheduled immediately
+    instead of firing once per missed tick. A target never has two runs in flight,
+    even when it is removed and added again while a run is still going.
+
+    With `phase=True`, every job gets a fixed slot within its interval
+    (`phase_offset`, anchored to wall-clock time). New jobs first run at their next
+    slot and healthy jobs run exactly once per interval on it, so load is spread
+    evenly from the first tick and every target keeps the same slot across
+    restarts and pollers. Jobs backing off use the jittered `compute_sleep_time`
+    and return to their slot once they succeed again.
+
+    Scheduling lag (how late a job starts relative to its due time) is measured when
+    a worker picks the job up and reported via `stats()` and a periodic log line.
+
+    With an `AdmissionControl`, a due job only goes to a worker once admitted. Jobs
+    refused for lack of in-flight capacity wait in one queue per priority and are
+    admitted highest priority first as probes finish. Jobs refused by their host's
+    token bucket go back on the heap until a token is available. A run still
+    waiting when its next run would be due is dropped. Deferred and dropped runs
+    are counted in `stats()`.
+    """
+
+    def __init__(
+        self,
+        *,
+        execute: ExecuteFn,
+        workers: int,
+        stats_interval_s: float = 60.0,
+        admission: AdmissionControl | None = None,
+        phase: bool = False,
+    ) -> None:
+        self._execute = execute
+        self._workers = max(1, workers)
+        self._stats_interval_s = stats_interval_s
+        self._phase = phase
+        self._admission = admission
+        self._waiting: dict[str, deque[tuple[_Entry, int]]] = {p: deque() for p in PRIORITIES}
+
+        self._entries: dict[UUID, _Entry] = {}
+        # targets with a run in flight, including runs of removed or replaced entries
+        self._running: set[UUID] = set()
+        self._heap: list[tuple[float, int, UUID, int]] = []
+        self._seq = itertools.count()
+        self._generation = itertools.count()
+        self._wakeup = anyio.Event()
+        self._send, self._receive = anyio.create_memory_object_stream[tuple[_Entry, float]]()
+
+        self._in_flight = 0
+        self._dispatched = 0
+        self._lag_sum_ms = 0.0
+        self._lag_count = 0
+        self._lag_max_ms = 0.0
+        self._deferred = 0
+        self._dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, target_id: object) -> bool:
+        return target_id in self._entries
+
+    def job_ids(self) -> set[UUID]:
+        return set(self._entries)
+
+    def add(self, job: ProbeJob, *, delay_s: float = 0.0) -> None:
+        """
+        Schedule `job`, first due `delay_s` seconds from now (with phasing: at its first
+        slot after that).
+
+        If a job with the same target id is already scheduled it is replaced and
+        `delay_s` is ignored: its backoff state and next due time are kept, except
+        that a shorter interval brings the due time forward.
+        """
+        now = anyio.current_time()
+        backoff = 1
+        due = now + max(0.0, delay_s)
+        if self._phase:
+            due = self._next_slot(job, due)
+        existing = self._entries.get(job.target_id)
+        if existing is not None:
+            backoff = existing.backoff
+            # an in-flight run's due time is already spent; the replacement starts
+            # one interval later so the two never overlap
+            due = now + job.interval_seconds
+            if not existing.in_flight:
+                due = min(max(existing.due, now), due)
+
+        entry = _Entry(
+            job=job,
+            backoff=backoff,
+            due=due,
+            generation=next(self._generation),
+        )
+        self._entries[job.target_id] = entry
+        self._push(entry)
+
+    def remove(self, target_id: UUID) -> None:
+        # heap entries are dropped lazily when popped; in-flight runs are not rescheduled,
+        # and a job added again for the target waits for them to finish
+        self._entries.pop(target_id, None)
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(
+            jobs=len(self._entries),
+            in_flight=self._in_flight,
+            workers=self._workers,
+            dispatched=self._dispatched,
+            lag_avg_ms=self._lag_sum_ms / self._lag_count if self._lag_count else 0.0,
+            lag_max_ms=self._lag_max_ms,
+            waiting=sum(len(q) for q in self._waiting.values()),
+            deferred=self._deferred,
+            dropped=self._dropped,
+        )
+
+    async def run(self) -> None:
+        async with anyio.create_task_group() as tg:
+            for _ in range(self._workers):
+                tg.start_soon(self._worker)
+            tg.start_soon(self._stats_loop)
+            await self._dispatch_loop()
+
+    def _push(self, entry: _Entry, at: float | None = None) -> None:
+        when = entry.due if at is None else at
+        heapq.heappush(self._heap, (when, next(self._seq), entry.job.target_id, entry.generation))
+        self._wakeup.set()
+
+    def _reschedule(self, entry: _Entry, due: float) -> None:
+        job = entry.job
+        if self._phase and entry.backoff == 1:
+            # one interval later when on the slot already; otherwise the nearest slot
+            next_due = self._next_slot(job, due + job.interval_seconds / 2)
+        else:
+            next_due = due + compute_sleep_time(job.interval_seconds, entry.backoff)
+        entry.due = max(next_due, anyio.current_time())
+        self._push(entry)
+
+    def _next_slot(self, job: ProbeJob, not_before: float) -> float:
+        """The first time at or after `not_before` that falls on the job's slot."""
+        interval = job.interval_seconds
+        if interval <= 0:
+            return not_before
+        wall = not_before + (time.time() - anyio.current_time())
+        offset = phase_offset(job.target_id, interval)
+        k = math.ceil((wall - offset) / interval)
+        return not_before + (k * interval + offset - wall)
+
+    def _is_current(self, target_id: UUID, generation: int) -> _Entry | None:
+        entry = self._entries.get(target_id)
+        if entry is None or entry.generation != generation:
+            return None
+        return entry
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            if self._admission is not None:
+                await self._admit_waiting()
+
+            if not self._heap:
+                await self._wait_for_wakeup(None)
+                continue
+
+            due, _, target_id, generation = self._heap[0]
+            now = anyio.current_time()
+            if due > now:
+                await self._wait_for_wakeup(due - now)
+                continue
+
+            heapq.heappop(self._heap)
+            entry = self._is_current(target_id, generation)
+            if entry is None or entry.in_flight:
+                continue
+
+            await self._offer(entry)
+
+    async def _offer(self, entry: _Entry) -> None:
+        if entry.job.target_id in self._running:
+            # a run of the target's previous entry is still going; never probe a target
+            # twice at once. The worker finishing it puts this entry back on the heap.
+            entry.blocked = True
+            return
+
+        if self._admission is not None:
+            now = anyio.current_time()
+            job = entry.job
+            if now - entry.due > job.interval_seconds * entry.backoff:
+                # the next run is already due; skip to a full period from now so an
+                # overloaded poller sheds load instead of catching up
+                self._dropped += 1
+                entry.deferred = False
+                self._reschedule(entry, now)
+                return
+
+            verdict = self._admission.admit(job.priority, job.host, now)
+            if not verdict.admitted:
+                if not entry.deferred:
+                    entry.deferred = True
+                    self._deferred += 1
+                if verdict.retry_after is None:
+                    self._waiting[job.priority].append((entry, entry.generation))
+                else:
+                    self._push(entry, at=now + verdict.retry_after)
+                return
+
+        entry.deferred = False
+        entry.in_flight = True
+        self._running.add(entry.job.target_id)
+        # blocks while every worker is busy; the wait shows up as scheduling lag
+        await self._send.send((entry, entry.due))
+
+    async def _admit_waiting(self) -> None:
+        assert self._admission is not None
+        for priority in PRIORITIES:
+            queue = self._waiting[priority]
+            while queue and self._admission.has_capacity(priority):
+                entry, generation = queue.popleft()
+                if self._is_current(entry.job.target_id, generation) is not None:
+                    await self._offer(entry)
+            if queue:
+                # lower priorities wait until this one is drained
+                return
+
+    async def _wait_for_wakeup(self, timeout: float | None) -> None:
+        self._wakeup = anyio.Event()
+        if timeout is None:
+            await self._wakeup.wait()
+            return
+        with anyio.move_on_after(timeout):
+            await self._wakeup.wait()
+
+    async def _worker(self) -> None:
+        async for entry, due in self._receive:
+            started = anyio.current_time()
+            self._record_lag((started - due) * 1000.0)
+
+            self._in_flight += 1
+            try:
+                result = await self._execute(entry.job)
+            finally:
+                self._in_flight -= 1
+                entry.in_flight = False
+                self._running.discard(entry.job.target_id)
+                if self._admission is not None:
+                    self._admission.release()
+                    self._wakeup.set()
+
+            current = self._entries.get(entry.job.target_id)
+            if current is not entry:
+                # removed or replaced while running; a replacement that came due in the
+                # meantime runs now
+                if current is not None and current.blocked:
+                    current.blocked = False
+                    self._push(current)
+                continue
+
+            if result is not None:
+                entry.backoff = next_backoff(entry.backoff, result.success)
+
+            self._reschedule(entry, due)
+
+    def _record_lag(self, lag_ms: float) -> None:
+        lag_ms = max(0.0, lag_ms)
+        self._dispatched += 1
+        self._lag_sum_ms += lag_ms
+        self._lag_count += 1
+        self._lag_max_ms = max(self._lag_max_ms, lag_ms)
+
+    async def _stats_loop(self) -> None:
+        while True:
+            await anyio.sleep(self._stats_interval_s)
+            st = self.stats()
+            log.info(
+                "scheduler stats",
+                extra={
+                    "jobs": st.jobs,
+                    "in_flight": st.in_flight,
+                    "workers": st.workers,
+                    "dispatched": st.dispatched,
+                    "lag_avg_ms": round(st.lag_avg_ms, 1),
+                    "lag_max_ms": round(st.lag_max_ms, 1),
+                    "waiting": st.waiting,
+                    "deferred": st.deferred,
+                    "dropped": st.dropped,
+                },
+            )
+            # lag figures cover one reporting window
+            self._lag_sum_ms = 0.0
+            self._lag_count = 0
+            self._lag_max_ms = 0.0
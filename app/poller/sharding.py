@@ -0,0 +1,129 @@
+import bisect
+import hashlib
+import logging
+import time
+from uuid import UUID
+
+from anyio import to_thread as anyto_thread
+
+from app.repos.pollers import (
+    delete_expired_pollers,
+    delete_poller,
+    fetch_live_poller_ids,
+    heartbeat_poller,
+)
+
+log = logging.getLogger(__name__)
+
+
+def _hash64(data: bytes) -> int:
+    # stable across processes and machines, unlike hash()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring over poller ids.
+
+    Each member is placed at `vnodes` points on a 64-bit ring; a key belongs to the
+    first member point at or after the key's hash. When a member joins or leaves,
+    only the keys between its points and their predecessors move.
+    """
+
+    def __init__(self, members: list[UUID], *, vnodes: int = 64) -> None:
+        self.members = sorted(set(members))
+        points: list[tuple[int, UUID]] = []
+        for m in self.members:
+            for i in range(max(1, vnodes)):
+                points.append((_hash64(m.bytes + i.to_bytes(4, "big")), m))
+        points.sort()
+        self._hashes = [h for h, _ in points]
+        self._owners = [m for _, m in points]
+
+    def owner(self, key: UUID) -> UUID | None:
+        if not self._hashes:
+            return None
+        i = bisect.bisect_left(self._hashes, _hash64(key.bytes))
+        if i == len(self._hashes):
+            i = 0
+        return self._owners[i]
+
+
+class ShardCoordinator:
+    """
+    Tracks poller membership through heartbeats in the `pollers` table and decides
+    which targets this poller owns.
+
+    Every heartbeat renews this poller's lease and reloads the set of live pollers
+    (those with an unexpired lease). Targets are assigned with a `HashRing` over the
+    live poller ids, so when a poller joins or its lease runs out, ownership of its
+    share moves to the others on their next heartbeat.
+
+    If this poller cannot renew its lease for `lease_s` seconds it owns nothing,
+    since the others will already have taken its targets over.
+    """
+
+    def __init__(
+        self,
+        *,
+        poller_id: UUID,
+        name: str,
+        lease_s: int,
+        vnodes: int = 64,
+    ) -> None:
+        self.poller_id = poller_id
+        self.name = name
+        self._lease_s = lease_s
+        self._vnodes = vnodes
+        self._ring = HashRing([], vnodes=vnodes)
+        self._last_ok: float | None = None
+        self._fenced = True
+
+    @property
+    def members(self) -> list[UUID]:
+        return self._ring.members
+
+    def owns(self, target_id: UUID) -> bool:
+        if self._fenced:
+            return False
+        return self._ring.owner(target_id) == self.poller_id
+
+    async def heartbeat(self) -> bool:
+        """Renew the lease and refresh membership. Returns True if ownership changed."""
+        try:
+            await anyto_thread.run_sync(heartbeat_poller, self.poller_id, self.name, self._lease_s)
+            live = await anyto_thread.run_sync(fetch_live_poller_ids)
+            # rows of pollers that died long ago are only clutter
+            await anyto_thread.run_sync(delete_expired_pollers, self._lease_s * 10)
+        except Exception:
+            log.exception("poller heartbeat failed")
+            return self._check_fence()
+
+        self._last_ok = time.monotonic()
+        if self.poller_id not in live:
+            live.append(self.poller_id)
+
+        changed = self._fenced or sorted(live) != self._ring.members
+        self._fenced = False
+        if changed:
+            self._ring = HashRing(live, vnodes=self._vnodes)
+            log.info(
+                "poller membership changed",
+                extra={"poller_id": str(self.poller_id), "members": len(self._ring.members)},
+            )
+        return changed
+
+    def _check_fence(self) -> bool:
+        if self._fenced:
+            return False
+        if self._last_ok is not None and time.monotonic() - self._last_ok < self._lease_s:
+            return False
+        self._fenced = True
+        log.warning("poller lease lost; releasing all targets")
+        return True
+
+    async def leave(self) -> None:
+        try:
+            await anyto_thread.run_sync(delete_poller, self.poller_id)
+        except Exception:
+            log.exception("failed to deregister poller")
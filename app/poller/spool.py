@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+log = logging.getLogger(__name__)
+
+_SUFFIX = ".ndjson"
+
+
+@dataclass(frozen=True)
+class SpoolStats:
+    segments: int
+    rows: int
+    bytes: int
+    oldest_age_s: float
+    rows_dropped: int
+
+
+@dataclass
+class _Segment:
+    path: Path
+    created_ns: int
+    rows: int
+    bytes: int
+
+
+def _encode(row: dict) -> str:
+    return json.dumps(
+        {
+            "k": str(row["result_key"]),
+            "t": str(row["target_id"]),
+            "ts": row["ts"].isoformat(),
+            "s": row["success"],
+            "l": row["latency_ms"],
+            "c": row["status_code"],
+            "e": row["error"],
+        },
+        separators=(",", ":"),
+    )
+
+
+def _decode(line: str) -> dict:
+    d = json.loads(line)
+    return {
+        "result_key": UUID(d["k"]),
+        "target_id": UUID(d["t"]),
+        "ts": datetime.fromisoformat(d["ts"]),
+        "success": d["s"],
+        "latency_ms": d["l"],
+        "status_code": d["c"],
+        "error": d["e"],
+    }
+
+
+class ResultSpool:
+    """
+    Append-only on-disk spool for probe result rows that could not be written.
+
+    Rows (the dicts passed to `insert_probe_results`, each with a `result_key`) are
+    appended as JSON lines to the newest segment file and fsync'ed. Segments roll
+    over at `segment_bytes`; when the spool exceeds `max_bytes` the oldest segments
+    are deleted and their rows counted as dropped.
+
+    Replay takes the oldest segment (`oldest()`), and removes it only after its rows
+    were written (`discard()`), or hands it back after a failed write (`release()`).
+    Until then the segment is never dropped to make room; the next oldest goes
+    instead. A crash in between replays the segment again, which the result keys
+    make harmless. Segments left behind by a previous run are picked
+    up on start.
+
+    Methods do blocking file I/O; call them from a worker thread.
+    """
+
+    def __init__(self, directory: str, *, max_bytes: int, segment_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max(1, max_bytes)
+        self._segment_bytes = max(1, segment_bytes)
+        self._lock = threading.Lock()
+        self._segments: list[_Segment] = []
+        self._current: _Segment | None = None
+        self._rows_dropped = 0
+        # the segment handed out by `oldest()` and not yet discarded or released
+        self._replaying: Path | None = None
+
+        for path in sorted(self.directory.glob(f"seg-*{_SUFFIX}")):
+            try:
+                created_ns = int(path.name[4:].split("-", 1)[0])
+                with open(path, "rb") as f:
+                    rows = sum(1 for _ in f)
+                size = path.stat().st_size
+            except (ValueError, OSError):
+                log.warning("ignoring unreadable spool file", extra={"path": str(path)})
+                continue
+            self._segments.append(_Segment(path, created_ns, rows, size))
+
+        if self._segments:
+            log.info(
+                "found spooled probe results",
+                extra={"segments": len(self._segments), "rows": self._row_count()},
+            )
+
+    def append(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        data = "".join(_encode(r) + "\n" for r in rows).encode("utf-8")
+
+        with self._lock:
+            seg = self._current
+            if seg is None or seg.bytes >= self._segment_bytes:
+                seg = self._new_segment()
+            with open(seg.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            seg.rows += len(rows)
+            seg.bytes += len(data)
+            self._enforce_limit()
+
+    def oldest(self) -> tuple[Path, list[dict]] | None:
+        """The oldest segment and its rows, or None if the spool is empty."""
+        with self._lock:
+            if not self._segments:
+                return None
+            seg = self._segments[0]
+            if seg is self._current:
+                # stop appending to it so it can be replayed and removed
+                self._current = None
+            path = seg.path
+            self._replaying = path
+
+        rows: list[dict] = []
+        skipped = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(_decode(line))
+                except (ValueError, KeyError, TypeError):
+                    # a torn write at the end of a segment after a crash
+                    skipped += 1
+        if skipped:
+            log.warning("skipped damaged spool lines", extra={"path": str(path), "lines": skipped})
+        return path, rows
+
+    def discard(self, path: Path) -> None:
+        with self._lock:
+            self._segments = [s for s in self._segments if s.path != path]
+            if self._replaying == path:
+                self._replaying = None
+        path.unlink(missing_ok=True)
+
+    def release(self, path: Path) -> None:
+        """Give back a segment from `oldest()` that could not be replayed."""
+        with self._lock:
+            if self._replaying == path:
+                self._replaying = None
+
+    def stats(self) -> SpoolStats:
+        with self._lock:
+            oldest = self._segments[0].created_ns if self._segments else None
+            return SpoolStats(
+                segments=len(self._segments),
+                rows=self._row_count(),
+                bytes=sum(s.bytes for s in self._segments),
+                oldest_age_s=(time.time_ns() - oldest) / 1e9 if oldest is not None else 0.0,
+                rows_dropped=self._rows_dropped,
+            )
+
+    def _row_count(self) -> int:
+        return sum(s.rows for s in self._segments)
+
+    def _new_segment(self) -> _Segment:
+        created_ns = time.time_ns()
+        path = self.directory / f"seg-{created_ns:020d}-{os.getpid()}{_SUFFIX}"
+        seg = _Segment(path, created_ns, 0, 0)
+        self._segments.append(seg)
+        self._current = seg
+        return seg
+
+    def _enforce_limit(self) -> None:
+        total = sum(s.bytes for s in self._segments)
+        i = 0
+        # the newest segment (being appended to) is always kept
+        while total > self._max_bytes and i < len(self._segments) - 1:
+            if self._segments[i].path == self._replaying:
+                i += 1
+                continue
+            seg = self._segments.pop(i)
+            total -= seg.bytes
+            self._rows_dropped += seg.rows
+            seg.path.unlink(missing_ok=True)
+            log.warning(
+                "spool full; dropped oldest segment",
+                extra={"path": str(seg.path), "rows": seg.rows},
+            )
@@ -0,0 +1,99 @@
+import uuid
+from dataclasses import dataclass
+from uuid import UUID
+
+import anyio
+
+from app.models import IcmpTarget, ProbeResult
+from app.poller.icmp import icmp_ping_many
+from app.poller.scheduler import next_backoff
+
+# Namespace for the synthetic job ids of sweeps (one per interval class).
+SWEEP_NAMESPACE = uuid.UUID("5b7f6a53-3c0e-4c59-9a43-0f1a4f3c2d10")
+
+
+def sweep_id(interval_seconds: int) -> UUID:
+    return uuid.uuid5(SWEEP_NAMESPACE, f"icmp-sweep:{interval_seconds}")
+
+
+@dataclass
+class _Member:
+    target: IcmpTarget
+    backoff: int = 1
+    skip: int = 0
+    # anyio clock time before which the member sits out (handover delay)
+    not_before: float = 0.0
+
+
+class IcmpSweep:
+    """
+    All ICMP targets sharing one `interval_seconds`, probed together once per period.
+
+    Backoff is tracked per target: a target with backoff N takes part in every
+    N-th sweep, which matches the single-target rule of waiting interval * N.
+    New members can be held out of the sweep for a while (`add(..., delay_s=...)`),
+    like the first-run delay of a single-target job.
+    """
+
+    def __init__(self, interval_seconds: int) -> None:
+        self.interval_seconds = interval_seconds
+        self.id = sweep_id(interval_seconds)
+        self._members: dict[UUID, _Member] = {}
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, target_id: object) -> bool:
+        return target_id in self._members
+
+    @property
+    def timeout_ms(self) -> int:
+        return max((m.target.timeout_ms for m in self._members.values()), default=0)
+
+    def add(self, target: IcmpTarget, *, delay_s: float = 0.0) -> None:
+        # replacing a member keeps its backoff state; `delay_s` only applies to new ones
+        existing = self._members.get(target.id)
+        if existing is not None:
+            existing.target = target
+            return
+        member = _Member(target=target)
+        if delay_s > 0:
+            member.not_before = anyio.current_time() + delay_s
+        self._members[target.id] = member
+
+    def remove(self, target_id: UUID) -> None:
+        self._members.pop(target_id, None)
+
+    async def run_once(self) -> list[tuple[IcmpTarget, ProbeResult]]:
+        """Probe every member that is not backing off; returns per-target results."""
+        due: list[_Member] = []
+        now = anyio.current_time()
+        for m in self._members.values():
+            if m.not_before > now:
+                continue
+            if m.skip > 0:
+                m.skip -= 1
+            else:
+                due.append(m)
+
+        if not due:
+            return []
+
+        results = await icmp_ping_many([(m.target.host, m.target.timeout_ms) for m in due])
+
+        out: list[tuple[IcmpTarget, ProbeResult]] = []
+        for m, (success, latency_ms, error) in zip(due, results):
+            m.backoff = next_backoff(m.backoff, success)
+            m.skip = m.backoff - 1
+            out.append(
+                (
+                    m.target,
+                    ProbeResult(
+                        success=success,
+                        latency_ms=latency_ms,
+                        status_code=None,
+                        error=error,
+                    ),
+                )
+            )
+        return out
@@ -0,0 +1,304 @@
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import UUID
+
+import anyio
+from anyio import to_thread as anyto_thread
+
+from app.models import ProbeResult
+from app.poller.spool import ResultSpool
+from app.repos.results import insert_probe_results
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PendingResult:
+    target_id: UUID
+    ts: datetime
+    result: ProbeResult
+    # idempotency key, so a row replayed from the spool is stored at most once
+    key: UUID = field(default_factory=uuid.uuid4)
+
+
+@dataclass(frozen=True)
+class WriterStats:
+    queue_depth: int
+    queue_capacity: int
+    flushes: int
+    rows_written: int
+    rows_failed: int
+    last_flush_rows: int
+    last_flush_ms: float
+    max_flush_ms: float
+    rows_spooled: int = 0
+    rows_replayed: int = 0
+    replay_rows_per_s: float = 0.0
+    # True while batches go to the spool instead of the database
+    spooling: bool = False
+
+    @property
+    def avg_rows_per_flush(self) -> float:
+        return self.rows_written / self.flushes if self.flushes else 0.0
+
+
+class ResultWriter:
+    """
+    Buffers probe results in a bounded in-memory queue and writes them in bulk.
+
+    Probe loops call `put()`; a single `run()` task drains the queue and flushes a
+    batch whenever it reaches `batch_size` rows or `flush_interval_s` has passed
+    since the first row of the batch arrived. When the queue is full, `put()`
+    waits, which applies backpressure to the probe loops instead of growing memory.
+
+    With a `ResultSpool`, a batch that fails to write goes to the spool instead of
+    being dropped, and so do all following batches (without touching the database)
+    while the spool is non-empty. A flush slower than `slow_flush_ms` switches to
+    the spool too. Every `replay_interval_s` a replay task writes spooled segments
+    back in bulk; once the spool is empty, batches go to the database again.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval_s: float,
+        stats_interval_s: float = 60.0,
+        spool: ResultSpool | None = None,
+        slow_flush_ms: float = 5000.0,
+        replay_interval_s: float = 5.0,
+        replay_batch_size: int = 5000,
+    ) -> None:
+        self._send, self._receive = anyio.create_memory_object_stream[PendingResult](
+            max_buffer_size=max(1, max_queue)
+        )
+        self._max_queue = max(1, max_queue)
+        self._batch_size = max(1, batch_size)
+        self._flush_interval_s = max(0.0, flush_interval_s)
+        self._stats_interval_s = stats_interval_s
+        self._spool = spool
+        self._slow_flush_ms = slow_flush_ms
+        self._replay_interval_s = replay_interval_s
+        self._replay_batch_size = max(1, replay_batch_size)
+        self._spooling = False
+
+        self._flushes = 0
+        self._rows_written = 0
+        self._rows_failed = 0
+        self._last_flush_rows = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._rows_spooled = 0
+        self._rows_replayed = 0
+        self._replay_rows_per_s = 0.0
+        self._last_stats_log = time.monotonic()
+
+    async def put(self, *, target_id: UUID, ts: datetime, result: ProbeResult) -> None:
+        await self._send.send(PendingResult(target_id=target_id, ts=ts, result=result))
+
+    async def put_many(self, items: list[PendingResult]) -> None:
+        for item in items:
+            await self._send.send(item)
+
+    def stats(self) -> WriterStats:
+        return WriterStats(
+            queue_depth=self._receive.statistics().current_buffer_used,
+            queue_capacity=self._max_queue,
+            flushes=self._flushes,
+            rows_written=self._rows_written,
+            rows_failed=self._rows_failed,
+            last_flush_rows=self._last_flush_rows,
+            last_flush_ms=self._last_flush_ms,
+            max_flush_ms=self._max_flush_ms,
+            rows_spooled=self._rows_spooled,
+            rows_replayed=self._rows_replayed,
+            replay_rows_per_s=self._replay_rows_per_s,
+            spooling=self._spooling,
+        )
+
+    async def run(self) -> None:
+        if self._spool is None:
+            await self._run()
+            return
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(self._replay_loop)
+            await self._run()
+
+    async def _run(self) -> None:
+        batch: list[PendingResult] = []
+        try:
+            while True:
+                await self._fill(batch)
+                # hand the batch off before flushing so a cancellation mid-flush
+                # does not cause the shutdown path below to write it twice
+                pending, batch = batch, []
+                await self._flush(pending)
+                self._maybe_log_stats()
+        finally:
+            # flush whatever is still buffered so a clean shutdown does not drop results
+            with anyio.CancelScope(shield=True):
+                self._drain_nowait(batch)
+                if batch:
+                    await self._flush(batch)
+
+    async def _fill(self, batch: list[PendingResult]) -> None:
+        if not batch:
+            batch.append(await self._receive.receive())
+
+        deadline = anyio.current_time() + self._flush_interval_s
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._receive.receive_nowait())
+                continue
+            except anyio.WouldBlock:
+                pass
+
+            remaining = deadline - anyio.current_time()
+            if remaining <= 0:
+                return
+            with anyio.move_on_after(remaining) as scope:
+                batch.append(await self._receive.receive())
+            if scope.cancelled_caught:
+                return
+
+    def _drain_nowait(self, batch: list[PendingResult]) -> None:
+        while True:
+            try:
+                batch.append(self._receive.receive_nowait())
+            except (anyio.WouldBlock, anyio.EndOfStream):
+                return
+
+    async def _flush(self, batch: list[PendingResult]) -> None:
+        rows = [
+            {
+                "target_id": p.target_id,
+                "ts": p.ts,
+                "success": p.result.success,
+                "latency_ms": p.result.latency_ms,
+                "status_code": p.result.status_code,
+                "error": p.result.error,
+                "result_key": p.key,
+            }
+            for p in batch
+        ]
+
+        if self._spooling:
+            await self._to_spool(rows)
+            return
+
+        t0 = time.perf_counter()
+        try:
+            await anyto_thread.run_sync(insert_probe_results, rows)
+        except Exception:
+            if self._spool is not None:
+                log.warning(
+                    "failed to write probe results; spooling to disk",
+                    exc_info=True,
+                    extra={"rows": len(rows)},
+                )
+                self._spooling = True
+                await self._to_spool(rows)
+                return
+            self._rows_failed += len(rows)
+            log.exception("failed to write probe results", extra={"rows": len(rows)})
+            return
+
+        ms = (time.perf_counter() - t0) * 1000.0
+        if self._spool is not None and ms > self._slow_flush_ms:
+            log.warning("slow probe result flush; spooling to disk", extra={"ms": round(ms, 1)})
+            self._spooling = True
+        self._flushes += 1
+        self._rows_written += len(rows)
+        self._last_flush_rows = len(rows)
+        self._last_flush_ms = ms
+        self._max_flush_ms = max(self._max_flush_ms, ms)
+        log.debug("flushed probe results", extra={"rows": len(rows), "ms": round(ms, 1)})
+
+    async def _to_spool(self, rows: list[dict]) -> None:
+        assert self._spool is not None
+        try:
+            await anyto_thread.run_sync(self._spool.append, rows)
+        except Exception:
+            self._rows_failed += len(rows)
+            log.exception("failed to spool probe results", extra={"rows": len(rows)})
+            return
+        self._rows_spooled += len(rows)
+
+    async def _replay_loop(self) -> None:
+        while True:
+            await anyio.sleep(self._replay_interval_s)
+            await self._replay()
+
+    async def _replay(self) -> None:
+        """Write spooled segments back, oldest first, until the spool is empty or a write fails."""
+        assert self._spool is not None
+        t0 = time.perf_counter()
+        replayed = 0
+        while True:
+            seg = await anyto_thread.run_sync(self._spool.oldest)
+            if seg is None:
+                break
+            path, rows = seg
+            try:
+                for i in range(0, len(rows), self._replay_batch_size):
+                    chunk = rows[i : i + self._replay_batch_size]
+                    await anyto_thread.run_sync(insert_probe_results, chunk)
+                    replayed += len(chunk)
+            except Exception:
+                log.warning("spool replay failed; will retry", exc_info=True)
+                self._rows_replayed += replayed
+                await anyto_thread.run_sync(self._spool.release, path)
+                return
+            await anyto_thread.run_sync(self._spool.discard, path)
+
+        if replayed:
+            self._rows_replayed += replayed
+            self._replay_rows_per_s = replayed / max(time.perf_counter() - t0, 1e-6)
+            log.info(
+                "replayed spooled probe results",
+                extra={"rows": replayed, "rows_per_s": round(self._replay_rows_per_s)},
+            )
+        if self._spooling:
+            log.info("spool drained; writing probe results to the database again")
+            self._spooling = False
+
+    def _maybe_log_stats(self) -> None:
+        now = time.monotonic()
+        if now - self._last_stats_log < self._stats_interval_s:
+            return
+        self._last_stats_log = now
+
+        st = self.stats()
+        log.info(
+            "result writer stats",
+            extra={
+                "queue_depth": st.queue_depth,
+                "queue_capacity": st.queue_capacity,
+                "flushes": st.flushes,
+                "rows_written": st.rows_written,
+                "rows_failed": st.rows_failed,
+                "avg_rows_per_flush": round(st.avg_rows_per_flush, 1),
+                "last_flush_ms": round(st.last_flush_ms, 1),
+                "max_flush_ms": round(st.max_flush_ms, 1),
+                "rows_spooled": st.rows_spooled,
+                "rows_replayed": st.rows_replayed,
+                "spooling": st.spooling,
+            },
+        )
+        if self._spool is not None:
+            sp = self._spool.stats()
+            log.info(
+                "result spool stats",
+                extra={
+                    "segments": sp.segments,
+                    "rows": sp.rows,
+                    "bytes": sp.bytes,
+                    "oldest_age_s": round(sp.oldest_age_s, 1),
+                    "rows_dropped": sp.rows_dropped,
+                    "replay_rows_per_s": round(st.replay_rows_per_s),
+                },
+            )
@@ -0,0 +1,165 @@
+"""
+Routing of read-only sessions to streaming replicas.
+
+Each replica is checked at most every `check_interval_s` for reachability and
+replication lag. Read-only sessions go to the usable replicas in turn; when none
+is usable (down, or lagging more than `max_lag_s`) they fall back to the primary.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+log = logging.getLogger(__name__)
+
+# Inputs of `_lag_seconds`. pg_stat_wal_receiver shows the status only to roles with
+# pg_read_all_stats (e.g. pg_monitor); without it a replica counts as not streaming.
+_LAG_SQL = text("""
+    SELECT
+        pg_is_in_recovery() AS in_recovery,
+        pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AS replayed_all,
+        EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') AS streaming,
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) AS replay_age_s
+""")
+
+# keeps a dead replica from stalling the request that checks it
+_CONNECT_TIMEOUT_S = 2
+
+
+def _lag_seconds(row: Any) -> float | None:
+    """
+    Seconds a server is behind the primary, from a `_LAG_SQL` row; None if unknown.
+
+    A server that is not in recovery is not behind. Nor is one that is streaming from
+    the primary and has replayed everything it received. Without a streaming receiver,
+    "replayed everything" only covers what arrived before the connection was lost, so
+    use the age of the last replayed transaction instead.
+    """
+    if not row.in_recovery:
+        return 0.0
+    if row.streaming and row.replayed_all:
+        return 0.0
+    if row.replay_age_s is None:
+        return None
+    return float(row.replay_age_s)
+
+
+@dataclass(eq=False)
+class Replica:
+    name: str
+    engine: Engine
+    async_engine: AsyncEngine
+    session_factory: sessionmaker
+    async_session_factory: async_sessionmaker
+    usable: bool = False
+    lag_s: float | None = None
+    checked_at: float = field(default=-math.inf)
+
+
+def _make_replica(url: str) -> Replica:
+    connect_args = {"connect_timeout": _CONNECT_TIMEOUT_S}
+    engine = create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+    async_engine = create_async_engine(url, pool_pre_ping=True, connect_args=connect_args)
+    return Replica(
+        # never log the password
+        name=make_url(url).render_as_string(hide_password=True),
+        engine=engine,
+        async_engine=async_engine,
+        session_factory=sessionmaker(
+            bind=engine, autoflush=False, autocommit=False, expire_on_commit=False
+        ),
+        async_session_factory=async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        ),
+    )
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        replicas: list[Replica],
+        *,
+        max_lag_s: float,
+        check_interval_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.replicas = replicas
+        self._max_lag_s = max_lag_s
+        self._check_interval_s = check_interval_s
+        self._clock = clock
+        self._rr = itertools.count()
+
+    @classmethod
+    def from_urls(cls, urls: list[str], *, max_lag_s: float, check_interval_s: float):
+        return cls(
+            [_make_replica(u) for u in urls],
+            max_lag_s=max_lag_s,
+            check_interval_s=check_interval_s,
+        )
+
+    def pick(self) -> Replica | None:
+        """A usable replica for a sync session, or None to use the primary."""
+        for r in self._due():
+            try:
+                with r.engine.connect() as conn:
+                    lag = _lag_seconds(conn.execute(_LAG_SQL).one())
+            except SQLAlchemyError:
+                self.record(r, None)
+            else:
+                self.record(r, lag)
+        return self._choose()
+
+    async def pick_async(self) -> Replica | None:
+        """A usable replica for an async session, or None to use the primary."""
+        for r in self._due():
+            try:
+                async with r.async_engine.connect() as conn:
+                    lag = _lag_seconds((await conn.execute(_LAG_SQL)).one())
+            except SQLAlchemyError:
+                self.record(r, None)
+            else:
+                self.record(r, lag)
+        return self._choose()
+
+    def record(self, replica: Replica, lag_s: float | None) -> None:
+        """Store a check result; `None` means the replica could not be reached."""
+        lag = float(lag_s) if lag_s is not None else None
+        usable = lag is not None and lag <= self._max_lag_s
+        if usable != replica.usable:
+            if usable:
+                log.info("replica usable", extra={"replica": replica.name, "lag_s": lag})
+            else:
+                log.warning("replica unusable", extra={"replica": replica.name, "lag_s": lag})
+        replica.usable = usable
+        replica.lag_s = lag
+        replica.checked_at = self._clock()
+
+    def mark_failed(self, replica: Replica) -> None:
+        """Take a replica out of rotation until its next check, after a query failed on it."""
+        self.record(replica, None)
+
+    def _due(self) -> list[Replica]:
+        now = self._clock()
+        due = [r for r in self.replicas if now - r.checked_at >= self._check_interval_s]
+        for r in due:
+            # concurrent callers skip replicas that are already being checked
+            r.checked_at = now
+        return due
+
+    def _choose(self) -> Replica | None:
+        usable = [r for r in self.replicas if r.usable]
+        if not usable:
+            return None
+        return usable[next(self._rr) % len(usable)]
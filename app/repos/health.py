@@ -3,11 +3,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
 
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import session_scope
-from app.repos.util import timed_execute
+from app.db import async_session_scope
+from app.repos.util import timed_execute_async
 
 
 @dataclass(frozen=True)
@@ -15,42 +15,63 @@ class HealthDbStats:
     enabled_targets: int
     max_interval_seconds: int
     last_result_ts: datetime | None
+    # pollers holding a lease in the `pollers` table (sharded mode)
+    live_pollers: int
 
 
-def db_ok(s: Session | None = None) -> bool:
-    try:
-        with session_scope(existing=s) as db:
-            db.execute(text("SELECT 1"))
-        return True
-    except Exception:
-        return False
-
-
-def fetch_health_db_stats(s: Session | None = None) -> HealthDbStats:
-    with session_scope(existing=s) as session:
-        enabled_targets = timed_execute(
-            session,
-            text("SELECT COUNT(*) FROM targets WHERE enabled = true"),
-            None,
-            label="fetch_enabled_targets_count",
-        ).scalar_one()
-
-        max_interval_seconds = timed_execute(
-            session,
-            text("SELECT COALESCE(MAX(interval_seconds), 0) FROM targets WHERE enabled = true"),
-            None,
-            label="fetch_max_interval_seconds",
-        ).scalar_one()
-
-        last_ts = timed_execute(
-            session,
-            text("SELECT MAX(ts) FROM probe_results"),
-            None,
-            label="fetch_last_result_ts",
-        ).scalar_one()
+_HEALTH_DB_STATS_SQL = text("""
+    SELECT
+        COUNT(*) FILTER (WHERE t.enabled) AS enabled_targets,
+        COALESCE(MAX(t.interval_seconds) FILTER (WHERE t.enabled), 0)
+            AS max_interval_seconds,
+        MAX(l.ts) AS last_result_ts,
+        (SELECT COUNT(*) FROM pollers WHERE lease_expires_at > NOW()) AS live_pollers
+    FROM targets t
+    LEFT JOIN target_latest l ON l.target_id = t.id
+""")
 
+_TARGET_FRESHNESS_SQL = text("""
+    SELECT
+        t.id AS target_id,
+        t.name AS target_name,
+        t.interval_seconds,
+        l.ts AS last_result_ts
+    FROM targets t
+    LEFT JOIN target_latest l ON l.target_id = t.id
+    WHERE t.enabled = true
+    ORDER BY t.name
+""")
+
+
+def _health_db_stats(row: Row) -> HealthDbStats:
     return HealthDbStats(
-        enabled_targets=int(enabled_targets),
-        max_interval_seconds=int(max_interval_seconds),
-        last_result_ts=last_ts,
+        enabled_targets=int(row.enabled_targets),
+        max_interval_seconds=int(row.max_interval_seconds),
+        last_result_ts=row.last_result_ts,
+        live_pollers=int(row.live_pollers),
     )
+
+
+async def fetch_health_db_stats_async(s: AsyncSession | None = None) -> HealthDbStats:
+    """
+    Everything /health needs, in one statement.
+
+    The newest result comes from target_latest (one row per target, moved forward by
+    every result write) rather than a scan of probe_results.
+    """
+    async with async_session_scope(existing=s) as session:
+        res = await timed_execute_async(
+            session, _HEALTH_DB_STATS_SQL, None, label="fetch_health_db_stats"
+        )
+
+    return _health_db_stats(res.one())
+
+
+async def fetch_target_freshness_async(s: AsyncSession | None = None) -> list[dict]:
+    """Interval and newest result time of every enabled target."""
+    async with async_session_scope(existing=s) as session:
+        res = await timed_execute_async(
+            session, _TARGET_FRESHNESS_SQL, None, label="fetch_target_freshness"
+        )
+
+    return [dict(r) for r in res.mappings().all()]
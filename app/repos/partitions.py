@@ -0,0 +1,237 @@
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+
+from psycopg.errors import LockNotAvailable
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db import session_scope
+from app.repos.util import timed_execute
+
+log = logging.getLogger(__name__)
+
+# How long dropping an expired partition may wait for its lock on probe_results.
+DROP_LOCK_TIMEOUT_MS = 1000
+
+# Daily partitions of probe_results, covering [day, day + 1) in UTC.
+_PARTITION_RE = re.compile(r"^probe_results_p(\d{8})$")
+
+
+def partition_name(day: date) -> str:
+    return f"probe_results_p{day:%Y%m%d}"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _bound(day: date) -> str:
+    # a literal rather than a bind parameter: DDL cannot take parameters
+    return f"'{day:%Y-%m-%d} UTC'"
+
+
+def _lock(session: Session) -> None:
+    # several pollers may run maintenance at the same time
+    timed_execute(
+        session,
+        text("SELECT pg_advisory_xact_lock(hashtext('pingu:probe_result_partitions'))"),
+        None,
+        label="lock_probe_result_partitions",
+    )
+
+
+def fetch_probe_result_partitions(s: Session | None = None) -> list[str]:
+    with session_scope(existing=s) as session:
+        rows = timed_execute(
+            session,
+            text("""
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'probe_results'::regclass
+                ORDER BY c.relname
+            """),
+            None,
+            label="fetch_probe_result_partitions",
+        ).all()
+
+    return [r.relname for r in rows]
+
+
+def ensure_probe_result_partitions(
+    days_ahead: int,
+    *,
+    today: date | None = None,
+    s: Session | None = None,
+) -> list[str]:
+    """Create the daily partitions for today and the next `days_ahead` days. Returns new ones."""
+    today = today or datetime.now(timezone.utc).date()
+
+    created: list[str] = []
+    with session_scope(existing=s) as session:
+        _lock(session)
+        existing = set(fetch_probe_result_partitions(s=session))
+
+        for i in range(max(0, days_ahead) + 1):
+            day = today + timedelta(days=i)
+            name = partition_name(day)
+            if name in existing:
+                continue
+            _create_partition(session, day)
+            created.append(name)
+
+    return created
+
+
+def _create_partition(session: Session, day: date) -> None:
+    # names and bounds come from dates, never from user input
+    name = partition_name(day)
+    lo, hi = _bound(day), _bound(day + timedelta(days=1))
+    params = {"lo": _day_start(day), "hi": _day_start(day + timedelta(days=1))}
+
+    stray = timed_execute(
+        session,
+        text("SELECT 1 FROM probe_results_default WHERE ts >= :lo AND ts < :hi LIMIT 1"),
+        params,
+        label="check_default_partition",
+    ).first()
+
+    if stray is None:
+        timed_execute(
+            session,
+            text(f"""
+                CREATE TABLE {name} PARTITION OF probe_results
+                FOR VALUES FROM ({lo}) TO ({hi})
+            """),
+            None,
+            label="create_probe_result_partition",
+        )
+        return
+
+    # Rows for this day already landed in the default partition, which would make
+    # CREATE ... PARTITION OF fail: move them into a new table and attach that.
+    timed_execute(
+        session,
+        text(f"CREATE TABLE {name} (LIKE probe_results INCLUDING DEFAULTS)"),
+        None,
+        label="create_probe_result_partition",
+    )
+    timed_execute(
+        session,
+        text(f"""
+            WITH moved AS (
+                DELETE FROM probe_results_default
+                WHERE ts >= :lo AND ts < :hi
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """),
+        params,
+        label="move_default_partition_rows",
+    )
+    timed_execute(
+        session,
+        text(f"ALTER TABLE probe_results ATTACH PARTITION {name} FOR VALUES FROM ({lo}) TO ({hi})"),
+        None,
+        label="attach_probe_result_partition",
+    )
+
+
+def drop_expired_probe_result_partitions(
+    retention_days: int,
+    *,
+    today: date | None = None,
+    s: Session | None = None,
+) -> list[str]:
+    """
+    Enforce retention by dropping whole daily partitions.
+
+    A partition is dropped once all of its rows are older than `retention_days`.
+    Expired rows that ended up in the default partition are deleted. Returns the
+    dropped partition names.
+
+    Dropping a partition locks all of probe_results (DETACH ... CONCURRENTLY is not
+    allowed next to a default partition), so each drop commits on its own and gives
+    up after `DROP_LOCK_TIMEOUT_MS` rather than queue every reader and writer behind
+    it; a partition that could not be dropped is retried on the next run. Removing
+    results bumps the `results` change counter, so cached responses revalidate.
+    """
+    if retention_days <= 0:
+        return []
+
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = today - timedelta(days=retention_days)
+
+    expired: list[str] = []
+    for name in fetch_probe_result_partitions(s=s):
+        m = _PARTITION_RE.match(name)
+        if m is None:
+            continue
+        day = datetime.strptime(m.group(1), "%Y%m%d").date()
+        if day + timedelta(days=1) <= cutoff:
+            expired.append(name)
+
+    dropped: list[str] = []
+    for name in expired:
+        with session_scope(existing=s) as session:
+            _lock(session)
+            if _drop_partition(session, name):
+                _bump_results_version(session)
+                dropped.append(name)
+
+    with session_scope(existing=s) as session:
+        _lock(session)
+        deleted = timed_execute(
+            session,
+            text("DELETE FROM probe_results_default WHERE ts < :cutoff"),
+            {"cutoff": _day_start(cutoff)},
+            label="delete_expired_default_results",
+        ).rowcount
+        if deleted:
+            _bump_results_version(session)
+
+    return dropped
+
+
+def _drop_partition(session: Session, name: str) -> bool:
+    try:
+        # a savepoint, so a lock timeout does not abort the caller's transaction
+        with session.begin_nested():
+            timed_execute(
+                session,
+                text(f"SET LOCAL lock_timeout = {DROP_LOCK_TIMEOUT_MS}"),
+                None,
+                label="set_drop_lock_timeout",
+            )
+            timed_execute(
+                session,
+                text(f"DROP TABLE IF EXISTS {name}"),
+                None,
+                label="drop_probe_result_partition",
+            )
+            timed_execute(
+                session,
+                text("SET LOCAL lock_timeout = DEFAULT"),
+                None,
+                label="reset_drop_lock_timeout",
+            )
+    except OperationalError as e:
+        if not isinstance(e.orig, LockNotAvailable):
+            raise
+        log.warning("probe_results is busy; partition drop postponed", extra={"partition": name})
+        return False
+    return True
+
+
+def _bump_results_version(session: Session) -> None:
+    timed_execute(
+        session,
+        text("""
+            INSERT INTO change_counters AS c (name, value) VALUES ('results', 1)
+            ON CONFLICT (name) DO UPDATE SET value = c.value + 1
+        """),
+        None,
+        label="bump_results_version",
+    )
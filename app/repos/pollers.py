@@ -0,0 +1,72 @@
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import session_scope
+from app.repos.util import timed_execute
+
+
+def heartbeat_poller(
+    poller_id: uuid.UUID,
+    name: str,
+    lease_seconds: int,
+    s: Session | None = None,
+) -> None:
+    """Register the poller, or renew its lease. Uses database time to avoid clock skew."""
+    with session_scope(existing=s) as session:
+        timed_execute(
+            session,
+            text("""
+                INSERT INTO pollers (id, name, started_at, heartbeat_at, lease_expires_at)
+                VALUES (:id, :name, NOW(), NOW(), NOW() + make_interval(secs => :lease))
+                ON CONFLICT (id) DO UPDATE
+                SET heartbeat_at = NOW(),
+                    lease_expires_at = NOW() + make_interval(secs => :lease)
+            """),
+            {"id": poller_id, "name": name, "lease": lease_seconds},
+            label="heartbeat_poller",
+        )
+
+
+def fetch_live_poller_ids(s: Session | None = None) -> list[uuid.UUID]:
+    with session_scope(existing=s) as session:
+        rows = timed_execute(
+            session,
+            text("""
+                SELECT id
+                FROM pollers
+                WHERE lease_expires_at > NOW()
+                ORDER BY id
+            """),
+            None,
+            label="fetch_live_poller_ids",
+        ).all()
+
+    return [r.id for r in rows]
+
+
+def delete_poller(poller_id: uuid.UUID, s: Session | None = None) -> None:
+    with session_scope(existing=s) as session:
+        timed_execute(
+            session,
+            text("DELETE FROM pollers WHERE id = :id"),
+            {"id": poller_id},
+            label="delete_poller",
+        )
+
+
+def delete_expired_pollers(grace_seconds: int, s: Session | None = None) -> int:
+    """Remove pollers whose lease expired more than `grace_seconds` ago."""
+    with session_scope(existing=s) as session:
+        res = timed_execute(
+            session,
+            text("""
+                DELETE FROM pollers
+                WHERE lease_expires_at < NOW() - make_interval(secs => :grace)
+            """),
+            {"grace": grace_seconds},
+            label="delete_expired_pollers",
+        )
+
+    return int(getattr(res, "rowcount", 0) or 0)
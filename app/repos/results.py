@@ -1,20 +1,39 @@
 import uuid
+from collections.abc import Iterator, Sequence
 from datetime import datetime
 
 from sqlalchemy import text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
 
-from app.constants import DEFAULT_LIMIT, MAX_LIMIT
-from app.db import session_scope
-from app.repos.util import timed_execute
+from app.config import settings
+from app.constants import DEFAULT_LIMIT, EXPORT_CHUNK_ROWS, MAX_LIMIT, RESULTS_CHANNEL
+from app.db import async_session_scope, session_scope
+from app.repos.util import timed_execute, timed_execute_async
 
+# The API reads through the `_async` functions, which may be served by a replica, as
+# may the sync iter_results behind the streaming export. The writes below are sync:
+# the poller runs them in worker threads, on the primary.
 
-def fetch_latest_results(
-    since: datetime | None = None,
-    until: datetime | None = None,
-    limit: int = DEFAULT_LIMIT,
-    s: Session | None = None,
-) -> list[dict]:
+
+def _keyset_clause(before: tuple[datetime, int], col_prefix: str, params: dict) -> str:
+    # The row comparison is an index range scan on (ts DESC, id DESC); the plain ts
+    # bound lets the planner skip partitions newer than the cursor.
+    params["before_ts"], params["before_id"] = before
+    return (
+        f"{col_prefix}ts <= :before_ts "
+        f"AND ({col_prefix}ts, {col_prefix}id) < (:before_ts, :before_id)"
+    )
+
+
+def _latest_results_query(
+    since: datetime | None,
+    until: datetime | None,
+    limit: int,
+    before: tuple[datetime, int] | None,
+) -> tuple[TextClause, dict]:
     limit = max(1, min(int(limit), MAX_LIMIT))
 
     where_clauses: list[str] = []
@@ -29,12 +48,16 @@ def fetch_latest_results(
         where_clauses.append("r.ts < :until")
         params["until"] = until
 
+    if before is not None:
+        where_clauses.append(_keyset_clause(before, "r.", params))
+
     where_sql = ""
     if where_clauses:
         where_sql = "WHERE " + " AND ".join(where_clauses)
 
     sql = f"""
         SELECT
+            r.id,
             r.target_id,
             t.name AS target_name,
             r.ts,
@@ -48,62 +71,69 @@ def fetch_latest_results(
         ORDER BY r.ts DESC, r.id DESC
         LIMIT :limit
     """
+    return text(sql), params
 
-    with session_scope(existing=s) as session:
-        rows = (
-            timed_execute(session, text(sql), params, label="fetch_latest_results").mappings().all()
-        )
 
-    return [dict(r) for r in rows]
+async def fetch_latest_results_async(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = DEFAULT_LIMIT,
+    *,
+    before: tuple[datetime, int] | None = None,
+    s: AsyncSession | None = None,
+) -> list[dict]:
+    """
+    Newest results across all targets, newest first.
 
+    `before` is the `(ts, id)` of the last row of the previous page; only rows that
+    sort after it are returned.
+    """
+    stmt, params = _latest_results_query(since, until, limit, before)
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(session, stmt, params, label="fetch_latest_results")
 
-def fetch_latest_result_by_target(
+    return [dict(r) for r in res.mappings().all()]
+
+
+_LATEST_RESULT_BY_TARGET_SQL = text("""
+    SELECT
+        t.id AS target_id,
+        t.name AS target_name,
+        r.ts,
+        r.success,
+        r.latency_ms,
+        r.status_code,
+        r.error
+    FROM targets t
+    LEFT JOIN target_latest r ON r.target_id = t.id
+    WHERE (:enabled_only = false OR t.enabled = true)
+    ORDER BY t.name
+""")
+
+
+async def fetch_latest_result_by_target_async(
     enabled_only: bool = True,
-    s: Session | None = None,
+    s: AsyncSession | None = None,
 ) -> list[dict]:
-    sql = """
-        SELECT
-            t.id AS target_id,
-            t.name AS target_name,
-            r.ts,
-            r.success,
-            r.latency_ms,
-            r.status_code,
-            r.error
-        FROM targets t
-        LEFT JOIN LATERAL (
-            SELECT ts, success, latency_ms, status_code, error
-            FROM probe_results
-            WHERE target_id = t.id
-            ORDER BY ts DESC, id DESC
-            LIMIT 1
-        ) r ON true
-        WHERE (:enabled_only = false OR t.enabled = true)
-        ORDER BY t.name
-        """
-    with session_scope(existing=s) as session:
-        rows = (
-            timed_execute(
-                session,
-                text(sql),
-                {"enabled_only": enabled_only},
-                label="fetch_latest_result_by_target",
-            )
-            .mappings()
-            .all()
+    """Each target with its newest result, read from target_latest."""
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(
+            session,
+            _LATEST_RESULT_BY_TARGET_SQL,
+            {"enabled_only": enabled_only},
+            label="fetch_latest_result_by_target",
         )
 
-    return [dict(r) for r in rows]
+    return [dict(r) for r in res.mappings().all()]
 
 
-def fetch_results_for_target(
+def _results_for_target_query(
     target_id: uuid.UUID,
-    *,
-    since: datetime | None = None,
-    until: datetime | None = None,
-    limit: int = DEFAULT_LIMIT,
-    s: Session | None = None,
-) -> list[dict]:
+    since: datetime | None,
+    until: datetime | None,
+    limit: int,
+    before: tuple[datetime, int] | None,
+) -> tuple[TextClause, dict]:
     where = ["target_id = :target_id"]
     limit = max(1, min(int(limit), MAX_LIMIT))
     params: dict = {"target_id": target_id, "limit": int(limit)}
@@ -114,6 +144,8 @@ def fetch_results_for_target(
     if until is not None:
         where.append("ts < :until")
         params["until"] = until
+    if before is not None:
+        where.append(_keyset_clause(before, "", params))
 
     sql = f"""
         SELECT id, target_id, ts, success, latency_ms, status_code, error
@@ -122,15 +154,251 @@ def fetch_results_for_target(
         ORDER BY ts DESC, id DESC
         LIMIT :limit
     """
+    return text(sql), params
 
-    with session_scope(existing=s) as session:
-        rows = (
-            timed_execute(session, text(sql), params, label="fetch_results_for_target")
-            .mappings()
-            .all()
+
+async def fetch_results_for_target_async(
+    target_id: uuid.UUID,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = DEFAULT_LIMIT,
+    before: tuple[datetime, int] | None = None,
+    s: AsyncSession | None = None,
+) -> list[dict]:
+    """Results of one target, newest first; `before` works as in `fetch_latest_results_async`."""
+    stmt, params = _results_for_target_query(target_id, since, until, limit, before)
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(session, stmt, params, label="fetch_results_for_target")
+
+    return [dict(r) for r in res.mappings().all()]
+
+
+def _history_query(
+    target_ids: list[uuid.UUID] | None,
+    since: datetime | None,
+    until: datetime | None,
+    limit: int,
+) -> tuple[TextClause, dict]:
+    where = []
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    params: dict = {"limit": limit}
+
+    if since is not None:
+        where.append("p.ts >= :since")
+        params["since"] = since
+    if until is not None:
+        where.append("p.ts < :until")
+        params["until"] = until
+
+    if target_ids is None:
+        target_sql = "t.enabled = true"
+    else:
+        target_sql = "t.id = ANY(:target_ids)"
+        params["target_ids"] = target_ids
+
+    # One index scan per target on (target_id, ts DESC, id DESC), stopped after `limit`
+    # rows; targets without results in the range keep a single all-NULL row.
+    sql = f"""
+        SELECT t.id AS target_id, t.name AS target_name,
+               r.id, r.ts, r.success, r.latency_ms, r.status_code, r.error
+        FROM targets t
+        LEFT JOIN LATERAL (
+            SELECT p.id, p.ts, p.success, p.latency_ms, p.status_code, p.error
+            FROM probe_results p
+            WHERE {" AND ".join(["p.target_id = t.id", *where])}
+            ORDER BY p.ts DESC, p.id DESC
+            LIMIT :limit
+        ) r ON true
+        WHERE {target_sql}
+        ORDER BY t.name, t.id, r.ts DESC, r.id DESC
+    """
+    return text(sql), params
+
+
+def _group_history(rows: Sequence[RowMapping]) -> list[dict]:
+    out: list[dict] = []
+    for r in rows:
+        if not out or out[-1]["target_id"] != r["target_id"]:
+            out.append({"target_id": r["target_id"], "target_name": r["target_name"], "items": []})
+        if r["id"] is not None:
+            out[-1]["items"].append(dict(r))
+    return out
+
+
+async def fetch_results_history_async(
+    target_ids: list[uuid.UUID] | None = None,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = DEFAULT_LIMIT,
+    s: AsyncSession | None = None,
+) -> list[dict]:
+    """
+    The newest `limit` results of each target in one query, grouped by target.
+
+    `target_ids` of None means all enabled targets; unknown ids are left out. Groups
+    are ordered by target name, results newest first.
+    """
+    stmt, params = _history_query(target_ids, since, until, limit)
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(session, stmt, params, label="fetch_results_history")
+
+    return _group_history(res.mappings().all())
+
+
+def iter_results(
+    *,
+    target_ids: list[uuid.UUID] | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    chunk_size: int = EXPORT_CHUNK_ROWS,
+    s: Session | None = None,
+) -> Iterator[list[dict]]:
+    """
+    Stream results oldest first, in lists of up to `chunk_size` rows.
+
+    Rows are read through a server-side cursor, so memory use does not depend on the
+    size of the range. The session stays open until the iterator is exhausted or
+    closed.
+    """
+    where: list[str] = []
+    params: dict = {}
+
+    if target_ids is not None:
+        where.append("r.target_id = ANY(CAST(:target_ids AS uuid[]))")
+        params["target_ids"] = list(target_ids)
+    if since is not None:
+        where.append("r.ts >= :since")
+        params["since"] = since
+    if until is not None:
+        where.append("r.ts < :until")
+        params["until"] = until
+
+    where_sql = "WHERE " + " AND ".join(where) if where else ""
+    sql = f"""
+        SELECT
+            r.id,
+            r.target_id,
+            t.name AS target_name,
+            r.ts,
+            r.success,
+            r.latency_ms,
+            r.status_code,
+            r.error
+        FROM probe_results r
+        JOIN targets t ON t.id = r.target_id
+        {where_sql}
+        ORDER BY r.ts, r.id
+    """
+
+    chunk_size = max(1, chunk_size)
+    with session_scope(existing=s, readonly=True) as session:
+        res = timed_execute(
+            session,
+            text(sql).execution_options(yield_per=chunk_size),
+            params,
+            label="iter_results",
+        )
+        for chunk in res.mappings().partitions(chunk_size):
+            yield [dict(r) for r in chunk]
+
+
+# The time bounds let the planner skip partitions outside the announced range.
+_RESULTS_BY_IDS_SQL = text("""
+    SELECT r.id, r.target_id, t.name AS target_name, r.ts, r.success,
+           r.latency_ms, r.status_code, r.error
+    FROM probe_results r
+    JOIN targets t ON t.id = r.target_id
+    WHERE r.ts >= :since AND r.ts <= :until
+      AND r.id = ANY(:ids)
+    ORDER BY r.ts, r.id
+""")
+
+
+async def fetch_results_by_ids_async(
+    ids: list[int],
+    *,
+    since: datetime,
+    until: datetime,
+    s: AsyncSession | None = None,
+) -> list[dict]:
+    """Results with the given ids and `since <= ts <= until`, oldest first."""
+    # primary only: the ids were just announced and a replica may not have them yet
+    async with async_session_scope(existing=s) as session:
+        res = await timed_execute_async(
+            session,
+            _RESULTS_BY_IDS_SQL,
+            {"ids": ids, "since": since, "until": until},
+            label="fetch_results_by_ids",
+        )
+
+    return [dict(r) for r in res.mappings().all()]
+
+
+# Appended to a statement whose `inserted` CTE returns the new probe_results rows:
+# moves each target's target_latest row forward to its newest inserted result, and
+# bumps its write_count (the change token of app.repos.tokens). Rows are locked in target_id order so
+# concurrent writers cannot deadlock, and the `newer` check keeps late or replayed
+# results from replacing a newer one.
+_UPSERT_TARGET_LATEST = """
+    latest AS (
+        INSERT INTO target_latest AS l (
+            target_id, result_id, ts, success, latency_ms, status_code, error
+        )
+        SELECT DISTINCT ON (target_id)
+            target_id, id, ts, success, latency_ms, status_code, error
+        FROM inserted
+        ORDER BY target_id, ts DESC, id DESC
+        ON CONFLICT (target_id) DO UPDATE
+        SET (result_id, ts, success, latency_ms, status_code, error) = (
+                SELECT
+                    CASE WHEN n.newer THEN EXCLUDED.result_id ELSE l.result_id END,
+                    CASE WHEN n.newer THEN EXCLUDED.ts ELSE l.ts END,
+                    CASE WHEN n.newer THEN EXCLUDED.success ELSE l.success END,
+                    CASE WHEN n.newer THEN EXCLUDED.latency_ms ELSE l.latency_ms END,
+                    CASE WHEN n.newer THEN EXCLUDED.status_code ELSE l.status_code END,
+                    CASE WHEN n.newer THEN EXCLUDED.error ELSE l.error END
+                FROM (
+                    SELECT (EXCLUDED.ts, EXCLUDED.result_id) > (l.ts, l.result_id) AS newer
+                ) n
+            ),
+            write_count = l.write_count + 1
+    )
+"""
+
+# Appended after _UPSERT_TARGET_LATEST when `results_notify_enabled` is set: announces
+# the inserted rows on RESULTS_CHANNEL as {"since", "until", "ids"}. Delivered on
+# commit; payloads are capped at 8000 bytes, so large batches are split into chunks of
+# ids. The statement has to read `notified` for the notifications to be sent.
+_NOTIFY_INSERTED = f"""
+    , notified AS (
+        SELECT pg_notify(
+            '{RESULTS_CHANNEL}',
+            json_build_object('since', MIN(ts), 'until', MAX(ts), 'ids', json_agg(id ORDER BY id))::text
         )
+        FROM (
+            SELECT id, ts, (row_number() OVER (ORDER BY id) - 1) / 250 AS chunk
+            FROM inserted
+        ) c
+        GROUP BY chunk
+    )
+"""
+
+
+def _notify_sql() -> tuple[str, str]:
+    """The `notified` CTE and an expression reading it, or nothing when disabled."""
+    # NOTIFY takes a cluster-wide lock at commit; only pay for it if the stream is used
+    if not settings.results_notify_enabled:
+        return "", "0"
+    return _NOTIFY_INSERTED, "(SELECT COUNT(*) FROM notified)"
 
-    return [dict(r) for r in rows]
+
+def _take_xact_id(session: Session) -> None:
+    # Rollups only pass ids once every transaction older than them has ended (see
+    # `advance_rollups`); a writer must therefore have its transaction id before it
+    # draws ids from the sequence, e.g. while it waits on a conflicting insert.
+    timed_execute(session, text("SELECT pg_current_xact_id()"), None, label="take_xact_id")
 
 
 def insert_probe_result(
@@ -143,12 +411,20 @@ def insert_probe_result(
     error: str | None,
     s: Session | None = None,
 ) -> None:
+    notify_cte, notifications = _notify_sql()
     with session_scope(existing=s) as session:
+        _take_xact_id(session)
         timed_execute(
             session,
-            text("""
-                INSERT INTO probe_results (target_id, ts, success, latency_ms, status_code, error)
-                VALUES (:target_id, :ts, :success, :latency_ms, :status_code, :error)
+            text(f"""
+                WITH inserted AS (
+                    INSERT INTO probe_results (target_id, ts, success, latency_ms, status_code, error)
+                    VALUES (:target_id, :ts, :success, :latency_ms, :status_code, :error)
+                    RETURNING *
+                ),
+                {_UPSERT_TARGET_LATEST}
+                {notify_cte}
+                SELECT {notifications}
             """),
             {
                 "target_id": target_id,
@@ -160,3 +436,60 @@ def insert_probe_result(
             },
             label="insert_probe_result",
         )
+
+
+def insert_probe_results(rows: list[dict], s: Session | None = None) -> int:
+    """
+    Bulk insert probe results in a single statement.
+
+    Each row carries the same keys as `insert_probe_result`'s keyword arguments, plus
+    an optional `result_key`. Columns are bound as arrays and expanded with unnest(),
+    so the statement and round trip count stay constant regardless of batch size.
+
+    Rows whose `result_key` is already stored are skipped, which makes replaying the
+    same rows safe. target_latest is updated, and with `results_notify_enabled` the new
+    rows are announced on RESULTS_CHANNEL, in the same statement. Returns the number of
+    rows inserted.
+    """
+    if not rows:
+        return 0
+
+    notify_cte, notifications = _notify_sql()
+    with session_scope(existing=s) as session:
+        _take_xact_id(session)
+        inserted = timed_execute(
+            session,
+            text(f"""
+                WITH inserted AS (
+                    INSERT INTO probe_results (target_id, ts, success, latency_ms, status_code, error, result_key)
+                    SELECT * FROM unnest(
+                        CAST(:target_ids AS uuid[]),
+                        CAST(:ts AS timestamptz[]),
+                        CAST(:success AS boolean[]),
+                        CAST(:latency_ms AS int[]),
+                        CAST(:status_code AS int[]),
+                        CAST(:error AS text[]),
+                        CAST(:result_keys AS uuid[])
+                    )
+                    ON CONFLICT DO NOTHING
+                    RETURNING *
+                ),
+                {_UPSERT_TARGET_LATEST}
+                {notify_cte}
+                SELECT
+                    (SELECT COUNT(*) FROM inserted) AS inserted,
+                    {notifications} AS notifications
+            """),
+            {
+                "target_ids": [r["target_id"] for r in rows],
+                "ts": [r["ts"] for r in rows],
+                "success": [r["success"] for r in rows],
+                "latency_ms": [r["latency_ms"] for r in rows],
+                "status_code": [r["status_code"] for r in rows],
+                "error": [r["error"] for r in rows],
+                "result_keys": [r.get("result_key") for r in rows],
+            },
+            label="insert_probe_results",
+        ).one()
+
+    return int(inserted.inserted)
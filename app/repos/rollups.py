@@ -0,0 +1,223 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.constants import LATENCY_HISTOGRAM_BOUNDS_MS
+from app.db import session_scope
+from app.repos.util import timed_execute
+
+log = logging.getLogger(__name__)
+
+# rollup table -> date_trunc() unit of its buckets
+ROLLUP_TABLES = {"probe_rollup_1m": "minute", "probe_rollup_1h": "hour"}
+
+
+@dataclass(frozen=True)
+class RollupRun:
+    rows: int
+    last_id: int
+    pending_id: int
+    # True when every id that was ready for this run has been aggregated
+    caught_up: bool
+
+
+def _histogram_sql() -> str:
+    parts: list[str] = []
+    lower: int | None = None
+    for upper in LATENCY_HISTOGRAM_BOUNDS_MS:
+        cond = (
+            f"latency_ms < {upper}"
+            if lower is None
+            else f"latency_ms >= {lower} AND latency_ms < {upper}"
+        )
+        parts.append(f"COUNT(*) FILTER (WHERE {cond})")
+        lower = upper
+    parts.append(f"COUNT(*) FILTER (WHERE latency_ms >= {lower})")
+    return "ARRAY[" + ", ".join(parts) + "]::int[]"
+
+
+def _rollup_sql(table: str, unit: str) -> str:
+    return f"""
+        INSERT INTO {table} AS r (
+            target_id, bucket, probes, successes,
+            latency_count, latency_sum, latency_min, latency_max, latency_hist
+        )
+        SELECT
+            target_id,
+            date_trunc('{unit}', ts, 'UTC'),
+            COUNT(*),
+            COUNT(*) FILTER (WHERE success),
+            COUNT(latency_ms),
+            COALESCE(SUM(latency_ms), 0),
+            MIN(latency_ms),
+            MAX(latency_ms),
+            {_histogram_sql()}
+        FROM probe_results
+        WHERE id > :lo AND id <= :hi
+        GROUP BY 1, 2
+        ON CONFLICT (target_id, bucket) DO UPDATE
+        SET probes = r.probes + EXCLUDED.probes,
+            successes = r.successes + EXCLUDED.successes,
+            latency_count = r.latency_count + EXCLUDED.latency_count,
+            latency_sum = r.latency_sum + EXCLUDED.latency_sum,
+            latency_min = LEAST(r.latency_min, EXCLUDED.latency_min),
+            latency_max = GREATEST(r.latency_max, EXCLUDED.latency_max),
+            latency_hist = ARRAY(
+                SELECT u.a + u.b
+                FROM unnest(r.latency_hist, EXCLUDED.latency_hist) WITH ORDINALITY AS u(a, b, n)
+                ORDER BY u.n
+            )
+    """
+
+
+# Whether every transaction that could hold ids up to pending_id has ended, i.e. no
+# transaction below pending_xmax is still running besides the caller's own. Running
+# ids are those listed in the snapshot and, as the snapshot stops at the last
+# completed transaction, any still in progress between its xmax and pending_xmax.
+_ROLLUP_STATE_SQL = """
+    WITH snap AS (
+        SELECT pg_current_snapshot() AS s, pg_current_xact_id_if_assigned() AS own
+    ),
+    state AS (
+        SELECT last_id, pending_id, pending_xmax
+        FROM rollup_state
+        WHERE name = 'probe_results'
+    )
+    SELECT
+        state.last_id,
+        state.pending_id,
+        state.pending_xmax IS NULL OR NOT EXISTS (
+            SELECT 1
+            FROM (
+                SELECT x FROM pg_snapshot_xip(snap.s) AS x
+                UNION ALL
+                SELECT g::text::xid8
+                FROM generate_series(
+                    pg_snapshot_xmax(snap.s)::text::bigint,
+                    state.pending_xmax::text::bigint - 1
+                ) AS g
+                WHERE pg_xact_status(g::text::xid8) = 'in progress'
+            ) AS running(x)
+            WHERE running.x < state.pending_xmax AND running.x IS DISTINCT FROM snap.own
+        ) AS ready
+    FROM state, snap
+"""
+
+
+def advance_rollups(max_ids: int = 1_000_000, s: Session | None = None) -> RollupRun:
+    """
+    Fold new probe_results rows into the 1-minute and 1-hour rollup tables.
+
+    Rows are picked by id above the stored watermark, so each run reads only rows it
+    has not seen. Ids seen handed out by the sequence only become ready once every
+    transaction that was running at that point has ended; otherwise a row committed
+    after a higher id (a large spool replay, a lock wait) could be skipped for good.
+    Writers take their transaction id before drawing ids (see `insert_probe_results`)
+    and this function takes its own right after reading the sequence, so that
+    transaction id bounds them. Until they end, runs do nothing and report
+    `caught_up`; summaries read the rows above the watermark raw meanwhile.
+
+    At most `max_ids` ids are processed per call; call again until `caught_up`. Run it
+    in a transaction of its own: the bound is only exact when the transaction id is
+    taken here.
+    """
+    with session_scope(existing=s) as session:
+        # rollups must not run twice over the same rows
+        timed_execute(
+            session,
+            text("SELECT pg_advisory_xact_lock(hashtext('pingu:rollups'))"),
+            None,
+            label="lock_rollups",
+        )
+        state = timed_execute(
+            session, text(_ROLLUP_STATE_SQL), None, label="fetch_rollup_state"
+        ).one()
+        # ids handed out up to now, and a transaction id above those of their writers
+        position = timed_execute(
+            session,
+            text("SELECT last_value FROM probe_results_id_seq"),
+            None,
+            label="fetch_result_id_position",
+        ).scalar_one()
+        xact_id = timed_execute(
+            session,
+            text("SELECT pg_current_xact_id()::text"),
+            None,
+            label="take_xact_id",
+        ).scalar_one()
+
+        lo = int(state.last_id)
+        pending = int(state.pending_id)
+        if not state.ready:
+            log.info(
+                "rollups waiting for older transactions to end",
+                extra={"last_id": lo, "pending_id": pending},
+            )
+            return RollupRun(rows=0, last_id=lo, pending_id=pending, caught_up=True)
+
+        hi = min(pending, lo + max(1, max_ids))
+        rows = 0
+        if hi > lo:
+            for table, unit in ROLLUP_TABLES.items():
+                res = timed_execute(
+                    session,
+                    text(_rollup_sql(table, unit)),
+                    {"lo": lo, "hi": hi},
+                    label=f"rollup_{table}",
+                )
+                if table == "probe_rollup_1m":
+                    rows = res.rowcount
+
+        caught_up = hi >= pending
+        pending_xmax = None
+        if caught_up:
+            pending, pending_xmax = int(position), xact_id
+
+        timed_execute(
+            session,
+            text("""
+                UPDATE rollup_state
+                SET last_id = :last_id,
+                    pending_id = :pending_id,
+                    pending_xmax = COALESCE(CAST(:pending_xmax AS xid8), pending_xmax),
+                    updated_at = NOW()
+                WHERE name = 'probe_results'
+            """),
+            {"last_id": max(lo, hi), "pending_id": pending, "pending_xmax": pending_xmax},
+            label="update_rollup_state",
+        )
+
+    return RollupRun(rows=rows, last_id=max(lo, hi), pending_id=pending, caught_up=caught_up)
+
+
+def fetch_rollup_watermark(s: Session | None = None) -> int:
+    """Highest probe_results id already folded into the rollups."""
+    with session_scope(existing=s) as session:
+        return int(
+            timed_execute(
+                session,
+                text("SELECT last_id FROM rollup_state WHERE name = 'probe_results'"),
+                None,
+                label="fetch_rollup_watermark",
+            ).scalar_one()
+        )
+
+
+def delete_old_rollups(table: str, retention_days: int, s: Session | None = None) -> int:
+    if table not in ROLLUP_TABLES:
+        raise ValueError(f"unknown rollup table: {table}")
+    if retention_days <= 0:
+        return 0
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    with session_scope(existing=s) as session:
+        res = timed_execute(
+            session,
+            text(f"DELETE FROM {table} WHERE bucket < :cutoff"),
+            {"cutoff": cutoff},
+            label=f"delete_old_{table}",
+        )
+    return res.rowcount
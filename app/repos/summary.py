@@ -0,0 +1,149 @@
+import uuid
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+
+from app.config import settings
+from app.constants import SUMMARY_RAW_MAX_SECONDS
+from app.db import async_session_scope
+from app.repos.util import timed_execute_async
+
+# Per-target counters over the window from raw rows only.
+_RAW_PARTS = """
+    SELECT target_id, 1 AS probes, success::int AS successes,
+           (latency_ms IS NOT NULL)::int AS latency_count, COALESCE(latency_ms, 0) AS latency_sum
+    FROM probe_results
+    WHERE ts >= :since AND ts <= :now
+"""
+
+# Rollups cover every row with id <= the watermark; rows above it are read raw. The
+# window start is covered by hourly buckets from the first whole hour, minute buckets
+# from the first whole minute, and raw rows before that. Once minute rollups that old
+# have been pruned, the window start is rounded out to the hourly bucket holding it.
+_ROLLUP_PARTS = """
+    SELECT target_id, probes, successes, latency_count, latency_sum
+    FROM probe_rollup_1h
+    WHERE bucket >= :hour_start AND bucket <= :now
+    UNION ALL
+    SELECT target_id, probes, successes, latency_count, latency_sum
+    FROM probe_rollup_1m
+    WHERE bucket >= :minute_start AND bucket < :hour_start
+    UNION ALL
+    SELECT target_id, 1, success::int, (latency_ms IS NOT NULL)::int, COALESCE(latency_ms, 0)
+    FROM probe_results, wm
+    WHERE ts >= :since AND ts < :minute_start AND id <= wm.last_id
+    UNION ALL
+    SELECT target_id, 1, success::int, (latency_ms IS NOT NULL)::int, COALESCE(latency_ms, 0)
+    FROM probe_results, wm
+    WHERE id > wm.last_id AND ts >= :since AND ts <= :now
+"""
+
+
+def _ceil(ts: datetime, step: timedelta) -> datetime:
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    n, rem = divmod(ts - epoch, step)
+    return epoch + (n + (1 if rem else 0)) * step
+
+
+def _floor(ts: datetime, step: timedelta) -> datetime:
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return epoch + ((ts - epoch) // step) * step
+
+
+def _summary_query(
+    window: timedelta,
+    target_id: uuid.UUID | None,
+    enabled_only: bool,
+    now: datetime | None,
+) -> tuple[TextClause, dict]:
+    now = now or datetime.now(timezone.utc)
+    since = now - window
+    params: dict = {"since": since, "now": now, "enabled_only": enabled_only}
+
+    if window.total_seconds() <= SUMMARY_RAW_MAX_SECONDS:
+        parts = _RAW_PARTS
+    else:
+        parts = _ROLLUP_PARTS
+        retention_days = settings.rollup_1m_retention_days
+        if retention_days > 0 and since < now - timedelta(days=retention_days):
+            # minute rollups (and likely raw rows) that old are gone: hourly buckets only
+            hour_start = _floor(since, timedelta(hours=1))
+            params["minute_start"] = params["hour_start"] = hour_start
+        else:
+            params["minute_start"] = _ceil(since, timedelta(minutes=1))
+            params["hour_start"] = _ceil(since, timedelta(hours=1))
+
+    target_sql = ""
+    if target_id is not None:
+        target_sql = "AND t.id = :target_id"
+        params["target_id"] = target_id
+
+    sql = f"""
+        WITH wm AS (
+            SELECT last_id FROM rollup_state WHERE name = 'probe_results'
+        ),
+        parts AS ({parts}),
+        totals AS (
+            SELECT
+                target_id,
+                SUM(probes) AS probes,
+                SUM(successes) AS successes,
+                SUM(latency_count) AS latency_count,
+                SUM(latency_sum) AS latency_sum
+            FROM parts
+            GROUP BY target_id
+        )
+        SELECT
+            t.id AS target_id,
+            t.name AS target_name,
+            COALESCE(x.probes, 0) AS total_probes,
+            100.0 * x.successes / NULLIF(x.probes, 0) AS uptime_percent,
+            x.latency_sum::float8 / NULLIF(x.latency_count, 0) AS avg_latency_ms
+        FROM targets t
+        LEFT JOIN totals x ON x.target_id = t.id
+        WHERE (:enabled_only = false OR t.enabled = true)
+        {target_sql}
+        ORDER BY t.name
+    """
+    return text(sql), params
+
+
+def _summary_rows(rows: Sequence[RowMapping]) -> list[dict]:
+    out: list[dict] = []
+    for r in rows:
+        d = dict(r)
+        d["total_probes"] = int(d["total_probes"])
+        if d["uptime_percent"] is not None:
+            d["uptime_percent"] = round(float(d["uptime_percent"]), 2)
+        if d["avg_latency_ms"] is not None:
+            d["avg_latency_ms"] = round(float(d["avg_latency_ms"]), 2)
+        out.append(d)
+    return out
+
+
+async def fetch_summary_async(
+    window: timedelta,
+    *,
+    target_id: uuid.UUID | None = None,
+    enabled_only: bool = True,
+    now: datetime | None = None,
+    s: AsyncSession | None = None,
+) -> list[dict]:
+    """
+    Per-target probe totals, uptime and average latency over the last `window`.
+
+    Windows up to `SUMMARY_RAW_MAX_SECONDS` are computed from raw rows; longer ones
+    from the rollup tables plus the raw rows not yet rolled up. A window reaching back
+    past `rollup_1m_retention_days` starts at the hour holding its start, so it may
+    include up to an hour of results before it. Targets without
+    results in the window are included with zero probes and `None` averages.
+    """
+    stmt, params = _summary_query(window, target_id, enabled_only, now)
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(session, stmt, params, label="fetch_summary")
+
+    return _summary_rows(res.mappings().all())
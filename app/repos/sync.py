@@ -1,4 +1,4 @@
-import uuid
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
 from sqlalchemy import text
@@ -9,81 +9,98 @@ from app.poller.config import TargetCfg
 from app.repos.util import timed_execute
 
 
-def sync_targets_to_db(cfg_targets: list[TargetCfg], s: Session | None = None) -> None:
+@dataclass(frozen=True)
+class SyncSummary:
+    inserted: int
+    updated: int
+    disabled: int
+
+
+def sync_targets_to_db(cfg_targets: list[TargetCfg], s: Session | None = None) -> SyncSummary:
+    """
+    Make the targets table match the config in one set-based statement.
+
+    The config is bound as column arrays and expanded with unnest(). New names are
+    inserted, existing names are updated only when a column actually differs, and
+    enabled targets missing from the config are disabled. Rows that already match
+    are not written, so `updated_at` only moves on real changes.
+    """
+    # last definition of a name wins, as before; ON CONFLICT cannot touch a row twice
     cfg_by_name = {t.name: t for t in cfg_targets}
+    cfg = list(cfg_by_name.values())
 
     with session_scope(existing=s) as session:
-        existing = timed_execute(
+        # pollers may start together (sharded mode); serialize their syncs
+        timed_execute(
             session,
-            text("SELECT id, name FROM targets"),
+            text("SELECT pg_advisory_xact_lock(hashtext('pingu:sync_targets'))"),
             None,
-            label="fetch_existing_targets",
-        ).all()
-        existing_by_name: dict[str, uuid.UUID] = {row.name: row.id for row in existing}
-
-        now = datetime.now(timezone.utc)
+            label="lock_sync_targets",
+        )
 
-        for name, t in cfg_by_name.items():
-            existing_id = existing_by_name.get(name)
-            if existing_id is None:
-                new_id = uuid.uuid4()
-                timed_execute(
-                    session,
-                    text("""
-                        INSERT INTO targets (id, name, type, host, url, interval_seconds, timeout_ms, enabled, created_at, updated_at)
-                        VALUES (:id, :name, :type, :host, :url, :interval_seconds, :timeout_ms, :enabled, :created_at, :updated_at)
-                    """),
-                    {
-                        "id": new_id,
-                        "name": t.name,
-                        "type": t.type,
-                        "host": t.host,
-                        "url": t.url,
-                        "interval_seconds": t.interval_seconds,
-                        "timeout_ms": t.timeout_ms,
-                        "enabled": t.enabled,
-                        "created_at": now,
-                        "updated_at": now,
-                    },
-                    label="insert_target",
-                )
-            else:
-                timed_execute(
-                    session,
-                    text("""
-                        UPDATE targets
-                        SET type = :type,
-                            host = :host,
-                            url = :url,
-                            interval_seconds = :interval_seconds,
-                            timeout_ms = :timeout_ms,
-                            enabled = :enabled,
-                            updated_at = :updated_at
-                        WHERE id = :id
-                    """),
-                    {
-                        "id": existing_id,
-                        "type": t.type,
-                        "host": t.host,
-                        "url": t.url,
-                        "interval_seconds": t.interval_seconds,
-                        "timeout_ms": t.timeout_ms,
-                        "enabled": t.enabled,
-                        "updated_at": now,
-                    },
-                    label="update_target",
+        row = timed_execute(
+            session,
+            text("""
+                WITH cfg AS (
+                    SELECT * FROM unnest(
+                        CAST(:names AS text[]),
+                        CAST(:types AS text[]),
+                        CAST(:hosts AS text[]),
+                        CAST(:urls AS text[]),
+                        CAST(:interval_seconds AS int[]),
+                        CAST(:timeout_ms AS int[]),
+                        CAST(:enabled AS boolean[]),
+                        CAST(:http_connection AS text[]),
+                        CAST(:priority AS text[])
+                    ) AS c(name, type, host, url, interval_seconds, timeout_ms, enabled, http_connection, priority)
+                ),
+                upserted AS (
+                    INSERT INTO targets (id, name, type, host, url, interval_seconds, timeout_ms, enabled, http_connection, priority, created_at, updated_at)
+                    SELECT gen_random_uuid(), name, type, host, url, interval_seconds, timeout_ms, enabled, http_connection, priority, :now, :now
+                    FROM cfg
+                    ON CONFLICT (name) DO UPDATE
+                    SET type = EXCLUDED.type,
+                        host = EXCLUDED.host,
+                        url = EXCLUDED.url,
+                        interval_seconds = EXCLUDED.interval_seconds,
+                        timeout_ms = EXCLUDED.timeout_ms,
+                        enabled = EXCLUDED.enabled,
+                        http_connection = EXCLUDED.http_connection,
+                        priority = EXCLUDED.priority,
+                        updated_at = EXCLUDED.updated_at
+                    WHERE (targets.type, targets.host, targets.url, targets.interval_seconds,
+                           targets.timeout_ms, targets.enabled, targets.http_connection, targets.priority)
+                        IS DISTINCT FROM
+                          (EXCLUDED.type, EXCLUDED.host, EXCLUDED.url, EXCLUDED.interval_seconds,
+                           EXCLUDED.timeout_ms, EXCLUDED.enabled, EXCLUDED.http_connection,
+                           EXCLUDED.priority)
+                    RETURNING (xmax = 0) AS inserted
+                ),
+                disabled AS (
+                    UPDATE targets
+                    SET enabled = false, updated_at = :now
+                    WHERE enabled
+                      AND NOT EXISTS (SELECT 1 FROM cfg WHERE cfg.name = targets.name)
+                    RETURNING 1
                 )
+                SELECT
+                    (SELECT COUNT(*) FROM upserted WHERE inserted) AS inserted,
+                    (SELECT COUNT(*) FROM upserted WHERE NOT inserted) AS updated,
+                    (SELECT COUNT(*) FROM disabled) AS disabled
+            """),
+            {
+                "names": [t.name for t in cfg],
+                "types": [t.type for t in cfg],
+                "hosts": [t.host for t in cfg],
+                "urls": [t.url for t in cfg],
+                "interval_seconds": [t.interval_seconds for t in cfg],
+                "timeout_ms": [t.timeout_ms for t in cfg],
+                "enabled": [t.enabled for t in cfg],
+                "http_connection": [t.connection for t in cfg],
+                "priority": [t.priority for t in cfg],
+                "now": datetime.now(timezone.utc),
+            },
+            label="sync_targets",
+        ).one()
 
-        cfg_names = set(cfg_by_name.keys())
-        for row in existing:
-            if row.name not in cfg_names:
-                timed_execute(
-                    session,
-                    text("""
-                        UPDATE targets
-                        SET enabled = false, updated_at = :updated_at
-                        WHERE id = :id
-                    """),
-                    {"id": row.id, "updated_at": now},
-                    label="disable_target",
-                )
+    return SyncSummary(inserted=row.inserted, updated=row.updated, disabled=row.disabled)
@@ -1,20 +1,18 @@
 import uuid
 
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
 
-from app.db import session_scope
+from app.db import async_session_scope, session_scope
 from app.models import HttpTarget, IcmpTarget
-from app.repos.util import timed_execute
+from app.repos.util import timed_execute, timed_execute_async
 
+_TARGET_COLUMNS = "id, name, type, enabled, interval_seconds, timeout_ms, host, url"
 
-def fetch_all_targets(
-    status: str = "enabled",
-    s: Session | None = None,
-) -> list[dict]:
-    where_sql = ""
-    params: dict = {}
 
+def _all_targets_query(status: str) -> TextClause:
     if status == "enabled":
         where_sql = "WHERE enabled = true"
     elif status == "disabled":
@@ -25,35 +23,40 @@ def fetch_all_targets(
         # Should be impossible if API layer uses Literal, but keeps this safe if reused elsewhere
         raise ValueError("Invalid status. Must be one of: enabled, disabled, all")
 
-    sql = f"""
-        SELECT id, name, type, enabled, interval_seconds, timeout_ms, host, url
+    return text(f"""
+        SELECT {_TARGET_COLUMNS}
         FROM targets
         {where_sql}
         ORDER BY name
-    """
+    """)
 
-    with session_scope(existing=s) as session:
-        rows = timed_execute(session, text(sql), params, label="fetch_all_targets").mappings().all()
 
-    return [dict(r) for r in rows]
+async def fetch_all_targets_async(
+    status: str = "enabled",
+    s: AsyncSession | None = None,
+) -> list[dict]:
+    stmt = _all_targets_query(status)
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(session, stmt, None, label="fetch_all_targets")
 
+    return [dict(r) for r in res.mappings().all()]
 
-def fetch_target_by_id(target_id: uuid.UUID, s: Session | None = None) -> dict | None:
-    with session_scope(existing=s) as session:
-        row = (
-            timed_execute(
-                session,
-                text("""
-                SELECT id, name, type, enabled, interval_seconds, timeout_ms, host, url
-                FROM targets
-                WHERE id = :id
-                """),
-                {"id": target_id},
-                label="fetch_target_by_id",
-            )
-            .mappings()
-            .one_or_none()
+
+_TARGET_BY_ID_SQL = text(f"""
+    SELECT {_TARGET_COLUMNS}
+    FROM targets
+    WHERE id = :id
+""")
+
+
+async def fetch_target_by_id_async(
+    target_id: uuid.UUID, s: AsyncSession | None = None
+) -> dict | None:
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(
+            session, _TARGET_BY_ID_SQL, {"id": target_id}, label="fetch_target_by_id"
         )
+        row = res.mappings().one_or_none()
 
     return dict(row) if row is not None else None
 
@@ -64,7 +67,7 @@ def fetch_enabled_icmp_targets(s: Session | None = None) -> list[IcmpTarget]:
             timed_execute(
                 session,
                 text("""
-                SELECT id, name, host, interval_seconds, timeout_ms
+                SELECT id, name, host, interval_seconds, timeout_ms, priority
                 FROM targets
                 WHERE enabled = true AND type = 'icmp'
                 ORDER BY name
@@ -89,6 +92,7 @@ def fetch_enabled_icmp_targets(s: Session | None = None) -> list[IcmpTarget]:
                 host=host,
                 interval_seconds=int(r["interval_seconds"]),
                 timeout_ms=int(r["timeout_ms"]),
+                priority=r["priority"],
             )
         )
     return out
@@ -100,7 +104,7 @@ def fetch_enabled_http_targets(s: Session | None = None) -> list[HttpTarget]:
             timed_execute(
                 session,
                 text("""
-                SELECT id, name, url, interval_seconds, timeout_ms
+                SELECT id, name, url, interval_seconds, timeout_ms, http_connection, priority
                 FROM targets
                 WHERE enabled = true AND type = 'http'
                 ORDER BY name
@@ -125,6 +129,8 @@ def fetch_enabled_http_targets(s: Session | None = None) -> list[HttpTarget]:
                 url=url,
                 interval_seconds=int(r["interval_seconds"]),
                 timeout_ms=int(r["timeout_ms"]),
+                connection=r["http_connection"],
+                priority=r["priority"],
             )
         )
 
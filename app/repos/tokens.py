@@ -0,0 +1,74 @@
+"""
+Change tokens for HTTP caching.
+
+Each token changes whenever the data behind a response may have changed, and costs
+a primary key lookup or a read of target_latest instead of a query of
+probe_results. See migrations 0009_change_tokens and 0010_target_latest_writes.
+
+Result tokens count writes rather than track result ids: ids are handed out before
+commit, so a writer can commit lower ids after another committed higher ones. They
+also carry a version that retention bumps when it removes results.
+"""
+
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_session_scope
+from app.repos.util import timed_execute_async
+
+_TARGETS_VERSION = "(SELECT value FROM change_counters WHERE name = 'targets')"
+# bumped when retention removes results (app.repos.partitions); no row until then
+_RESULTS_VERSION = "COALESCE((SELECT value FROM change_counters WHERE name = 'results'), 0)"
+
+
+async def fetch_targets_version_async(s: AsyncSession | None = None) -> int:
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(
+            session, text(f"SELECT {_TARGETS_VERSION}"), None, label="fetch_targets_version"
+        )
+
+    return int(res.scalar_one() or 0)
+
+
+async def fetch_latest_by_target_token_async(
+    s: AsyncSession | None = None,
+) -> tuple[int, int, int]:
+    """Targets version, results version and the number of result writes over all targets."""
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(
+            session,
+            text(f"""
+                SELECT
+                    {_TARGETS_VERSION} AS targets_version,
+                    {_RESULTS_VERSION} AS results_version,
+                    (SELECT SUM(write_count) FROM target_latest) AS writes
+            """),
+            None,
+            label="fetch_latest_by_target_token",
+        )
+        row = res.one()
+
+    return int(row.targets_version or 0), int(row.results_version), int(row.writes or 0)
+
+
+async def fetch_target_results_token_async(
+    target_id: uuid.UUID, s: AsyncSession | None = None
+) -> tuple[int, int, int]:
+    """Targets version, results version and the number of result writes for `target_id`."""
+    async with async_session_scope(existing=s, readonly=True) as session:
+        res = await timed_execute_async(
+            session,
+            text(f"""
+                SELECT
+                    {_TARGETS_VERSION} AS targets_version,
+                    {_RESULTS_VERSION} AS results_version,
+                    (SELECT write_count FROM target_latest WHERE target_id = :id) AS writes
+            """),
+            {"id": target_id},
+            label="fetch_target_results_token",
+        )
+        row = res.one()
+
+    return int(row.targets_version or 0), int(row.results_version), int(row.writes or 0)
@@ -1,6 +1,7 @@
 import logging
 import time
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.elements import TextClause
 
@@ -15,3 +16,15 @@ def timed_execute(session: Session, stmt: TextClause, params: dict | None, *, la
         ms = (time.perf_counter() - t0) * 1000.0
         if ms > 200:
             log.warning("slow db query", extra={"label": label, "ms": round(ms, 1)})
+
+
+async def timed_execute_async(
+    session: AsyncSession, stmt: TextClause, params: dict | None, *, label: str
+):
+    t0 = time.perf_counter()
+    try:
+        return await session.execute(stmt, params or {})
+    finally:
+        ms = (time.perf_counter() - t0) * 1000.0
+        if ms > 200:
+            log.warning("slow db query", extra={"label": label, "ms": round(ms, 1)})
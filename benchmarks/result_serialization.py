@@ -0,0 +1,93 @@
+"""
+Per-row CPU cost of serializing a result page, old path vs. fast path.
+
+The old path builds one pydantic model per row and lets FastAPI validate and
+serialize the `response_model`, as the result routes used to. The fast path is
+`app.api.responses`.
+
+Run from the repository root (any DATABASE_URL works; nothing connects):
+
+    DATABASE_URL=postgresql+psycopg://x@localhost/x python -m benchmarks.result_serialization
+"""
+
+import argparse
+import time
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+import anyio
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic_core import to_json
+
+from app.api.responses import project
+from app.api.schemas import LatestResultItem, LatestResultsResponse, utcnow
+
+
+def make_rows(n: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    targets = [(uuid.uuid4(), f"target-{i}") for i in range(50)]
+    rows = []
+    for i in range(n):
+        tid, name = targets[i % len(targets)]
+        rows.append(
+            {
+                "id": 1_000_000 + i,
+                "target_id": tid,
+                "target_name": name,
+                "ts": now - timedelta(seconds=i),
+                "success": i % 10 != 0,
+                "latency_ms": None if i % 10 == 0 else 5 + i % 40,
+                "status_code": 200 if i % 3 == 0 else None,
+                "error": "timeout" if i % 10 == 0 else None,
+            }
+        )
+    return rows
+
+
+_FIELD = create_model_field(
+    name="Response_bench", type_=LatestResultsResponse, mode="serialization"
+)
+
+
+def old_path(rows: list[dict]) -> bytes:
+    content = LatestResultsResponse(items=[LatestResultItem(**r) for r in rows])
+    body = anyio.run(lambda: serialize_response(field=_FIELD, response_content=content))
+    return bytes(JSONResponse(body).body)
+
+
+def fast_path(rows: list[dict]) -> bytes:
+    # the JSON branch of app.api.responses.results_response
+    return to_json(
+        {"generated_at": utcnow(), "items": project(rows, LatestResultItem), "next_cursor": None}
+    )
+
+
+def per_row_us(fn: Callable[[list[dict]], bytes], rows: list[dict], repeat: int) -> float:
+    fn(rows)  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.process_time()
+        fn(rows)
+        best = min(best, time.process_time() - t0)
+    return best / len(rows) * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--rows", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rows = make_rows(args.rows)
+    old = per_row_us(old_path, rows, args.repeat)
+    fast = per_row_us(fast_path, rows, args.repeat)
+    print(f"rows per page: {args.rows}")
+    print(f"old path:  {old:7.2f} us/row")
+    print(f"fast path: {fast:7.2f} us/row  ({old / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
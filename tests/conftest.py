@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session, sessionmaker
 import app.api as app
 from alembic import command
 from alembic.config import Config
+from app.api.routes.health import clear_health_cache
 
 TEST_DATABASE_URL = os.getenv(
     "TEST_DATABASE_URL",
@@ -33,13 +34,38 @@ def apply_migrations() -> Iterator[None]:
     yield
 
 
+class _AsyncSessionAdapter:
+    """
+    Lets async repo functions run on a test session.
+
+    The async engine cannot join the test's connection, whose open transaction holds
+    the test data, so the async path executes through the same sync session instead.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    async def execute(self, *args, **kwargs):
+        return self._session.execute(*args, **kwargs)
+
+    async def commit(self) -> None:
+        self._session.commit()
+
+    async def rollback(self) -> None:
+        self._session.rollback()
+
+    async def close(self) -> None:
+        self._session.close()
+
+
 @pytest.fixture()
 def db_session(engine, monkeypatch) -> Iterator[Session]:
     """
     Per-test session isolated by outer transaction + SAVEPOINT.
 
     Any repo calls that use session_scope(existing=None) will still use this
-    same connection because we patch app.db.SessionLocal.
+    same connection because we patch app.db.SessionLocal (and AsyncSessionLocal,
+    for async_session_scope).
     """
     connection = engine.connect()
     outer_txn = connection.begin()
@@ -71,6 +97,9 @@ def db_session(engine, monkeypatch) -> Iterator[Session]:
     import app.db as app_db
 
     monkeypatch.setattr(app_db, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(
+        app_db, "AsyncSessionLocal", lambda: _AsyncSessionAdapter(TestingSessionLocal())
+    )
 
     try:
         yield session
@@ -82,5 +111,7 @@ def db_session(engine, monkeypatch) -> Iterator[Session]:
 
 @pytest.fixture()
 def client(db_session):
+    # responses cached by an earlier test would leak into this one
+    clear_health_cache()
     with TestClient(app.app) as c:
         yield c
@@ -8,6 +8,8 @@ from uuid import UUID
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.repos.results import insert_probe_results
+
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_INTERVAL = 30
 DEFAULT_TIMEOUT_MS = 1000
@@ -59,21 +61,19 @@ def insert_result(
     error: Optional[str] = None,
 ) -> None:
     """
-    Insert a row into probe_results. Does not commit.
+    Insert a row into probe_results through the result writer's bulk insert, so
+    target_latest moves forward too. Does not commit.
     """
-    s.execute(
-        text("""
-            INSERT INTO probe_results
-              (target_id, ts, success, latency_ms, status_code, error)
-            VALUES
-              (:target_id, :ts, :success, :latency_ms, :status_code, :error)
-            """),
-        {
-            "target_id": str(target_id),
-            "ts": ts,
-            "success": success,
-            "latency_ms": latency_ms,
-            "status_code": status_code,
-            "error": (error[:500] if error else None),
-        },
+    insert_probe_results(
+        [
+            {
+                "target_id": target_id,
+                "ts": ts,
+                "success": success,
+                "latency_ms": latency_ms,
+                "status_code": status_code,
+                "error": (error[:500] if error else None),
+            }
+        ],
+        s=s,
     )
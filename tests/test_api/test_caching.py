@@ -0,0 +1,181 @@
+import uuid
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.api.caching import make_etag, range_cache_control
+from app.poller.config import TargetCfg
+from app.repos.sync import sync_targets_to_db
+from tests.db_helpers import insert_result, insert_target
+
+
+def test_list_targets_etag_changes_with_targets(client, db_session):
+    insert_target(db_session, tid=uuid.uuid4(), name="etag-a")
+
+    r = client.get("/targets")
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "no-cache"
+
+    r = client.get("/targets", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert r.content == b""
+
+    # another status is another representation
+    assert client.get("/targets?status=all").headers["etag"] != etag
+
+    # the trigger bumps the version for any change to targets
+    db_session.execute(text("UPDATE targets SET name = 'etag-b' WHERE name = 'etag-a'"))
+    r = client.get("/targets", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert "etag-b" in {i["name"] for i in r.json()["items"]}
+
+
+def test_unchanged_target_sync_keeps_the_etag(client, db_session):
+    cfg = [
+        TargetCfg(
+            name="etag-sync",
+            type="icmp",
+            host="10.0.0.1",
+            url=None,
+            interval_seconds=30,
+            timeout_ms=1000,
+            enabled=True,
+        )
+    ]
+    sync_targets_to_db(cfg, s=db_session)
+    etag = client.get("/targets").headers["etag"]
+
+    # a poller restart syncs the same config: nothing is written
+    sync_targets_to_db(cfg, s=db_session)
+    assert client.get("/targets", headers={"If-None-Match": etag}).status_code == 304
+
+    sync_targets_to_db([replace(cfg[0], timeout_ms=500)], s=db_session)
+    assert client.get("/targets", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_latest_by_target_etag_changes_with_results(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="etag-latest")
+    now = datetime.now(timezone.utc)
+    insert_result(db_session, target_id=tid, ts=now)
+
+    etag = client.get("/results/latest-by-target").headers["etag"]
+    r = client.get("/results/latest-by-target", headers={"If-None-Match": f'W/"x", {etag}'})
+    assert r.status_code == 304
+
+    # a late result does not change the latest rows, but it still invalidates
+    insert_result(db_session, target_id=tid, ts=now - timedelta(hours=2))
+    r = client.get("/results/latest-by-target", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+
+
+def test_latest_etag_changes_when_lower_ids_commit_later(client, db_session):
+    # A writer holding lower ids can commit after one with higher ids; the token must
+    # still move. Sequence changes are not rolled back, so the position is restored.
+    t1, t2 = uuid.uuid4(), uuid.uuid4()
+    insert_target(db_session, tid=t1, name="etag-order-a")
+    insert_target(db_session, tid=t2, name="etag-order-b")
+    now = datetime.now(timezone.utc)
+    insert_result(db_session, target_id=t1, ts=now)
+    high = db_session.execute(text("SELECT MAX(id) FROM probe_results")).scalar_one()
+
+    etag = client.get("/results/latest").headers["etag"]
+    try:
+        db_session.execute(text("SELECT setval('probe_results_id_seq', :v)"), {"v": high - 100})
+        insert_result(db_session, target_id=t2, ts=now)
+    finally:
+        db_session.execute(text("SELECT setval('probe_results_id_seq', :v)"), {"v": high})
+
+    assert db_session.execute(text("SELECT MAX(id) FROM probe_results")).scalar_one() == high
+    r = client.get("/results/latest", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert "etag-order-b" in {i["target_name"] for i in r.json()["items"]}
+
+
+def test_etag_varies_with_representation(client, db_session):
+    insert_target(db_session, tid=uuid.uuid4(), name="etag-repr")
+
+    plain = client.get(
+        "/results/latest-by-target", headers={"Accept-Encoding": "identity"}
+    ).headers["etag"]
+    gzipped = client.get("/results/latest-by-target", headers={"Accept-Encoding": "gzip"}).headers[
+        "etag"
+    ]
+    assert plain != gzipped
+
+    r = client.get(
+        "/results/latest-by-target",
+        headers={"If-None-Match": plain, "Accept-Encoding": "gzip"},
+    )
+    assert r.status_code == 200
+
+
+def test_not_modified_repeats_vary_and_cache_control(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="etag-vary")
+    until = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+
+    for path, params in [
+        ("/results/latest", {"until": until}),
+        ("/results/latest-by-target", {}),
+        (f"/targets/{tid}/results", {"until": until}),
+        ("/results/history", {"until": until}),
+    ]:
+        ok = client.get(path, params=params)
+        r = client.get(path, params=params, headers={"If-None-Match": ok.headers["etag"]})
+        assert r.status_code == 304, path
+        assert r.headers["vary"] == ok.headers["vary"], path
+        assert r.headers["cache-control"] == ok.headers["cache-control"], path
+
+
+def test_target_results_etag_and_cache_control(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="etag-target")
+    now = datetime.now(timezone.utc)
+    insert_result(db_session, target_id=tid, ts=now - timedelta(days=1))
+
+    r = client.get(f"/targets/{tid}/results")
+    assert r.headers["cache-control"] == "no-cache"
+    etag = r.headers["etag"]
+    assert client.get(f"/targets/{tid}/results", headers={"If-None-Match": etag}).status_code == 304
+
+    insert_result(db_session, target_id=tid, ts=now)
+    assert client.get(f"/targets/{tid}/results", headers={"If-None-Match": etag}).status_code == 200
+
+    until = (now - timedelta(hours=12)).isoformat()
+    r = client.get(f"/targets/{tid}/results", params={"until": until})
+    assert r.headers["cache-control"] == "public, max-age=300"
+    assert len(r.json()["items"]) == 1
+
+    r = client.get(f"/targets/{uuid.uuid4()}/results", headers={"If-None-Match": "*"})
+    assert r.status_code == 404
+
+
+def test_range_cache_control():
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert range_cache_control(None, now) == "no-cache"
+    assert range_cache_control(now - timedelta(minutes=30), now) == "no-cache"
+    assert range_cache_control(now - timedelta(hours=1), now) == "public, max-age=300"
+    # no offset: read as UTC instead of failing to compare with an aware time
+    naive = (now - timedelta(hours=2)).replace(tzinfo=None)
+    assert range_cache_control(naive, now) == "public, max-age=300"
+
+
+def test_naive_until_is_accepted(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="etag-naive")
+    params = {"until": "2026-01-01T00:00:00"}
+
+    for path in ("/results/latest", f"/targets/{tid}/results", "/results/history"):
+        r = client.get(path, params=params)
+        assert r.status_code == 200, path
+        assert r.headers["cache-control"] != "no-cache"
+
+
+def test_make_etag_is_weak_and_stable():
+    assert make_etag("a", (1, 2)) == make_etag("a", (1, 2))
+    assert make_etag("a", (1, 2)) != make_etag("a", (1, 3))
+    assert make_etag("a").startswith('W/"')
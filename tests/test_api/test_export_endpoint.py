@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from tests.db_helpers import insert_result, insert_target
+
+
+def _seed(db_session) -> tuple[uuid.UUID, uuid.UUID, datetime]:
+    t1 = uuid.uuid4()
+    t2 = uuid.uuid4()
+    insert_target(db_session, tid=t1, name="exp-a")
+    insert_target(db_session, tid=t2, name="exp-b")
+
+    base = datetime(2026, 1, 5, 10, 0, tzinfo=timezone.utc)
+    insert_result(db_session, target_id=t1, ts=base, latency_ms=5)
+    insert_result(
+        db_session,
+        target_id=t1,
+        ts=base + timedelta(seconds=30),
+        success=False,
+        latency_ms=None,
+        error="timeout, again",
+    )
+    insert_result(db_session, target_id=t2, ts=base + timedelta(seconds=10))
+    return t1, t2, base
+
+
+def test_export_ndjson(client, db_session):
+    t1, _, base = _seed(db_session)
+
+    r = client.get(
+        "/results/export",
+        params={"target_id": str(t1), "since": base.isoformat()},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["latency_ms"] for row in rows] == [5, None]
+    assert rows[0]["target_name"] == "exp-a"
+    assert rows[1]["error"] == "timeout, again"
+
+
+def test_export_csv_multiple_targets(client, db_session):
+    t1, t2, base = _seed(db_session)
+
+    r = client.get(
+        "/results/export",
+        params={
+            "format": "csv",
+            "target_id": [str(t1), str(t2)],
+            "since": base.isoformat(),
+            "until": (base + timedelta(seconds=20)).isoformat(),
+        },
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [row["target_name"] for row in rows] == ["exp-a", "exp-b"]
+    assert rows[0]["success"] == "true"
+    assert rows[1]["latency_ms"] == "10"
+
+
+def test_export_bad_params(client):
+    assert client.get("/results/export?format=xml").status_code == 400
+
+    r = client.get(
+        "/results/export",
+        params={"since": "2026-01-02T00:00:00Z", "until": "2026-01-01T00:00:00Z"},
+    )
+    assert r.status_code == 400
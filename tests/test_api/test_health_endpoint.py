@@ -1,6 +1,9 @@
 import uuid
 from datetime import datetime, timedelta, timezone
 
+import anyio
+import pytest
+
 from tests.db_helpers import insert_result, insert_target
 
 
@@ -44,3 +47,71 @@ def test_health_with_stale_result(client, db_session):
     payload = r.json()
     assert payload["stats"]["enabled_targets"] == 1
     assert payload["ok"] is False
+
+
+def test_health_per_target_breakdown(client, db_session):
+    fresh = uuid.uuid4()
+    stale = uuid.uuid4()
+    insert_target(db_session, tid=fresh, name="t-a-fresh", interval_seconds=60)
+    insert_target(db_session, tid=stale, name="t-b-stale", interval_seconds=10)
+    insert_target(db_session, tid=uuid.uuid4(), name="t-c-new", interval_seconds=10)
+
+    now = datetime.now(timezone.utc)
+    insert_result(db_session, target_id=fresh, ts=now - timedelta(seconds=60))
+    insert_result(db_session, target_id=stale, ts=now - timedelta(seconds=60))
+
+    assert client.get("/health").json()["targets"] is None
+
+    r = client.get("/health?targets=true")
+    assert r.status_code == 200
+    items = {t["target_name"]: t for t in r.json()["targets"]}
+    assert items["t-a-fresh"]["stale_after_seconds"] == 90
+    assert items["t-a-fresh"]["stale"] is False
+    assert items["t-b-stale"]["stale_after_seconds"] == 30
+    assert items["t-b-stale"]["stale"] is True
+    assert items["t-c-new"]["last_result_ts"] is None
+    assert items["t-c-new"]["stale"] is True
+
+
+def test_health_is_cached(client, db_session, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "health_cache_seconds", 60.0)
+    first = client.get("/health").json()
+
+    insert_target(db_session, tid=uuid.uuid4(), name="t-cached")
+    assert client.get("/health").json() == first
+
+    monkeypatch.setattr(settings, "health_cache_seconds", 0.0)
+    assert client.get("/health").json()["stats"]["enabled_targets"] == 1
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_health_refreshes_once_for_concurrent_requests(monkeypatch):
+    from app.api.routes import health as health_mod
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "health_cache_seconds", 60.0)
+    health_mod.clear_health_cache()
+    calls = 0
+
+    async def slow_compute(include_targets):
+        nonlocal calls
+        calls += 1
+        await anyio.sleep(0.05)
+        return health_mod._db_down()
+
+    monkeypatch.setattr(health_mod, "_compute_health", slow_compute)
+    try:
+        async with anyio.create_task_group() as tg:
+            for _ in range(10):
+                tg.start_soon(health_mod.health)
+    finally:
+        health_mod.clear_health_cache()
+
+    assert calls == 1
@@ -0,0 +1,217 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import anyio
+import psycopg
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.api.live import ResultHub, sse_events
+from app.config import settings
+from app.constants import RESULTS_CHANNEL
+from app.repos import results as results_repo
+from tests.conftest import TEST_DATABASE_URL
+from tests.db_helpers import insert_target
+
+
+@pytest.fixture
+def anyio_backend():
+    # psycopg's async driver runs on asyncio
+    return "asyncio"
+
+
+def _row(target_id: uuid.UUID, rid: int) -> dict:
+    return {
+        "id": rid,
+        "target_id": target_id,
+        "target_name": "live",
+        "ts": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "success": True,
+        "latency_ms": 5,
+        "status_code": None,
+        "error": None,
+    }
+
+
+def _new_result(target_id: uuid.UUID, ts: datetime) -> dict:
+    return {
+        "target_id": target_id,
+        "ts": ts,
+        "success": True,
+        "latency_ms": 3,
+        "status_code": None,
+        "error": None,
+    }
+
+
+def test_publish_fans_out_by_target():
+    t1, t2 = uuid.uuid4(), uuid.uuid4()
+    hub = ResultHub(buffer=10)
+
+    with hub.subscribe() as everything, hub.subscribe(frozenset({t1})) as only_t1:
+        assert hub.subscribers == 2
+        hub.publish([_row(t1, 1), _row(t2, 2)])
+
+        assert [everything.receive_nowait(), everything.receive_nowait()][1].startswith(
+            b"id: 2\nevent: result\ndata: "
+        )
+        event = only_t1.receive_nowait()
+        assert json.loads(event.split(b"data: ")[1]) == {
+            "target_id": str(t1),
+            "target_name": "live",
+            "ts": "2026-01-01T00:00:00Z",
+            "success": True,
+            "latency_ms": 5,
+            "status_code": None,
+            "error": None,
+        }
+        with pytest.raises(anyio.WouldBlock):
+            only_t1.receive_nowait()
+
+    assert hub.subscribers == 0
+
+
+def test_slow_subscriber_is_dropped():
+    tid = uuid.uuid4()
+    hub = ResultHub(buffer=1)
+
+    with hub.subscribe() as events:
+        hub.publish([_row(tid, 1), _row(tid, 2)])
+        assert hub.subscribers == 0
+        assert events.receive_nowait().startswith(b"id: 1\n")
+        with pytest.raises(anyio.EndOfStream):
+            events.receive_nowait()
+
+
+class FakeTaskGroup:
+    def __init__(self) -> None:
+        self.started: list = []
+
+    def start_soon(self, func, *args) -> None:
+        self.started.append(func)
+
+
+def test_listener_starts_again_in_a_new_task_group():
+    hub = ResultHub(buffer=10)
+    first, second = FakeTaskGroup(), FakeTaskGroup()
+
+    hub.start(first)  # type: ignore[arg-type]
+    with hub.subscribe(), hub.subscribe():
+        pass
+    assert len(first.started) == 1
+
+    # e.g. the app's lifespan ran again; the first listener was cancelled with it
+    hub.start(second)  # type: ignore[arg-type]
+    with hub.subscribe():
+        pass
+    assert len(second.started) == 1
+
+
+@pytest.mark.anyio
+async def test_listener_can_restart_after_it_ends():
+    hub = ResultHub(buffer=10)
+    tg = FakeTaskGroup()
+    hub.start(tg)  # type: ignore[arg-type]
+    with hub.subscribe():
+        pass
+
+    async def stopped() -> None:
+        raise anyio.get_cancelled_exc_class()()
+
+    hub._listen = stopped  # type: ignore[method-assign]
+    with pytest.raises(anyio.get_cancelled_exc_class()):
+        await hub.listen_forever()
+
+    with hub.subscribe():
+        pass
+    assert len(tg.started) == 2
+
+
+@pytest.mark.anyio
+async def test_sse_events_sends_events_and_heartbeats():
+    tid = uuid.uuid4()
+    hub = ResultHub(buffer=10)
+    stream = sse_events(hub, None, heartbeat_s=0.01)
+
+    assert await stream.__anext__() == b": subscribed\n\n"
+    assert await stream.__anext__() == b": ping\n\n"
+    hub.publish([_row(tid, 7)])
+    assert (await stream.__anext__()).startswith(b"id: 7\n")
+
+    await stream.aclose()
+    assert hub.subscribers == 0
+
+
+@pytest.mark.anyio
+async def test_handle_notification_publishes_announced_rows(db_session):
+    tid, other = uuid.uuid4(), uuid.uuid4()
+    insert_target(db_session, tid=tid, name="live-a")
+    insert_target(db_session, tid=other, name="live-b")
+    now = datetime.now(timezone.utc)
+    results_repo.insert_probe_results(
+        [_new_result(t, now) for t in (tid, other)],
+        s=db_session,
+    )
+    ids = db_session.execute(
+        text("SELECT id FROM probe_results WHERE target_id IN (:a, :b) ORDER BY id"),
+        {"a": tid, "b": other},
+    ).scalars()
+
+    hub = ResultHub(buffer=10)
+    with hub.subscribe(frozenset({tid})) as events:
+        payload = {
+            "since": (now - timedelta(seconds=1)).isoformat(),
+            "until": now.isoformat(),
+            "ids": list(ids),
+        }
+        await hub.handle_notification(json.dumps(payload))
+        event = events.receive_nowait()
+        with pytest.raises(anyio.WouldBlock):
+            events.receive_nowait()
+
+    assert json.loads(event.split(b"data: ")[1])["target_name"] == "live-a"
+
+
+def test_insert_probe_results_notifies_on_commit(engine, monkeypatch):
+    # Notifications are only sent on commit, so this test commits and cleans up after.
+    conninfo = make_url(TEST_DATABASE_URL).set(drivername="postgresql")
+    tid = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+
+    with psycopg.connect(conninfo.render_as_string(hide_password=False), autocommit=True) as lis:
+        lis.execute(f"LISTEN {RESULTS_CHANNEL}")
+        try:
+            with Session(engine) as session:
+                insert_target(session, tid=tid, name="live-notify", enabled=False)
+                # off by default
+                results_repo.insert_probe_results([_new_result(tid, now)], s=session)
+                session.commit()
+            assert list(lis.notifies(timeout=0.5)) == []
+
+            monkeypatch.setattr(settings, "results_notify_enabled", True)
+            with Session(engine) as session:
+                results_repo.insert_probe_results(
+                    [_new_result(tid, now - timedelta(seconds=i + 1)) for i in range(300)],
+                    s=session,
+                )
+                session.commit()
+
+            notes = list(lis.notifies(timeout=5, stop_after=2))
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM probe_results WHERE target_id = :id"), {"id": tid})
+                conn.execute(text("DELETE FROM targets WHERE id = :id"), {"id": tid})
+
+    # 300 ids do not fit one payload
+    payloads = [json.loads(n.payload) for n in notes]
+    assert sorted(len(p["ids"]) for p in payloads) == [50, 250]
+    assert datetime.fromisoformat(payloads[0]["since"]) >= now - timedelta(seconds=300)
+
+
+def test_stream_needs_notifications(client, monkeypatch):
+    monkeypatch.setattr(settings, "results_notify_enabled", False)
+    r = client.get("/results/stream")
+    assert r.status_code == 503
@@ -0,0 +1,136 @@
+import gzip
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from starlette.requests import Request
+
+from app.api.responses import negotiate_encoding, negotiate_media_type, results_response
+from app.api.schemas import LatestResultItem, LatestResultsResponse
+from tests.db_helpers import insert_result, insert_target
+
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+def _request(**headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+def _rows(n: int = 3) -> list[dict]:
+    now = datetime(2026, 2, 20, 16, 42, tzinfo=timezone.utc)
+    tid = uuid.uuid4()
+    return [
+        {
+            "id": i,  # not part of the schema
+            "target_id": tid,
+            "target_name": "rüter",
+            "ts": now - timedelta(seconds=i),
+            "success": i % 2 == 0,
+            "latency_ms": None if i % 2 else i,
+            "status_code": None,
+            "error": "timeout" if i % 2 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def test_json_matches_schema_serialization():
+    now = datetime(2026, 2, 20, 16, 42, tzinfo=timezone.utc)
+    rows = _rows()
+
+    fast = results_response(
+        _request(),
+        {"generated_at": now, "items": rows, "next_cursor": None},
+        LatestResultItem,
+    )
+    model = LatestResultsResponse(
+        generated_at=now,
+        items=[LatestResultItem(**r) for r in rows],
+        next_cursor=None,
+    )
+
+    assert fast.body == model.model_dump_json().encode("utf-8")
+    assert fast.media_type == "application/json"
+
+
+def test_negotiation():
+    assert negotiate_media_type(None) == "application/json"
+    assert negotiate_media_type("text/html,*/*;q=0.8") == "application/json"
+    assert negotiate_media_type("application/x-msgpack") == "application/msgpack"
+    assert negotiate_media_type(f"application/json;q=0.5, {ARROW}") == ARROW
+    assert negotiate_media_type("text/csv") is None
+
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0.5, zstd") in ("zstd", "gzip")
+    assert negotiate_encoding("br, zstd;q=0, gzip;q=0") is None
+
+
+def test_gzip_only_for_large_bodies():
+    payload = {"generated_at": None, "items": _rows(50), "next_cursor": None}
+
+    small = results_response(
+        _request(accept_encoding="gzip"), {**payload, "items": []}, LatestResultItem
+    )
+    assert "content-encoding" not in small.headers
+
+    big = results_response(_request(accept_encoding="gzip"), payload, LatestResultItem)
+    assert big.headers["content-encoding"] == "gzip"
+    assert big.headers["vary"] == "Accept, Accept-Encoding"
+    assert gzip.decompress(big.body).startswith(b'{"generated_at":null,"items":[')
+
+
+def test_arrow_response_is_columnar():
+    pa = pytest.importorskip("pyarrow")
+    rows = _rows()
+
+    resp = results_response(
+        _request(accept=ARROW),
+        {"generated_at": None, "items": rows, "next_cursor": "abc"},
+        LatestResultItem,
+    )
+    assert resp.media_type == ARROW
+
+    table = pa.ipc.open_stream(resp.body).read_all()
+    assert table.column_names == list(LatestResultItem.model_fields)
+    assert table.column("latency_ms").to_pylist() == [0, None, 2]
+    assert table.column("ts").to_pylist()[0] == rows[0]["ts"]
+    assert table.column("target_name").type == pa.dictionary(pa.int32(), pa.string())
+    assert b'"next_cursor":"abc"' in table.schema.metadata[b"pingu"]
+
+
+def test_msgpack_response_is_columnar():
+    msgpack = pytest.importorskip("msgpack")
+    rows = _rows()
+
+    resp = results_response(
+        _request(accept="application/msgpack"),
+        {"generated_at": rows[0]["ts"], "items": rows, "next_cursor": None},
+        LatestResultItem,
+    )
+
+    body = msgpack.unpackb(resp.body, timestamp=3)
+    assert body["generated_at"] == rows[0]["ts"]
+    assert body["items"]["success"] == [True, False, True]
+    assert body["items"]["target_id"] == [str(rows[0]["target_id"])] * 3
+    assert "id" not in body["items"]
+
+
+def test_results_endpoint_formats(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="fmt-a")
+    insert_result(db_session, target_id=tid, ts=datetime.now(timezone.utc))
+
+    r = client.get(f"/targets/{tid}/results", headers={"Accept": "text/csv"})
+    assert r.status_code == 406
+    assert "application/json" in r.json()["detail"]
+
+    pa = pytest.importorskip("pyarrow")
+    r = client.get("/results/latest-by-target", headers={"Accept": ARROW})
+    assert r.status_code == 200
+    table = pa.ipc.open_stream(r.content).read_all()
+    assert "fmt-a" in table.column("target_name").to_pylist()
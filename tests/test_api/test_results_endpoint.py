@@ -42,3 +42,87 @@ def test_results_latest_by_target(client, db_session):
     # should include both target names
     names = {it["target_name"] for it in items}
     assert "by-a" in names and "by-b" in names
+
+
+def test_results_latest_cursor_pages(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="page-a")
+
+    # in the future so no other rows sort in between
+    base = datetime.now(timezone.utc) + timedelta(days=3650)
+    for i in range(3):
+        insert_result(db_session, target_id=tid, ts=base - timedelta(seconds=i), latency_ms=i)
+
+    r = client.get("/results/latest", params={"limit": 2})
+    assert r.status_code == 200
+    first = r.json()
+    assert [it["latency_ms"] for it in first["items"]] == [0, 1]
+    assert first["next_cursor"]
+
+    r = client.get("/results/latest", params={"limit": 2, "cursor": first["next_cursor"]})
+    second = r.json()
+    assert second["items"][0]["latency_ms"] == 2
+
+
+def test_target_results_cursor_pages_and_bad_cursor(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="page-b")
+
+    now = datetime.now(timezone.utc)
+    for i in range(3):
+        insert_result(db_session, target_id=tid, ts=now - timedelta(seconds=i))
+
+    seen: list[int] = []
+    params: dict = {"limit": 2}
+    while True:
+        body = client.get(f"/targets/{tid}/results", params=params).json()
+        seen.extend(it["id"] for it in body["items"])
+        if body["next_cursor"] is None:
+            break
+        params["cursor"] = body["next_cursor"]
+    assert len(seen) == len(set(seen)) == 3
+
+    r = client.get(f"/targets/{tid}/results", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "invalid cursor"
+
+
+def test_results_history_groups_targets(client, db_session):
+    t1, t2, idle = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    insert_target(db_session, tid=t1, name="hist-a")
+    insert_target(db_session, tid=t2, name="hist-b")
+    insert_target(db_session, tid=idle, name="hist-c")
+
+    now = datetime.now(timezone.utc)
+    for i in range(3):
+        insert_result(db_session, target_id=t1, ts=now - timedelta(seconds=i), latency_ms=i)
+    insert_result(db_session, target_id=t2, ts=now, latency_ms=7)
+
+    params: dict = {"target_id": [str(t2), str(t1), str(idle)], "limit": 2}
+    r = client.get("/results/history", params=params)
+    assert r.status_code == 200
+    body = r.json()
+    assert [t["target_name"] for t in body["targets"]] == ["hist-a", "hist-b", "hist-c"]
+    assert [it["latency_ms"] for it in body["targets"][0]["items"]] == [0, 1]
+    assert body["targets"][1]["items"][0]["target_id"] == str(t2)
+    assert body["targets"][2]["items"] == []
+
+    etag = r.headers["etag"]
+    r = client.get("/results/history", params=params, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    # without ids: every enabled target
+    names = {t["target_name"] for t in client.get("/results/history").json()["targets"]}
+    assert {"hist-a", "hist-b", "hist-c"} <= names
+
+
+def test_results_history_rejects_bad_params(client, db_session):
+    r = client.get("/results/history", params={"target_id": [str(uuid.uuid4())] * 501})
+    assert r.status_code == 400
+
+    now = datetime.now(timezone.utc)
+    r = client.get(
+        "/results/history",
+        params={"since": now.isoformat(), "until": (now - timedelta(hours=1)).isoformat()},
+    )
+    assert r.status_code == 400
@@ -0,0 +1,47 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from tests.db_helpers import insert_result, insert_target
+
+
+def test_summary_lists_enabled_targets(client, db_session):
+    t1 = uuid.uuid4()
+    t2 = uuid.uuid4()
+    insert_target(db_session, tid=t1, name="s-a")
+    insert_target(db_session, tid=t2, name="s-b", enabled=False)
+
+    now = datetime.now(timezone.utc)
+    insert_result(db_session, target_id=t1, ts=now - timedelta(seconds=30), latency_ms=12)
+    insert_result(db_session, target_id=t1, ts=now - timedelta(seconds=20), success=False)
+
+    r = client.get("/summary?window=15m")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["window"] == "15m"
+    items = {it["target_name"]: it for it in body["items"]}
+    assert "s-b" not in items
+    assert items["s-a"]["total_probes"] == 2
+    assert items["s-a"]["uptime_percent"] == 50.0
+
+
+def test_summary_for_target(client, db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="s-one")
+    insert_result(db_session, target_id=tid, ts=datetime.now(timezone.utc), latency_ms=8)
+
+    r = client.get(f"/summary/{tid}?window=7d")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["target_id"] == str(tid)
+    assert body["window"] == "7d"
+    assert body["total_probes"] == 1
+    assert body["avg_latency_ms"] == 8.0
+
+
+def test_summary_errors(client):
+    r = client.get("/summary?window=soon")
+    assert r.status_code == 400
+    assert r.json()["detail"] == "invalid window format, expected like 15m, 1h, 7d"
+
+    assert client.get("/summary?window=400d").status_code == 400
+    assert client.get(f"/summary/{uuid.uuid4()}").status_code == 404
@@ -1,6 +1,12 @@
 import uuid
 from datetime import datetime, timedelta, timezone
 
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import app.api as app
+from app import db as app_db
 from tests.db_helpers import insert_result, insert_target
 
 
@@ -67,3 +73,37 @@ def test_target_results_range_and_bad_range(client, db_session):
         params={"since": until, "until": since},
     )
     assert r.status_code == 400
+
+
+def test_target_routes_on_the_async_driver(engine):
+    # The other API tests run the async readers on the per-test sync session. This one
+    # goes through the real psycopg async engine, so it commits its rows and cleans up.
+    tid = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        insert_target(session, tid=tid, name="async-driver")
+        insert_result(session, target_id=tid, ts=now)
+        session.commit()
+
+    try:
+        with TestClient(app.app) as c:
+            try:
+                r = c.get(f"/targets/{tid}")
+                assert r.status_code == 200
+                assert r.json()["name"] == "async-driver"
+
+                r = c.get(f"/targets/{tid}/results")
+                assert r.status_code == 200
+                assert [i["target_id"] for i in r.json()["items"]] == [str(tid)]
+
+                etag = r.headers["etag"]
+                r = c.get(f"/targets/{tid}/results", headers={"If-None-Match": etag})
+                assert r.status_code == 304
+            finally:
+                # pooled connections belong to this client's event loop
+                assert c.portal is not None
+                c.portal.call(app_db._async_engine.dispose)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM probe_results WHERE target_id = :id"), {"id": tid})
+            conn.execute(text("DELETE FROM targets WHERE id = :id"), {"id": tid})
@@ -0,0 +1,40 @@
+from app.poller.admission import AdmissionControl, TokenBucket
+
+
+def test_token_bucket_bursts_then_refills():
+    bucket = TokenBucket(rate=2.0, burst=2, now=0.0)
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.5
+    assert bucket.take(0.5) == 0.0
+    assert bucket.is_full(10.0)
+
+
+def test_admission_caps_in_flight_with_headroom_for_priority():
+    ac = AdmissionControl(max_in_flight=4, low_share=0.5)
+
+    assert ac.admit("low", None, 0.0).admitted
+    assert ac.admit("low", None, 0.0).admitted
+    # low-priority probes may only use half of the slots
+    refused = ac.admit("low", None, 0.0)
+    assert not refused.admitted and refused.retry_after is None
+
+    assert ac.admit("normal", None, 0.0).admitted
+    assert ac.admit("high", None, 0.0).admitted
+    assert not ac.admit("high", None, 0.0).admitted
+
+    ac.release()
+    assert ac.has_capacity("high")
+    assert not ac.has_capacity("low")
+
+
+def test_admission_rate_limits_per_host():
+    ac = AdmissionControl(max_in_flight=100, host_rate=1.0, host_burst=1)
+
+    assert ac.admit("normal", "a.example", 0.0).admitted
+    limited = ac.admit("normal", "a.example", 0.0)
+    assert not limited.admitted
+    assert limited.retry_after == 1.0
+    # other hosts have their own bucket
+    assert ac.admit("normal", "b.example", 0.0).admitted
+    assert ac.admit("normal", "a.example", 1.0).admitted
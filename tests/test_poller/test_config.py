@@ -0,0 +1,61 @@
+import pytest
+
+from app.poller.config import load_targets
+
+
+def _write(tmp_path, body: str) -> str:
+    path = tmp_path / "targets.yaml"
+    path.write_text(body, encoding="utf-8")
+    return str(path)
+
+
+def test_load_targets_defaults(tmp_path):
+    path = _write(
+        tmp_path,
+        """
+targets:
+  - name: web
+    type: http
+    url: http://example.com
+    interval_seconds: 30
+    timeout_ms: 1000
+""",
+    )
+    (t,) = load_targets(path)
+    assert t.connection == "cold"
+    assert t.priority == "normal"
+    assert t.enabled is True
+
+
+def test_load_targets_rejects_unknown_connection(tmp_path):
+    path = _write(
+        tmp_path,
+        """
+targets:
+  - name: web
+    type: http
+    url: http://example.com
+    interval_seconds: 30
+    timeout_ms: 1000
+    connection: hot
+""",
+    )
+    with pytest.raises(ValueError, match="target 'web': connection"):
+        load_targets(path)
+
+
+def test_load_targets_rejects_unknown_priority(tmp_path):
+    path = _write(
+        tmp_path,
+        """
+targets:
+  - name: router
+    type: icmp
+    host: 10.0.0.1
+    interval_seconds: 30
+    timeout_ms: 1000
+    priority: urgent
+""",
+    )
+    with pytest.raises(ValueError, match="target 'router': priority"):
+        load_targets(path)
@@ -0,0 +1,67 @@
+import httpx
+import pytest
+
+import app.poller.http as http_mod
+from app.poller.http import HttpClientPool, http_probe_once
+
+
+class FakePool:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.keys: list[int] = []
+
+    def get(self, *, timeout_ms: int, follow_redirects: bool = True) -> httpx.AsyncClient:
+        self.keys.append(timeout_ms)
+        return self.client
+
+
+@pytest.mark.anyio
+async def test_http_probe_once_warm_reuses_pooled_client(monkeypatch):
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        return httpx.Response(204)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    pool = FakePool(client)
+    monkeypatch.setattr(http_mod, "get_client_pool", lambda: pool)
+
+    for _ in range(2):
+        success, latency_ms, status_code, error = await http_probe_once(
+            "https://example.com/", 500, mode="warm"
+        )
+        assert success is True
+        assert latency_ms is not None and latency_ms >= 0
+        assert status_code == 204
+        assert error is None
+
+    assert seen == ["https://example.com/", "https://example.com/"]
+    assert pool.keys == [500, 500]
+    assert client.is_closed is False
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_http_probe_once_rejects_unknown_mode():
+    success, latency_ms, status_code, error = await http_probe_once(
+        "https://example.com/", 500, mode="lukewarm"
+    )
+    assert success is False
+    assert latency_ms is None and status_code is None
+    assert error == "invalid connection mode: lukewarm"
+
+
+@pytest.mark.anyio
+async def test_http_client_pool_keys_clients_by_settings():
+    pool = HttpClientPool(max_connections=10, max_keepalive_connections=5, keepalive_expiry_s=60)
+
+    a = pool.get(timeout_ms=1000)
+    assert pool.get(timeout_ms=1000) is a
+    assert pool.get(timeout_ms=2000) is not a
+    assert pool.get(timeout_ms=1000, follow_redirects=False) is not a
+
+    await pool.aclose()
+    assert a.is_closed
+    assert pool.get(timeout_ms=1000) is not a
+    await pool.aclose()
@@ -0,0 +1,138 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from app.poller.icmp_engine import (
+    ICMP_DEST_UNREACHABLE,
+    ICMP_ECHO_REPLY,
+    IcmpEngine,
+    _Pending,
+    build_echo_request,
+    checksum,
+    parse_icmp,
+)
+
+
+def _ip_header(src: bytes = b"\x0a\x00\x00\x01") -> bytes:
+    # minimal 20 byte IPv4 header (IHL=5); only the length nibble matters to the parser
+    return b"\x45" + bytes(11) + src + b"\x0a\x00\x00\x02"
+
+
+def test_echo_request_checksum_verifies():
+    pkt = build_echo_request(0x1234, 7)
+    assert len(pkt) == 64
+    assert pkt[0] == 8
+    # a packet including its own checksum sums to zero
+    assert checksum(pkt) == 0
+
+
+def test_parse_echo_reply_with_and_without_ip_header():
+    reply = bytearray(build_echo_request(0x1234, 42))
+    reply[0] = ICMP_ECHO_REPLY
+
+    msg = parse_icmp(bytes(reply), has_ip_header=False)
+    assert msg is not None
+    assert (msg.type, msg.ident, msg.seq) == (ICMP_ECHO_REPLY, 0x1234, 42)
+
+    msg = parse_icmp(_ip_header() + bytes(reply), has_ip_header=True)
+    assert msg is not None
+    assert (msg.ident, msg.seq) == (0x1234, 42)
+
+
+def test_parse_unreachable_quotes_original_request():
+    original = _ip_header() + build_echo_request(0x0BAD, 9)[:8]
+    err = struct.pack("!BBHI", ICMP_DEST_UNREACHABLE, 1, 0, 0) + original
+
+    msg = parse_icmp(_ip_header() + err, has_ip_header=True)
+    assert msg is not None
+    assert (msg.type, msg.code, msg.ident, msg.seq) == (ICMP_DEST_UNREACHABLE, 1, 0x0BAD, 9)
+
+
+def test_parse_ignores_other_messages():
+    echo_request = build_echo_request(1, 1)
+    assert parse_icmp(echo_request, has_ip_header=False) is None
+    assert parse_icmp(b"\x00\x00", has_ip_header=False) is None
+
+
+def test_engine_pings_loopback():
+    async def run():
+        engine = IcmpEngine.open()
+        if engine is None:
+            pytest.skip("no ICMP socket permission in this environment")
+        try:
+            assert await engine.resolve("::1") is None
+            addr = await engine.resolve("127.0.0.1")
+            assert addr == "127.0.0.1"
+            results = await asyncio.gather(*[engine.ping(addr, 1000) for _ in range(50)])
+        finally:
+            engine.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(ok for ok, _, _ in results)
+    assert all(latency is not None and latency >= 0 for _, latency, _ in results)
+    assert all(err is None for _, _, err in results)
+
+
+class _SilentSocket(socket.socket):
+    """Swallows echo requests, so no reply ever arrives."""
+
+    def sendto(self, *args, **kwargs):
+        return 0
+
+
+def test_ping_many_reports_sequence_exhaustion_per_probe():
+    async def run():
+        sock = _SilentSocket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        engine = IcmpEngine(sock, raw=False)
+        try:
+            # every sequence number but two is already in flight
+            busy = engine.loop.create_future()
+            for seq in range(2, 0x10000):
+                engine._pending[seq] = _Pending(addr="192.0.2.1", sent_ns=0, future=busy)
+            results = await engine.ping_many([("192.0.2.1", 10)] * 3)
+            leaked = set(engine._pending) - set(range(2, 0x10000))
+        finally:
+            engine.close()
+        return results, leaked
+
+    results, leaked = asyncio.run(run())
+    assert results[:2] == [(False, None, "timeout")] * 2
+    assert results[2] == (False, None, "too many outstanding ICMP echo requests")
+    assert leaked == set()
+
+
+class _FullSocket(_SilentSocket):
+    """Reports a full send buffer for the first echo request only."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent: list[tuple[bytes, tuple[str, int]]] = []
+        self.refused = 0
+
+    def sendto(self, *args, **kwargs):
+        if self.refused == 0:
+            self.refused += 1
+            raise BlockingIOError(11, "Resource temporarily unavailable")
+        data, addr = args
+        self.sent.append((data, addr))
+        return len(data)
+
+
+def test_ping_many_waits_for_a_full_send_buffer():
+    async def run():
+        sock = _FullSocket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        engine = IcmpEngine(sock, raw=False)
+        try:
+            results = await engine.ping_many([("192.0.2.1", 10), ("192.0.2.2", 10)])
+        finally:
+            engine.close()
+        return sock, results
+
+    sock, results = asyncio.run(run())
+    assert sock.refused == 1
+    # both requests went out once the socket was writable again
+    assert [addr for _, addr in sock.sent] == [("192.0.2.1", 0), ("192.0.2.2", 0)]
+    assert results == [(False, None, "timeout")] * 2
@@ -2,6 +2,7 @@ import asyncio
 
 import pytest
 
+import app.poller.icmp as icmp_mod
 from app.poller.icmp import icmp_ping_once
 
 
@@ -22,6 +23,7 @@ async def test_icmp_ping_once_parses_latency(monkeypatch):
         return FakeProc(0, out, b"")
 
     monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_create_subprocess_exec)
+    monkeypatch.setattr(icmp_mod, "get_icmp_engine", lambda: None)
 
     success, latency_ms, error = await icmp_ping_once("1.1.1.1", 1000)
     assert success is True
@@ -35,9 +37,53 @@ async def test_icmp_ping_once_failure_returns_detail(monkeypatch):
         return FakeProc(1, b"", b"ping: unknown host no-such-host\n")
 
     monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_create_subprocess_exec)
+    monkeypatch.setattr(icmp_mod, "get_icmp_engine", lambda: None)
 
     success, latency_ms, error = await icmp_ping_once("no-such-host", 1000)
     assert success is False
     assert latency_ms is None
     assert error is not None
     assert "unknown host" in error
+
+
+@pytest.mark.anyio
+async def test_icmp_ping_once_falls_back_when_sockets_unavailable(monkeypatch):
+    calls = []
+
+    async def fake_create_subprocess_exec(*args, **_kwargs):
+        calls.append(args)
+        return FakeProc(0, b"64 bytes from 10.0.0.1: icmp_seq=1 ttl=64 time=1.9 ms\n", b"")
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_create_subprocess_exec)
+    monkeypatch.setattr(icmp_mod.IcmpEngine, "open", classmethod(lambda cls: None))
+    monkeypatch.setattr(icmp_mod, "_engine", None)
+    monkeypatch.setattr(icmp_mod, "_engine_unavailable", False)
+
+    assert await icmp_ping_once("10.0.0.1", 1000) == (True, 1, None)
+    assert await icmp_ping_once("10.0.0.1", 1000) == (True, 1, None)
+    assert len(calls) == 2
+    assert calls[0][0] == "ping"
+    assert icmp_mod._engine_unavailable is True
+
+
+class FakeEngine:
+    def __init__(self, loop):
+        self.loop = loop
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.anyio
+async def test_get_icmp_engine_closes_the_engine_of_an_earlier_loop(monkeypatch):
+    old = FakeEngine(loop=object())
+    new = FakeEngine(loop=asyncio.get_running_loop())
+    monkeypatch.setattr(icmp_mod.IcmpEngine, "open", classmethod(lambda cls: new))
+    monkeypatch.setattr(icmp_mod, "_engine", old)
+    monkeypatch.setattr(icmp_mod, "_engine_unavailable", False)
+
+    assert icmp_mod.get_icmp_engine() is new
+    assert old.closed is True
+    assert icmp_mod.get_icmp_engine() is new
+    assert new.closed is False
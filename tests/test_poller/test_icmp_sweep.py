@@ -0,0 +1,121 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.models import IcmpTarget
+from app.poller.icmp_engine import IcmpEngine
+from app.poller.sweep import IcmpSweep, sweep_id
+
+
+def _target(name: str, host: str, timeout_ms: int = 1000) -> IcmpTarget:
+    return IcmpTarget(id=uuid4(), name=name, host=host, interval_seconds=30, timeout_ms=timeout_ms)
+
+
+@pytest.mark.anyio
+async def test_sweep_probes_members_together_and_backs_off(monkeypatch):
+    import app.poller.sweep as sweep_mod
+
+    batches: list[list[tuple[str, int]]] = []
+
+    async def fake_ping_many(probes):
+        batches.append(probes)
+        return [(host != "10.0.0.2", 5 if host != "10.0.0.2" else None, None) for host, _ in probes]
+
+    monkeypatch.setattr(sweep_mod, "icmp_ping_many", fake_ping_many)
+
+    up, down = _target("up", "10.0.0.1"), _target("down", "10.0.0.2", timeout_ms=1500)
+    sweep = IcmpSweep(30)
+    sweep.add(up)
+    sweep.add(down)
+    assert sweep.id == sweep_id(30)
+    assert sweep.timeout_ms == 1500
+
+    results = await sweep.run_once()
+    assert batches[-1] == [("10.0.0.1", 1000), ("10.0.0.2", 1500)]
+    by_name = {t.name: r for t, r in results}
+    assert by_name["up"].success is True and by_name["up"].latency_ms == 5
+    assert by_name["down"].success is False
+
+    # "down" now has backoff 2: it sits out one sweep, then is probed again
+    await sweep.run_once()
+    assert [h for h, _ in batches[-1]] == ["10.0.0.1"]
+    await sweep.run_once()
+    assert [h for h, _ in batches[-1]] == ["10.0.0.1", "10.0.0.2"]
+
+    # backoff 4 after the second failure: three sweeps skipped
+    for _ in range(3):
+        await sweep.run_once()
+        assert [h for h, _ in batches[-1]] == ["10.0.0.1"]
+
+    sweep.remove(up.id)
+    assert up.id not in sweep and len(sweep) == 1
+
+
+@pytest.mark.anyio
+async def test_icmp_ping_many_falls_back_for_unresolved_hosts(monkeypatch):
+    import app.poller.icmp as icmp_mod
+
+    class FakeEngine:
+        async def resolve(self, host):
+            return None if host.startswith("v6") else host
+
+        async def ping_many(self, probes):
+            return [(True, 1, None) for _ in probes]
+
+    async def fake_ping_once(host, timeout_ms):
+        return False, None, f"subprocess {host}"
+
+    monkeypatch.setattr(icmp_mod, "get_icmp_engine", lambda: FakeEngine())
+    monkeypatch.setattr(icmp_mod, "icmp_ping_once", fake_ping_once)
+
+    out = await icmp_mod.icmp_ping_many([("1.1.1.1", 100), ("v6-only", 100), ("8.8.8.8", 100)])
+    assert out == [(True, 1, None), (False, None, "subprocess v6-only"), (True, 1, None)]
+
+
+@pytest.mark.anyio
+async def test_icmp_sweep_job_writes_one_batch(monkeypatch):
+    import app.poller.__main__ as poller_main
+    import app.poller.sweep as sweep_mod
+
+    async def fake_ping_many(probes):
+        return [(True, 3, None) for _ in probes]
+
+    class FakeWriter:
+        def __init__(self):
+            self.batches = []
+
+        async def put_many(self, items):
+            self.batches.append(items)
+
+    monkeypatch.setattr(sweep_mod, "icmp_ping_many", fake_ping_many)
+
+    targets = [_target(f"t{i}", f"10.0.1.{i}") for i in range(3)]
+    sweep = IcmpSweep(30)
+    for t in targets:
+        sweep.add(t)
+
+    writer = FakeWriter()
+    job = poller_main.icmp_sweep_job(sweep, writer)  # type: ignore[arg-type]
+    assert job.record_result is False
+
+    result = await poller_main.run_job(job, writer)  # type: ignore[arg-type]
+    assert result is not None and result.success is True
+    assert len(writer.batches) == 1
+    assert {p.target_id for p in writer.batches[0]} == {t.id for t in targets}
+    assert len({p.ts for p in writer.batches[0]}) == 1
+
+
+def test_engine_ping_many_loopback():
+    async def run():
+        engine = IcmpEngine.open()
+        if engine is None:
+            pytest.skip("no ICMP socket permission in this environment")
+        try:
+            return await engine.ping_many([("127.0.0.1", 1000)] * 200)
+        finally:
+            engine.close()
+
+    results = asyncio.run(run())
+    assert len(results) == 200
+    assert all(ok and err is None for ok, _, err in results)
@@ -21,9 +21,10 @@ async def test_poll_http_forever_inserts_one_result(monkeypatch):
 
     calls = []
 
-    async def fake_probe(url: str, timeout_ms: int):
+    async def fake_probe(url: str, timeout_ms: int, *, mode: str):
         assert url == "https://example.com"
         assert timeout_ms == 500
+        assert mode == "cold"
         return False, None, 503, "upstream error"
 
     def fake_insert_probe_result(**kwargs):
@@ -0,0 +1,147 @@
+import uuid
+
+import pytest
+
+from app.models import HttpTarget, IcmpTarget, ProbeResult
+from app.poller.reconcile import TargetReconciler
+from app.poller.scheduler import ProbeJob, Scheduler
+from app.poller.sweep import sweep_id
+
+
+async def _ok() -> ProbeResult:
+    return ProbeResult(success=True, latency_ms=1, status_code=None, error=None)
+
+
+def _job(t):
+    return ProbeJob(
+        kind="test",
+        target_id=t.id,
+        target_name=t.name,
+        interval_seconds=t.interval_seconds,
+        timeout_ms=t.timeout_ms,
+        probe=_ok,
+    )
+
+
+def _sweep_job(sweep):
+    return ProbeJob(
+        kind="icmp-sweep",
+        target_id=sweep.id,
+        target_name=f"icmp-sweep-{sweep.interval_seconds}s",
+        interval_seconds=sweep.interval_seconds,
+        timeout_ms=sweep.timeout_ms,
+        probe=_ok,
+        record_result=False,
+    )
+
+
+def _scheduler() -> Scheduler:
+    async def execute(job):
+        return None
+
+    return Scheduler(execute=execute, workers=1)
+
+
+def _icmp(tid, interval=5, host="127.0.0.1"):
+    return IcmpTarget(
+        id=tid, name=f"icmp-{tid}", host=host, interval_seconds=interval, timeout_ms=1000
+    )
+
+
+def _http(tid, url="http://example.com"):
+    return HttpTarget(
+        id=tid,
+        name=f"http-{tid}",
+        url=url,
+        interval_seconds=5,
+        timeout_ms=1000,
+    )
+
+
+@pytest.mark.anyio
+async def test_reconcile_adds_updates_and_removes():
+    sched = _scheduler()
+    rec = TargetReconciler(sched, icmp_job=_job, http_job=_job)
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    s = rec.apply([_icmp(a)], [_http(b)])
+    assert (s.added, s.removed, s.updated, s.unchanged) == (2, 0, 0, 0)
+    assert sched.job_ids() == {a, b}
+
+    sched._entries[b].backoff = 4
+    s = rec.apply([_icmp(a)], [_http(b, url="http://example.org"), _http(c)])
+    assert (s.added, s.removed, s.updated, s.unchanged) == (1, 0, 1, 1)
+    assert sched._entries[b].backoff == 4  # replaced in place, backoff kept
+
+    s = rec.apply([], [_http(c)])
+    assert (s.added, s.removed, s.updated, s.unchanged) == (0, 2, 0, 1)
+    assert sched.job_ids() == {c}
+    assert rec.target_ids() == {c}
+
+
+@pytest.mark.anyio
+async def test_reconcile_delays_only_new_targets():
+    sched = _scheduler()
+    rec = TargetReconciler(sched, icmp_job=_job, http_job=_job)
+    a, b = uuid.uuid4(), uuid.uuid4()
+
+    rec.apply([_icmp(a)], [])
+    due_a = sched._entries[a].due
+    rec.apply([_icmp(a, host="127.0.0.2"), _icmp(b)], [], delay_new_s=lambda t: 100.0)
+
+    assert sched._entries[a].due - due_a < 50
+    assert sched._entries[b].due - due_a >= 100
+
+
+@pytest.mark.anyio
+async def test_reconcile_manages_sweep_membership():
+    sched = _scheduler()
+    rec = TargetReconciler(sched, icmp_job=_job, http_job=_job, sweep_job=_sweep_job)
+    a, b = uuid.uuid4(), uuid.uuid4()
+
+    rec.apply([_icmp(a, interval=5), _icmp(b, interval=5)], [])
+    assert sched.job_ids() == {sweep_id(5)}
+
+    # moving a target to another interval moves it to that interval's sweep
+    rec.apply([_icmp(a, interval=5), _icmp(b, interval=10)], [])
+    assert sched.job_ids() == {sweep_id(5), sweep_id(10)}
+
+    # an emptied sweep is unscheduled
+    rec.apply([_icmp(b, interval=10)], [])
+    assert sched.job_ids() == {sweep_id(10)}
+
+    rec.apply([], [])
+    assert len(sched) == 0
+    assert len(rec) == 0
+
+
+@pytest.mark.anyio
+async def test_reconcile_delays_new_sweep_members(monkeypatch):
+    import app.poller.sweep as sweep_mod
+
+    probed: list[str] = []
+
+    async def fake_ping_many(probes):
+        probed.extend(host for host, _ in probes)
+        return [(True, 1, None) for _ in probes]
+
+    monkeypatch.setattr(sweep_mod, "icmp_ping_many", fake_ping_many)
+
+    sweeps = []
+
+    def sweep_job(sweep):
+        sweeps.append(sweep)
+        return _sweep_job(sweep)
+
+    sched = _scheduler()
+    rec = TargetReconciler(sched, icmp_job=_job, http_job=_job, sweep_job=sweep_job)
+    a, b = uuid.uuid4(), uuid.uuid4()
+
+    rec.apply([_icmp(a, host="10.0.0.1")], [])
+    # gained from another shard: kept out of the already running sweep for a while
+    rec.apply(
+        [_icmp(a, host="10.0.0.1"), _icmp(b, host="10.0.0.2")], [], delay_new_s=lambda t: 100.0
+    )
+
+    await sweeps[0].run_once()
+    assert probed == ["10.0.0.1"]
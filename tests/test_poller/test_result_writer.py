@@ -0,0 +1,162 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import anyio
+import pytest
+
+from app.models import ProbeResult
+
+
+@pytest.mark.anyio
+async def test_result_writer_flushes_in_batches(monkeypatch):
+    import app.poller.writer as writer_mod
+
+    batches: list[list[dict]] = []
+
+    def fake_insert_probe_results(rows):
+        batches.append(rows)
+        return len(rows)
+
+    monkeypatch.setattr(writer_mod, "insert_probe_results", fake_insert_probe_results)
+
+    writer = writer_mod.ResultWriter(max_queue=100, batch_size=2, flush_interval_s=0.05)
+    tid = uuid4()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(writer.run)
+        for i in range(5):
+            await writer.put(
+                target_id=tid,
+                ts=datetime.now(timezone.utc),
+                result=ProbeResult(success=True, latency_ms=i, status_code=None, error=None),
+            )
+        with anyio.fail_after(2):
+            while writer.stats().rows_written < 5:
+                await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+
+    assert sum(len(b) for b in batches) == 5
+    assert all(len(b) <= 2 for b in batches)
+    assert [r["latency_ms"] for b in batches for r in b] == [0, 1, 2, 3, 4]
+    assert batches[0][0]["target_id"] == tid
+
+    stats = writer.stats()
+    assert stats.flushes == len(batches)
+    assert stats.queue_depth == 0
+    assert stats.rows_failed == 0
+
+
+@pytest.mark.anyio
+async def test_result_writer_flushes_pending_rows_on_shutdown(monkeypatch):
+    import app.poller.writer as writer_mod
+
+    written: list[dict] = []
+
+    def fake_insert_probe_results(rows):
+        written.extend(rows)
+        return len(rows)
+
+    monkeypatch.setattr(writer_mod, "insert_probe_results", fake_insert_probe_results)
+
+    # large batch + long interval: nothing is flushed until shutdown
+    writer = writer_mod.ResultWriter(max_queue=100, batch_size=1000, flush_interval_s=60)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(writer.run)
+        for _ in range(3):
+            await writer.put(
+                target_id=uuid4(),
+                ts=datetime.now(timezone.utc),
+                result=ProbeResult(success=False, latency_ms=None, status_code=None, error="x"),
+            )
+        await anyio.sleep(0.05)
+        assert written == []
+        tg.cancel_scope.cancel()
+
+    assert len(written) == 3
+
+
+@pytest.mark.anyio
+async def test_result_writer_counts_failed_flushes(monkeypatch):
+    import app.poller.writer as writer_mod
+
+    def boom(_rows):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(writer_mod, "insert_probe_results", boom)
+
+    writer = writer_mod.ResultWriter(max_queue=10, batch_size=1, flush_interval_s=0)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(writer.run)
+        await writer.put(
+            target_id=uuid4(),
+            ts=datetime.now(timezone.utc),
+            result=ProbeResult(success=True, latency_ms=1, status_code=None, error=None),
+        )
+        with anyio.fail_after(2):
+            while writer.stats().rows_failed < 1:
+                await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+
+    assert writer.stats().rows_written == 0
+
+
+@pytest.mark.anyio
+async def test_result_writer_spools_while_db_is_down_and_replays(monkeypatch, tmp_path):
+    import app.poller.writer as writer_mod
+    from app.poller.spool import ResultSpool
+
+    db_up = False
+    stored: dict = {}
+
+    def fake_insert_probe_results(rows):
+        if not db_up:
+            raise RuntimeError("db down")
+        for r in rows:
+            stored[r["result_key"]] = r
+        return len(rows)
+
+    monkeypatch.setattr(writer_mod, "insert_probe_results", fake_insert_probe_results)
+
+    spool = ResultSpool(str(tmp_path), max_bytes=10_000_000, segment_bytes=10_000_000)
+    writer = writer_mod.ResultWriter(
+        max_queue=100,
+        batch_size=1,
+        flush_interval_s=0,
+        spool=spool,
+        replay_interval_s=0.05,
+    )
+
+    async def put(i: int) -> None:
+        await writer.put(
+            target_id=uuid4(),
+            ts=datetime.now(timezone.utc),
+            result=ProbeResult(success=True, latency_ms=i, status_code=None, error=None),
+        )
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(writer.run)
+        for i in range(3):
+            await put(i)
+        with anyio.fail_after(2):
+            while writer.stats().rows_spooled < 3:
+                await anyio.sleep(0.01)
+        assert writer.stats().spooling
+        assert spool.stats().rows == 3
+
+        db_up = True
+        with anyio.fail_after(2):
+            while writer.stats().spooling:
+                await anyio.sleep(0.01)
+        await put(3)
+        with anyio.fail_after(2):
+            while writer.stats().rows_written < 1:
+                await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+
+    st = writer.stats()
+    assert st.rows_failed == 0
+    assert st.rows_replayed == 3
+    assert sorted(r["latency_ms"] for r in stored.values()) == [0, 1, 2, 3]
+    assert spool.stats().rows == 0
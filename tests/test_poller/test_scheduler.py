@@ -0,0 +1,339 @@
+import time
+from uuid import uuid4
+
+import anyio
+import pytest
+
+from app.models import ProbeResult
+from app.poller.admission import AdmissionControl
+from app.poller.scheduler import ProbeJob, Scheduler, next_backoff, phase_offset
+
+OK = ProbeResult(success=True, latency_ms=1, status_code=None, error=None)
+FAIL = ProbeResult(success=False, latency_ms=None, status_code=None, error="down")
+
+
+def _job(name: str = "t", interval_seconds: int = 30) -> ProbeJob:
+    async def probe() -> ProbeResult:
+        return OK
+
+    return ProbeJob(
+        kind="icmp",
+        target_id=uuid4(),
+        target_name=name,
+        interval_seconds=interval_seconds,
+        timeout_ms=1000,
+        probe=probe,
+    )
+
+
+def test_next_backoff_doubles_and_caps():
+    assert next_backoff(1, True) == 1
+    assert next_backoff(4, True) == 1
+    assert next_backoff(1, False) == 2
+    assert next_backoff(2, False) == 4
+    assert next_backoff(8, False) == 8
+
+
+@pytest.mark.anyio
+async def test_scheduler_runs_at_fixed_rate_and_applies_backoff(monkeypatch):
+    import app.poller.scheduler as sched_mod
+
+    sleeps: list[int] = []
+
+    def fake_compute_sleep_time(_interval: int, backoff: int) -> float:
+        sleeps.append(backoff)
+        return 0.02
+
+    monkeypatch.setattr(sched_mod, "compute_sleep_time", fake_compute_sleep_time)
+
+    results = [FAIL, FAIL, OK]
+    runs = 0
+
+    async def execute(_job: ProbeJob) -> ProbeResult | None:
+        nonlocal runs
+        runs += 1
+        return results[min(runs, len(results)) - 1]
+
+    scheduler = Scheduler(execute=execute, workers=2)
+    scheduler.add(_job())
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(scheduler.run)
+        with anyio.fail_after(2):
+            while runs < 4:
+                await anyio.sleep(0.005)
+        tg.cancel_scope.cancel()
+
+    assert sleeps[:3] == [2, 4, 1]
+    assert scheduler.stats().dispatched >= 4
+
+
+@pytest.mark.anyio
+async def test_scheduler_keeps_backoff_when_probe_raises(monkeypatch):
+    import app.poller.scheduler as sched_mod
+
+    sleeps: list[int] = []
+
+    def fake_compute_sleep_time(_interval: int, backoff: int) -> float:
+        sleeps.append(backoff)
+        return 0.01
+
+    monkeypatch.setattr(sched_mod, "compute_sleep_time", fake_compute_sleep_time)
+
+    outcomes = [FAIL, None, None]
+    runs = 0
+
+    async def execute(_job: ProbeJob) -> ProbeResult | None:
+        nonlocal runs
+        runs += 1
+        return outcomes[min(runs, len(outcomes)) - 1]
+
+    scheduler = Scheduler(execute=execute, workers=1)
+    scheduler.add(_job())
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(scheduler.run)
+        with anyio.fail_after(2):
+            while runs < 3:
+                await anyio.sleep(0.005)
+        tg.cancel_scope.cancel()
+
+    assert sleeps[:3] == [2, 2, 2]
+
+
+@pytest.mark.anyio
+async def test_scheduler_bounds_concurrency_and_dispatches_many_jobs():
+    in_flight = 0
+    max_in_flight = 0
+    seen: set = set()
+
+    async def execute(job: ProbeJob) -> ProbeResult | None:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await anyio.sleep(0)
+        in_flight -= 1
+        seen.add(job.target_id)
+        return OK
+
+    scheduler = Scheduler(execute=execute, workers=8)
+    jobs = [_job(f"t{i}", interval_seconds=3600) for i in range(5000)]
+    for j in jobs:
+        scheduler.add(j)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(scheduler.run)
+        with anyio.fail_after(10):
+            while len(seen) < len(jobs):
+                await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+
+    assert max_in_flight <= 8
+    stats = scheduler.stats()
+    assert stats.jobs == 5000
+    assert stats.dispatched == 5000
+    assert stats.lag_max_ms >= stats.lag_avg_ms >= 0
+
+
+@pytest.mark.anyio
+async def test_scheduler_remove_stops_job(monkeypatch):
+    import app.poller.scheduler as sched_mod
+
+    monkeypatch.setattr(sched_mod, "compute_sleep_time", lambda _i, _b: 0.01)
+
+    keep, drop = _job("keep"), _job("drop")
+    runs: dict = {keep.target_id: 0, drop.target_id: 0}
+
+    async def execute(job: ProbeJob) -> ProbeResult | None:
+        runs[job.target_id] += 1
+        return OK
+
+    scheduler = Scheduler(execute=execute, workers=2)
+    scheduler.add(keep)
+    scheduler.add(drop)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(scheduler.run)
+        with anyio.fail_after(2):
+            while runs[drop.target_id] < 1:
+                await anyio.sleep(0.005)
+        scheduler.remove(drop.target_id)
+        dropped_runs = runs[drop.target_id]
+        await anyio.sleep(0.1)
+        tg.cancel_scope.cancel()
+
+    assert drop.target_id not in scheduler
+    assert runs[drop.target_id] <= dropped_runs + 1
+    assert runs[keep.target_id] > 3
+
+
+@pytest.mark.anyio
+async def test_scheduler_replace_keeps_due_time_and_backoff():
+    async def execute(_job: ProbeJob) -> ProbeResult | None:
+        return OK
+
+    scheduler = Scheduler(execute=execute, workers=1)
+    job = _job(interval_seconds=60)
+    scheduler.add(job, delay_s=30)
+    entry = scheduler._entries[job.target_id]
+    entry.backoff = 4
+    due = entry.due
+
+    # same target, new settings: the delay is ignored and the due time kept
+    retuned = ProbeJob(**{**job.__dict__, "timeout_ms": 2000})
+    scheduler.add(retuned, delay_s=0)
+    assert scheduler._entries[job.target_id].due == due
+    assert scheduler._entries[job.target_id].backoff == 4
+
+    # a shorter interval brings the due time forward
+    faster = ProbeJob(**{**job.__dict__, "interval_seconds": 5})
+    scheduler.add(faster)
+    assert scheduler._entries[job.target_id].due <= anyio.current_time() + 5
+
+
+@pytest.mark.anyio
+async def test_scheduler_never_overlaps_runs_of_a_re_added_target():
+    job = _job(interval_seconds=60)
+    started = anyio.Event()
+    release = anyio.Event()
+    running = 0
+    max_running = 0
+    runs = 0
+
+    async def execute(_job: ProbeJob) -> ProbeResult | None:
+        nonlocal running, max_running, runs
+        running += 1
+        max_running = max(max_running, running)
+        runs += 1
+        started.set()
+        if runs == 1:
+            await release.wait()
+        running -= 1
+        return OK
+
+    scheduler = Scheduler(execute=execute, workers=2)
+    scheduler.add(job)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(scheduler.run)
+        with anyio.fail_after(2):
+            await started.wait()
+            # the target leaves and comes back (e.g. a shard handover) mid-run
+            scheduler.remove(job.target_id)
+            scheduler.add(job)
+            await anyio.sleep(0.05)
+            assert runs == 1
+
+            release.set()
+            while runs < 2:
+                await anyio.sleep(0.005)
+        tg.cancel_scope.cancel()
+
+    assert max_running == 1
+
+
+def _prio_job(name: str, priority: str, host: str | None = None) -> ProbeJob:
+    job = _job(name)
+    return ProbeJob(**{**job.__dict__, "priority": priority, "host": host})
+
+
+@pytest.mark.anyio
+async def test_scheduler_admits_waiting_jobs_by_priority(monkeypatch):
+    import app.poller.scheduler as sched_mod
+
+    monkeypatch.setattr(sched_mod, "compute_sleep_time", lambda _i, _b: 60.0)
+
+    order: list[str] = []
+
+    async def execute(job: ProbeJob) -> ProbeResult | None:
+        order.append(job.target_name)
+        await anyio.sleep(0.01)
+        return OK
+
+    scheduler = Scheduler(execute=execute, workers=4, admission=AdmissionControl(max_in_flight=1))
+    for name, prio in [("low", "low"), ("low2", "low"), ("normal", "normal"), ("high", "high")]:
+        scheduler.add(_prio_job(name, prio))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(scheduler.run)
+        with anyio.fail_after(2):
+            while len(order) < 4:
+                await anyio.sleep(0.005)
+        tg.cancel_scope.cancel()
+
+    # the first job got the only slot; the rest were queued and admitted by priority
+    assert order == ["low", "high", "normal", "low2"]
+    assert scheduler.stats().deferred == 3
+
+
+@pytest.mark.anyio
+async def test_scheduler_defers_host_limited_and_drops_stale_runs():
+    ran: list[str] = []
+
+    async def execute(job: ProbeJob) -> ProbeResult | None:
+        ran.append(job.target_name)
+        return OK
+
+    scheduler = Scheduler(
+        execute=execute,
+        workers=2,
+        admission=AdmissionControl(max_in_flight=10, host_rate=1.0, host_burst=1),
+    )
+    scheduler.add(_prio_job("a", "normal", host="h.example"))
+    scheduler.add(_prio_job("b", "normal", host="h.example"))
+    stale = _prio_job("stale", "normal")
+    scheduler.add(stale)
+    # pretend this run has been due for longer than its interval
+    scheduler._entries[stale.target_id].due -= 100
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(scheduler.run)
+        await anyio.sleep(0.2)
+        tg.cancel_scope.cancel()
+
+    st = scheduler.stats()
+    assert ran == ["a"]  # "b" waits for the host's next token
+    assert st.deferred == 1
+    assert st.dropped == 1
+
+
+def test_phase_offset_is_stable_and_spread():
+    ids = [uuid4() for _ in range(2000)]
+    offsets = [phase_offset(i, 60) for i in ids]
+
+    assert offsets == [phase_offset(i, 60) for i in ids]
+    assert all(0 <= o < 60 for o in offsets)
+    # roughly uniform: every 6s bucket of the interval gets its share
+    buckets = [0] * 10
+    for o in offsets:
+        buckets[int(o // 6)] += 1
+    assert all(120 < b < 280 for b in buckets)
+
+
+@pytest.mark.anyio
+async def test_scheduler_phase_places_jobs_on_their_slot():
+    async def execute(_job: ProbeJob) -> ProbeResult | None:
+        return OK
+
+    scheduler = Scheduler(execute=execute, workers=1, phase=True)
+    job = _job(interval_seconds=60)
+    scheduler.add(job)
+
+    def wall(t: float) -> float:
+        return t + (time.time() - anyio.current_time())
+
+    entry = scheduler._entries[job.target_id]
+    offset = phase_offset(job.target_id, 60)
+    assert 0 <= entry.due - anyio.current_time() <= 60
+    drift = (wall(entry.due) - offset) % 60
+    assert min(drift, 60 - drift) < 0.01
+
+    # healthy runs stay on the slot, exactly one interval apart
+    first = entry.due
+    scheduler._reschedule(entry, first)
+    assert entry.due == pytest.approx(first + 60, abs=0.01)
+
+    # after backing off, a success brings the job back to its slot
+    entry.backoff = 1
+    scheduler._reschedule(entry, first + 60 + 17)
+    assert entry.due == pytest.approx(first + 120, abs=0.01)
@@ -0,0 +1,80 @@
+import uuid
+from collections import Counter
+
+import pytest
+
+from app.poller.sharding import HashRing, ShardCoordinator
+
+
+def test_hash_ring_is_stable_and_balanced():
+    members = [uuid.uuid4() for _ in range(4)]
+    keys = [uuid.uuid4() for _ in range(4000)]
+
+    ring = HashRing(members)
+    again = HashRing(list(reversed(members)))
+    owners = [ring.owner(k) for k in keys]
+    assert owners == [again.owner(k) for k in keys]
+
+    counts = Counter(owners)
+    assert set(counts) == set(members)
+    # 64 vnodes keeps every member within a loose band around 25%
+    assert all(600 < c < 1400 for c in counts.values())
+
+
+def test_hash_ring_moves_only_the_leaving_members_keys():
+    members = [uuid.uuid4() for _ in range(5)]
+    keys = [uuid.uuid4() for _ in range(2000)]
+
+    before = HashRing(members)
+    after = HashRing(members[:-1])
+    gone = members[-1]
+
+    for k in keys:
+        if before.owner(k) != gone:
+            assert after.owner(k) == before.owner(k)
+        else:
+            assert after.owner(k) != gone
+
+
+def test_hash_ring_empty_has_no_owner():
+    assert HashRing([]).owner(uuid.uuid4()) is None
+
+
+@pytest.mark.anyio
+async def test_shard_coordinator_tracks_membership_and_fences(monkeypatch):
+    import app.poller.sharding as sharding_mod
+
+    me, other = uuid.uuid4(), uuid.uuid4()
+    live = [me]
+    fail = False
+
+    def fake_heartbeat(poller_id, name, lease_seconds):
+        if fail:
+            raise RuntimeError("db down")
+
+    monkeypatch.setattr(sharding_mod, "heartbeat_poller", fake_heartbeat)
+    monkeypatch.setattr(sharding_mod, "fetch_live_poller_ids", lambda: list(live))
+    monkeypatch.setattr(sharding_mod, "delete_expired_pollers", lambda grace: 0)
+
+    coord = ShardCoordinator(poller_id=me, name="p1", lease_s=30)
+    key = uuid.uuid4()
+    assert coord.owns(key) is False  # nothing owned before the first heartbeat
+
+    assert await coord.heartbeat() is True
+    assert coord.owns(key) is True
+    assert await coord.heartbeat() is False  # same membership
+
+    live.append(other)
+    assert await coord.heartbeat() is True
+    assert coord.members == sorted([me, other])
+    assert coord.owns(key) == (HashRing([me, other]).owner(key) == me)
+
+    # a failed heartbeat within the lease keeps ownership ...
+    fail = True
+    assert await coord.heartbeat() is False
+    assert coord.members == sorted([me, other])
+
+    # ... but once the lease has run out everything is released
+    monkeypatch.setattr(coord, "_lease_s", 0)
+    assert await coord.heartbeat() is True
+    assert coord.owns(key) is False
@@ -0,0 +1,34 @@
+import os
+
+from app.poller.reload import TargetsFileWatcher
+
+
+def test_targets_watcher_reports_settled_changes_once(tmp_path):
+    path = tmp_path / "targets.yaml"
+    path.write_text("targets: []\n")
+    watcher = TargetsFileWatcher(str(path))
+
+    assert watcher.changed() is False
+
+    path.write_text("targets:\n  - name: a\n")
+    os.utime(path, ns=(1, 1))
+    # first sighting of the new signature: may still be mid-write
+    assert watcher.changed() is False
+    assert watcher.changed() is True
+    assert watcher.changed() is False
+
+
+def test_targets_watcher_ignores_missing_file_and_detects_replacement(tmp_path):
+    path = tmp_path / "targets.yaml"
+    path.write_text("targets: []\n")
+    watcher = TargetsFileWatcher(str(path))
+
+    path.unlink()
+    assert watcher.changed() is False
+    assert watcher.changed() is False
+
+    replacement = tmp_path / "new.yaml"
+    replacement.write_text("targets: []\n")
+    os.replace(replacement, path)
+    assert watcher.changed() is False
+    assert watcher.changed() is True
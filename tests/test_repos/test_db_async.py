@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import text
+
+from app import db as app_db
+from app.repos import health as health_repo
+
+
+@pytest.fixture
+def anyio_backend():
+    # psycopg's async driver runs on asyncio
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_async_session_scope_uses_async_driver():
+    # Uses the real async engine, outside the per-test transaction, so it only reads.
+    try:
+        stats = await health_repo.fetch_health_db_stats_async()
+        async with app_db.async_session_scope() as session:
+            db_name = (await session.execute(text("SELECT current_database()"))).scalar_one()
+    finally:
+        await app_db._async_engine.dispose()
+
+    assert "test" in db_name
+    assert stats.enabled_targets >= 0
@@ -1,12 +1,20 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+import pytest
 
 from app.repos import health as health_repo
 from app.repos import results as results_repo
-from tests.db_helpers import insert_target
+from tests.db_helpers import insert_result, insert_target
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
 
 
-def test_fetch_health_db_stats(db_session):
+@pytest.mark.anyio
+async def test_fetch_health_db_stats(db_session):
     tid = uuid.uuid4()
     insert_target(db_session, tid=tid, name="health1", interval_seconds=45, enabled=True)
 
@@ -16,7 +24,24 @@ def test_fetch_health_db_stats(db_session):
         target_id=tid, ts=now, success=True, latency_ms=1, status_code=200, error=None, s=db_session
     )
 
-    stats = health_repo.fetch_health_db_stats(s=db_session)
+    stats = await health_repo.fetch_health_db_stats_async()
     assert stats.enabled_targets >= 1
     assert stats.max_interval_seconds >= 45
-    assert stats.last_result_ts is not None
+    assert stats.last_result_ts == now
+    assert stats.live_pollers == 0
+
+
+@pytest.mark.anyio
+async def test_fetch_target_freshness(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="health2", interval_seconds=20)
+    insert_target(db_session, tid=uuid.uuid4(), name="health3", enabled=False)
+
+    now = datetime.now(timezone.utc)
+    insert_result(db_session, target_id=tid, ts=now - timedelta(seconds=5))
+    insert_result(db_session, target_id=tid, ts=now)
+
+    rows = await health_repo.fetch_target_freshness_async()
+    assert [r["target_name"] for r in rows] == ["health2"]
+    assert rows[0]["interval_seconds"] == 20
+    assert rows[0]["last_result_ts"] == now
@@ -0,0 +1,96 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.repos import partitions as partitions_repo
+from tests.db_helpers import insert_result, insert_target
+
+
+def _where(db_session, ts: datetime) -> str:
+    return db_session.execute(
+        text("SELECT tableoid::regclass::text FROM probe_results WHERE ts = :ts"), {"ts": ts}
+    ).scalar_one()
+
+
+def test_ensure_partitions_creates_days_ahead_and_adopts_default_rows(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="part-ahead")
+
+    start = date(2031, 3, 1)
+    stray_ts = datetime(2031, 3, 2, 12, tzinfo=timezone.utc)
+    insert_result(db_session, target_id=tid, ts=stray_ts, success=True, latency_ms=1)
+    assert _where(db_session, stray_ts) == "probe_results_default"
+
+    created = partitions_repo.ensure_probe_result_partitions(2, today=start, s=db_session)
+    assert created == [
+        "probe_results_p20310301",
+        "probe_results_p20310302",
+        "probe_results_p20310303",
+    ]
+
+    # the row that was waiting in the default partition moved to its day
+    assert _where(db_session, stray_ts) == "probe_results_p20310302"
+    assert partitions_repo.ensure_probe_result_partitions(2, today=start, s=db_session) == []
+
+
+def test_drop_expired_partitions_enforces_retention(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="part-retention")
+
+    start = date(2001, 6, 1)
+    partitions_repo.ensure_probe_result_partitions(4, today=start, s=db_session)
+    for i in range(5):
+        insert_result(
+            db_session,
+            target_id=tid,
+            ts=datetime(2001, 6, 1 + i, 6, tzinfo=timezone.utc),
+            success=True,
+            latency_ms=i,
+        )
+
+    assert partitions_repo.drop_expired_probe_result_partitions(0, s=db_session) == []
+
+    today = start + timedelta(days=5)
+    dropped = partitions_repo.drop_expired_probe_result_partitions(3, today=today, s=db_session)
+    assert dropped == ["probe_results_p20010601", "probe_results_p20010602"]
+
+    remaining = db_session.execute(
+        text("SELECT COUNT(*) FROM probe_results WHERE target_id = :tid"), {"tid": tid}
+    ).scalar_one()
+    assert remaining == 3
+
+
+def test_drop_expired_partitions_gives_up_while_probe_results_is_busy():
+    # committed objects: the drop runs in transactions of its own
+    url = make_url(settings.database_url).set(drivername="postgresql")
+    conninfo = url.render_as_string(hide_password=False)
+    name = "probe_results_p19990101"
+
+    def results_version(conn) -> int:
+        row = conn.execute("SELECT value FROM change_counters WHERE name = 'results'").fetchone()
+        return row[0] if row else 0
+
+    with psycopg.connect(conninfo, autocommit=True) as admin, psycopg.connect(conninfo) as reader:
+        admin.execute(f"""
+            CREATE TABLE {name} PARTITION OF probe_results
+            FOR VALUES FROM ('1999-01-01 UTC') TO ('1999-01-02 UTC')
+            """)
+        try:
+            version = results_version(admin)
+            # a long read holds a lock the drop would queue every other query behind
+            reader.execute("SELECT 1 FROM probe_results LIMIT 1")
+            today = date(1999, 1, 10)
+            assert partitions_repo.drop_expired_probe_result_partitions(3, today=today) == []
+            assert name in partitions_repo.fetch_probe_result_partitions()
+            reader.rollback()
+
+            dropped = partitions_repo.drop_expired_probe_result_partitions(3, today=today)
+            assert dropped == [name]
+            # cached result responses must revalidate
+            assert results_version(admin) > version
+        finally:
+            admin.execute(f"DROP TABLE IF EXISTS {name}")
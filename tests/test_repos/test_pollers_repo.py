@@ -0,0 +1,31 @@
+import uuid
+
+from sqlalchemy import text
+
+from app.repos import pollers as pollers_repo
+
+
+def test_poller_heartbeat_lease_and_expiry(db_session):
+    live_id = uuid.uuid4()
+    dead_id = uuid.uuid4()
+
+    pollers_repo.heartbeat_poller(live_id, "live", 30, s=db_session)
+    pollers_repo.heartbeat_poller(live_id, "live", 30, s=db_session)  # renew, no duplicate
+    pollers_repo.heartbeat_poller(dead_id, "dead", 30, s=db_session)
+    db_session.execute(
+        text("UPDATE pollers SET lease_expires_at = NOW() - interval '1 hour' WHERE id = :id"),
+        {"id": dead_id},
+    )
+
+    live = pollers_repo.fetch_live_poller_ids(s=db_session)
+    assert live_id in live
+    assert dead_id not in live
+
+    assert pollers_repo.delete_expired_pollers(60, s=db_session) >= 1
+    remaining = db_session.execute(
+        text("SELECT COUNT(*) FROM pollers WHERE id IN (:a, :b)"), {"a": live_id, "b": dead_id}
+    ).scalar_one()
+    assert remaining == 1
+
+    pollers_repo.delete_poller(live_id, s=db_session)
+    assert live_id not in pollers_repo.fetch_live_poller_ids(s=db_session)
@@ -1,11 +1,20 @@
 import uuid
 from datetime import datetime, timedelta, timezone
 
+import pytest
+from sqlalchemy import text
+
 from app.repos import results as results_repo
-from tests.db_helpers import insert_target
+from tests.db_helpers import insert_result, insert_target
+
 
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
 
-def test_insert_and_fetch_results(db_session):
+
+@pytest.mark.anyio
+async def test_insert_and_fetch_results(db_session):
     tid = uuid.uuid4()
     insert_target(db_session, tid=tid, name="res-target")
 
@@ -33,12 +42,204 @@ def test_insert_and_fetch_results(db_session):
         s=db_session, target_id=tid, ts=now, success=True, latency_ms=5, status_code=200, error=None
     )
 
-    latest = results_repo.fetch_latest_results(s=db_session)
+    latest = await results_repo.fetch_latest_results_async()
     assert any(r["target_id"] == tid for r in latest)
 
-    per_target = results_repo.fetch_results_for_target(s=db_session, target_id=tid)
+    per_target = await results_repo.fetch_results_for_target_async(target_id=tid)
     assert len(per_target) >= 3
 
-    latest_by_target = results_repo.fetch_latest_result_by_target(s=db_session)
+    latest_by_target = await results_repo.fetch_latest_result_by_target_async()
     # should contain our target name
     assert any(r["target_id"] == tid for r in latest_by_target)
+
+
+@pytest.mark.anyio
+async def test_insert_probe_results_bulk(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="res-bulk")
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "target_id": tid,
+            "ts": now - timedelta(seconds=i),
+            "success": i % 2 == 0,
+            "latency_ms": None if i % 2 else i,
+            "status_code": None,
+            "error": "fail" if i % 2 else None,
+        }
+        for i in range(4)
+    ]
+
+    assert results_repo.insert_probe_results(rows, s=db_session) == 4
+    assert results_repo.insert_probe_results([], s=db_session) == 0
+
+    per_target = await results_repo.fetch_results_for_target_async(tid)
+    assert len(per_target) == 4
+    assert [r["latency_ms"] for r in per_target] == [0, None, 2, None]
+    assert [r["error"] for r in per_target] == [None, "fail", None, "fail"]
+
+
+@pytest.mark.anyio
+async def test_insert_probe_results_skips_known_result_keys(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="res-keys")
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "target_id": tid,
+            "ts": now - timedelta(seconds=i),
+            "success": True,
+            "latency_ms": i,
+            "status_code": None,
+            "error": None,
+            "result_key": uuid.uuid4(),
+        }
+        for i in range(3)
+    ]
+
+    assert results_repo.insert_probe_results(rows[:2], s=db_session) == 2
+    # replaying overlapping rows only inserts the new one
+    assert results_repo.insert_probe_results(rows, s=db_session) == 1
+    assert len(await results_repo.fetch_results_for_target_async(tid)) == 3
+
+
+@pytest.mark.anyio
+async def test_fetch_results_pages_by_keyset(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="res-pages")
+
+    now = datetime.now(timezone.utc)
+    # three rows share a timestamp; paging must neither skip nor repeat them
+    for ts in [now, now, now, now - timedelta(seconds=1), now - timedelta(seconds=2)]:
+        insert_result(db_session, target_id=tid, ts=ts)
+
+    seen: list[int] = []
+    before = None
+    while True:
+        page = await results_repo.fetch_results_for_target_async(tid, limit=2, before=before)
+        seen.extend(r["id"] for r in page)
+        if len(page) < 2:
+            break
+        before = (page[-1]["ts"], page[-1]["id"])
+
+    all_rows = await results_repo.fetch_results_for_target_async(tid)
+    assert seen == [r["id"] for r in all_rows]
+    assert len(seen) == 5
+
+    latest = await results_repo.fetch_latest_results_async(limit=1, before=before)
+    assert latest[0]["id"] == seen[-1]
+
+
+def test_iter_results_streams_chunks(db_session):
+    t1 = uuid.uuid4()
+    t2 = uuid.uuid4()
+    insert_target(db_session, tid=t1, name="res-iter-a")
+    insert_target(db_session, tid=t2, name="res-iter-b")
+
+    base = datetime(2026, 1, 5, 10, 0, tzinfo=timezone.utc)
+    for i in range(5):
+        insert_result(db_session, target_id=t1, ts=base + timedelta(seconds=i), latency_ms=i)
+    insert_result(db_session, target_id=t2, ts=base)
+
+    chunks = list(
+        results_repo.iter_results(
+            target_ids=[t1],
+            since=base + timedelta(seconds=1),
+            chunk_size=2,
+            s=db_session,
+        )
+    )
+
+    assert [len(c) for c in chunks] == [2, 2]
+    assert [r["latency_ms"] for c in chunks for r in c] == [1, 2, 3, 4]
+    assert chunks[0][0]["target_name"] == "res-iter-a"
+
+
+@pytest.mark.anyio
+async def test_insert_probe_results_maintains_target_latest(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="res-latest")
+
+    now = datetime.now(timezone.utc)
+
+    def row(ts: datetime, latency_ms: int) -> dict:
+        return {
+            "target_id": tid,
+            "ts": ts,
+            "success": True,
+            "latency_ms": latency_ms,
+            "status_code": None,
+            "error": None,
+        }
+
+    async def latest() -> dict:
+        (r,) = [
+            r
+            for r in await results_repo.fetch_latest_result_by_target_async()
+            if r["target_id"] == tid
+        ]
+        return r
+
+    assert (await latest())["ts"] is None
+
+    results_repo.insert_probe_results(
+        [row(now - timedelta(seconds=5), 5), row(now, 1), row(now - timedelta(seconds=9), 9)],
+        s=db_session,
+    )
+    r = await latest()
+    assert (r["ts"], r["latency_ms"]) == (now, 1)
+
+    def write_count() -> int:
+        return db_session.execute(
+            text("SELECT write_count FROM target_latest WHERE target_id = :id"), {"id": tid}
+        ).scalar_one()
+
+    # a late result does not replace a newer one, but still moves the change token
+    before = write_count()
+    results_repo.insert_probe_results([row(now - timedelta(minutes=1), 60)], s=db_session)
+    assert (await latest())["latency_ms"] == 1
+    assert write_count() == before + 1
+
+    results_repo.insert_probe_result(
+        target_id=tid,
+        ts=now + timedelta(seconds=1),
+        success=False,
+        latency_ms=None,
+        status_code=None,
+        error="down",
+        s=db_session,
+    )
+    r = await latest()
+    assert (r["success"], r["error"]) == (False, "down")
+
+
+@pytest.mark.anyio
+async def test_fetch_results_history_limits_per_target(db_session):
+    t1, t2, off = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    insert_target(db_session, tid=t1, name="hist-repo-a")
+    insert_target(db_session, tid=t2, name="hist-repo-b")
+    insert_target(db_session, tid=off, name="hist-repo-off", enabled=False)
+
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        insert_result(db_session, target_id=t1, ts=now - timedelta(minutes=i))
+        insert_result(db_session, target_id=t2, ts=now - timedelta(minutes=i))
+    insert_result(db_session, target_id=off, ts=now)
+
+    groups = await results_repo.fetch_results_history_async(
+        [t1, t2, uuid.uuid4()], since=now - timedelta(minutes=3, seconds=30), limit=3
+    )
+    assert [g["target_id"] for g in groups] == [t1, t2]
+    for g in groups:
+        assert [r["ts"] for r in g["items"]] == [now - timedelta(minutes=i) for i in range(3)]
+
+    # the range applies before the limit
+    (g,) = await results_repo.fetch_results_history_async(
+        [t1], since=now - timedelta(minutes=3, seconds=30), until=now
+    )
+    assert len(g["items"]) == 3
+
+    names = {g["target_name"] for g in await results_repo.fetch_results_history_async()}
+    assert "hist-repo-off" not in names and "hist-repo-a" in names
@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime, timezone
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.repos import rollups as rollups_repo
+from tests.db_helpers import insert_result, insert_target
+
+
+def _rollup(db_session, table: str, tid: uuid.UUID) -> list[dict]:
+    rows = db_session.execute(
+        text(f"SELECT * FROM {table} WHERE target_id = :tid ORDER BY bucket"), {"tid": tid}
+    ).mappings()
+    return [dict(r) for r in rows]
+
+
+def _catch_up(db_session) -> None:
+    # the first run only marks the new ids as ready; the second aggregates them
+    rollups_repo.advance_rollups(s=db_session)
+    run = rollups_repo.advance_rollups(s=db_session)
+    assert run.caught_up
+
+
+def test_advance_rollups_aggregates_new_rows_once(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="rollup-a")
+
+    base = datetime(2026, 1, 5, 10, 0, tzinfo=timezone.utc)
+    for sec, ok, lat in [(0, True, 3), (20, True, 40), (40, False, None)]:
+        insert_result(
+            db_session, target_id=tid, ts=base.replace(second=sec), success=ok, latency_ms=lat
+        )
+    insert_result(
+        db_session, target_id=tid, ts=base.replace(minute=1), success=True, latency_ms=7000
+    )
+
+    _catch_up(db_session)
+
+    minutes = _rollup(db_session, "probe_rollup_1m", tid)
+    assert [m["bucket"] for m in minutes] == [base, base.replace(minute=1)]
+    first = minutes[0]
+    assert (first["probes"], first["successes"], first["latency_count"]) == (3, 2, 2)
+    assert (first["latency_min"], first["latency_max"], first["latency_sum"]) == (3, 40, 43)
+    # bounds 1,2,5,10,20,50,...: 3ms -> [2,5), 40ms -> [20,50)
+    assert first["latency_hist"][2] == 1
+    assert first["latency_hist"][5] == 1
+    assert sum(first["latency_hist"]) == 2
+    assert minutes[1]["latency_hist"][-1] == 1
+
+    (hour,) = _rollup(db_session, "probe_rollup_1h", tid)
+    assert hour["bucket"] == base
+    assert (hour["probes"], hour["successes"], hour["latency_max"]) == (4, 3, 7000)
+
+    # a later row for the same bucket is merged into it, nothing is counted twice
+    insert_result(db_session, target_id=tid, ts=base.replace(second=50), success=True, latency_ms=1)
+    _catch_up(db_session)
+
+    first = _rollup(db_session, "probe_rollup_1m", tid)[0]
+    assert (first["probes"], first["successes"], first["latency_min"]) == (4, 3, 1)
+    assert sum(first["latency_hist"]) == 3
+    assert _rollup(db_session, "probe_rollup_1h", tid)[0]["probes"] == 5
+    assert rollups_repo.fetch_rollup_watermark(s=db_session) > 0
+
+
+def test_advance_rollups_waits_for_transactions_holding_older_ids(db_session):
+    url = make_url(settings.database_url).set(drivername="postgresql")
+    with psycopg.connect(url.render_as_string(hide_password=False)) as slow:
+        # a writer that drew an id and has not committed yet, e.g. a long replay batch
+        slow.execute("SELECT pg_current_xact_id()")
+        row = slow.execute("SELECT nextval('probe_results_id_seq')").fetchone()
+        assert row is not None
+        slow_id = row[0]
+
+        tid = uuid.uuid4()
+        insert_target(db_session, tid=tid, name="rollup-slow")
+        insert_result(db_session, target_id=tid, ts=datetime(2026, 1, 5, 10, tzinfo=timezone.utc))
+        for _ in range(3):
+            run = rollups_repo.advance_rollups(s=db_session)
+            assert run.caught_up
+            assert run.last_id < slow_id
+        assert _rollup(db_session, "probe_rollup_1m", tid) == []
+        slow.rollback()
+
+    _catch_up(db_session)
+    (minute,) = _rollup(db_session, "probe_rollup_1m", tid)
+    assert minute["probes"] == 1
+    assert rollups_repo.fetch_rollup_watermark(s=db_session) > slow_id
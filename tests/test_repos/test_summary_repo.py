@@ -0,0 +1,121 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repos import rollups as rollups_repo
+from app.repos.summary import fetch_summary_async
+from tests.db_helpers import insert_result, insert_target
+
+NOW = datetime(2026, 1, 5, 12, 30, 20, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _by_name(rows: list[dict]) -> dict[str, dict]:
+    return {r["target_name"]: r for r in rows}
+
+
+@pytest.mark.anyio
+async def test_fetch_summary_raw_window(db_session):
+    tid = uuid.uuid4()
+    idle = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="sum-raw")
+    insert_target(db_session, tid=idle, name="sum-idle")
+
+    insert_result(db_session, target_id=tid, ts=NOW - timedelta(minutes=20), latency_ms=999)
+    insert_result(db_session, target_id=tid, ts=NOW - timedelta(minutes=4), latency_ms=10)
+    insert_result(db_session, target_id=tid, ts=NOW - timedelta(minutes=2), latency_ms=30)
+    insert_result(
+        db_session,
+        target_id=tid,
+        ts=NOW - timedelta(minutes=1),
+        success=False,
+        latency_ms=None,
+    )
+
+    rows = _by_name(await fetch_summary_async(timedelta(minutes=5), now=NOW))
+
+    assert rows["sum-raw"]["total_probes"] == 3
+    assert rows["sum-raw"]["uptime_percent"] == 66.67
+    assert rows["sum-raw"]["avg_latency_ms"] == 20.0
+    assert rows["sum-idle"] == {
+        "target_id": idle,
+        "target_name": "sum-idle",
+        "total_probes": 0,
+        "uptime_percent": None,
+        "avg_latency_ms": None,
+    }
+
+
+@pytest.mark.anyio
+async def test_fetch_summary_rollups_match_raw_rows(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="sum-rollup")
+
+    window = timedelta(hours=3)
+    offsets = [
+        window + timedelta(seconds=5),  # just outside the window
+        window - timedelta(seconds=10),  # before the first whole minute
+        window - timedelta(seconds=50),  # minute rollups before the first whole hour
+        timedelta(hours=2, minutes=7),
+        timedelta(hours=1),
+        timedelta(minutes=10),
+    ]
+    for i, off in enumerate(offsets):
+        insert_result(
+            db_session, target_id=tid, ts=NOW - off, success=i % 3 != 0, latency_ms=10 * (i + 1)
+        )
+
+    rollups_repo.advance_rollups(s=db_session)
+    assert rollups_repo.advance_rollups(s=db_session).caught_up
+
+    # not rolled up yet: read from the raw tail
+    insert_result(db_session, target_id=tid, ts=NOW - timedelta(minutes=90), latency_ms=70)
+
+    (row,) = await fetch_summary_async(window, target_id=tid, now=NOW)
+
+    # the five in-window rows plus the tail row
+    latencies = [20, 30, 40, 50, 60, 70]
+    assert row["total_probes"] == 6
+    assert row["uptime_percent"] == round(100.0 * 5 / 6, 2)
+    assert row["avg_latency_ms"] == round(sum(latencies) / len(latencies), 2)
+
+
+@pytest.mark.anyio
+async def test_fetch_summary_rounds_out_past_minute_rollup_retention(db_session, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "rollup_1m_retention_days", 30)
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="sum-old")
+
+    window = timedelta(days=40)
+    since = NOW - window
+    # in the window's first, partial hour, and in the hour's part before the window
+    insert_result(db_session, target_id=tid, ts=since + timedelta(minutes=10), latency_ms=10)
+    insert_result(db_session, target_id=tid, ts=since - timedelta(minutes=25), latency_ms=30)
+    rollups_repo.advance_rollups(s=db_session)
+    assert rollups_repo.advance_rollups(s=db_session).caught_up
+    rollups_repo.delete_old_rollups("probe_rollup_1m", 30, s=db_session)
+
+    (row,) = await fetch_summary_async(window, target_id=tid, now=NOW)
+
+    # the whole hourly bucket holding `since` counts
+    assert row["total_probes"] == 2
+    assert row["avg_latency_ms"] == 20.0
+
+
+@pytest.mark.anyio
+async def test_fetch_summary_filters_disabled_targets(db_session):
+    tid = uuid.uuid4()
+    insert_target(db_session, tid=tid, name="sum-disabled", enabled=False)
+
+    names = {r["target_name"] for r in await fetch_summary_async(timedelta(hours=1))}
+    assert "sum-disabled" not in names
+
+    (row,) = await fetch_summary_async(timedelta(hours=1), target_id=tid, enabled_only=False)
+    assert row["total_probes"] == 0
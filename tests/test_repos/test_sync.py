@@ -77,3 +77,79 @@ def test_sync_targets_to_db_add_update_disable(db_session):
         text("SELECT enabled FROM targets WHERE name = :name"), {"name": "db-only"}
     ).scalar_one()
     assert disabled is False
+
+
+def test_sync_targets_to_db_http_connection_mode(db_session):
+    from app.repos import targets as targets_repo
+
+    cfg = [
+        TargetCfg(
+            name="http-warm",
+            type="http",
+            host=None,
+            url="https://warm.example",
+            interval_seconds=30,
+            timeout_ms=1000,
+            enabled=True,
+            connection="warm",
+            priority="high",
+        ),
+        TargetCfg(
+            name="http-cold",
+            type="http",
+            host=None,
+            url="https://cold.example",
+            interval_seconds=30,
+            timeout_ms=1000,
+            enabled=True,
+        ),
+    ]
+    sync_repo.sync_targets_to_db(cfg, s=db_session)
+
+    modes = {t.name: t.connection for t in targets_repo.fetch_enabled_http_targets(s=db_session)}
+    assert modes["http-warm"] == "warm"
+    assert modes["http-cold"] == "cold"
+
+    priorities = {t.name: t.priority for t in targets_repo.fetch_enabled_http_targets(s=db_session)}
+    assert priorities["http-warm"] == "high"
+    assert priorities["http-cold"] == "normal"
+
+
+def test_sync_targets_to_db_only_writes_changed_rows(db_session):
+    def cfg(host: str) -> list[TargetCfg]:
+        return [
+            TargetCfg(
+                name=f"sync-{i}",
+                type="icmp",
+                host=host if i == 0 else f"10.0.0.{i}",
+                url=None,
+                interval_seconds=30,
+                timeout_ms=1000,
+                enabled=True,
+            )
+            for i in range(3)
+        ]
+
+    first = sync_repo.sync_targets_to_db(cfg("10.0.0.100"), s=db_session)
+    assert (first.inserted, first.updated) == (3, 0)
+
+    db_session.execute(
+        text("UPDATE targets SET updated_at = '2000-01-01T00:00:00Z' WHERE name LIKE 'sync-%'")
+    )
+
+    again = sync_repo.sync_targets_to_db(cfg("10.0.0.100"), s=db_session)
+    assert again == sync_repo.SyncSummary(inserted=0, updated=0, disabled=0)
+
+    changed = sync_repo.sync_targets_to_db(cfg("10.0.0.200"), s=db_session)
+    assert changed == sync_repo.SyncSummary(inserted=0, updated=1, disabled=0)
+
+    rows = db_session.execute(
+        text(
+            "SELECT name FROM targets WHERE name LIKE 'sync-%' "
+            "AND updated_at > '2000-01-01T00:00:00Z'"
+        )
+    ).all()
+    assert [r.name for r in rows] == ["sync-0"]
+
+    dropped = sync_repo.sync_targets_to_db(cfg("10.0.0.200")[:1], s=db_session)
+    assert dropped.disabled >= 2
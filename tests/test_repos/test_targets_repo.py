@@ -1,11 +1,19 @@
 import uuid
 
+import pytest
+
 from app.models import HttpTarget, IcmpTarget
 from app.repos import targets as targets_repo
 from tests.db_helpers import insert_target
 
 
-def test_fetch_all_and_by_id_and_enabled_filters(db_session):
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_fetch_all_and_by_id_and_enabled_filters(db_session):
     tid1 = uuid.uuid4()
     tid2 = uuid.uuid4()
     tid3 = uuid.uuid4()
@@ -25,20 +33,20 @@ def test_fetch_all_and_by_id_and_enabled_filters(db_session):
     )
 
     # fetch_all default (enabled)
-    all_enabled = targets_repo.fetch_all_targets(s=db_session)
+    all_enabled = await targets_repo.fetch_all_targets_async()
     names = [t["name"] for t in all_enabled]
     assert "a-icmp" in names and "b-http" in names and "c-disabled" not in names
 
     # fetch_all disabled
-    disabled = targets_repo.fetch_all_targets(s=db_session, status="disabled")
+    disabled = await targets_repo.fetch_all_targets_async(status="disabled")
     assert any(t["name"] == "c-disabled" for t in disabled)
 
     # fetch_all all
-    all_ = targets_repo.fetch_all_targets(s=db_session, status="all")
+    all_ = await targets_repo.fetch_all_targets_async(status="all")
     assert len(all_) >= 3
 
-    # fetch_target_by_id
-    row = targets_repo.fetch_target_by_id(s=db_session, target_id=tid1)
+    # fetch_target_by_id_async
+    row = await targets_repo.fetch_target_by_id_async(tid1)
     assert row is not None and row["name"] == "a-icmp"
 
     # fetch enabled icmp targets -> dataclass list